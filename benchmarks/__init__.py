@@ -0,0 +1 @@
+"""Benchmarks de Smart Reports (se ejecutan como scripts, ver cada módulo)"""
@@ -0,0 +1,230 @@
+"""
+Benchmark de ingesta: TranscriptProcessor.process_file sobre archivos sintéticos
+
+Genera (o reutiliza) archivos Transcript Status con transcript_generator y los
+procesa contra una base de datos LOCAL de prueba, reportando por fase el tiempo,
+las filas/s, los viajes a la BD (de stats['timings']) y el pico de memoria (RSS,
+muestreado siguiendo los eventos de progress_callback). También reporta las filas
+válidas y las rechazadas (stats['errores_total']): una carga que rechaza filas no
+es comparable con una que las escribe.
+
+La BD de prueba se indica con --connection-string (o la variable de entorno
+SMART_REPORTS_BENCH_DSN), p. ej. SQL Server Express / LocalDB:
+    Driver={ODBC Driver 17 for SQL Server};Server=(localdb)\\MSSQLLocalDB;
+    Database=SmartReportsBench;Trusted_Connection=yes;
+o, sin servidor, con --sqlite RUTA (backend SQLite local, ver database/backends).
+ATENCIÓN: las tablas Instituto_* de esa BD se crean si faltan y se VACÍAN antes
+de cada corrida. Nunca se usa DATABASE_CONFIG (el servidor de producción).
+
+Con --no-db solo se miden las fases de archivo (headers, lectura, normalización, filtrado, validación).
+
+Uso:
+    python benchmarks/bench_ingestion.py --no-db --sizes 10000 100000
+    python benchmarks/bench_ingestion.py --sizes 10000 1000000 --formats csv xlsx --lang es en
+    python benchmarks/bench_ingestion.py --sqlite benchmarks/data/bench.db --sizes 100000
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.transcript_generator import generate_transcript, GENERATOR_VERSION, XLSX_MAX_ROWS, PREAMBLE
+from smart_reports.services.data_processor import INGESTION_PHASES
+from smart_reports.database.backends.base import get_backend
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def current_rss() -> int:
+    """RSS actual en bytes (requiere psutil)"""
+    return psutil.Process().memory_info().rss
+
+
+def peak_rss_so_far() -> int:
+    """Pico de RSS del proceso hasta ahora, sin psutil (solo Unix)"""
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+
+class RssSampler:
+    """
+    Pico de RSS por fase (clave de INGESTION_PHASES), siguiendo los eventos de progreso
+    Con psutil un hilo muestrea el RSS cada `interval` segundos; sin psutil se
+    registra el pico acumulado del proceso al cambiar de fase.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.picos = {}
+        self._clave = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def __enter__(self):
+        if psutil is not None:
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._record(self._clave)
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def on_progress(self, evento):
+        """progress_callback del procesador"""
+        if evento['clave'] != self._clave:
+            self._record(self._clave)
+            self._clave = evento['clave']
+            self._record(self._clave)
+
+    def _record(self, clave) -> None:
+        if clave is None:
+            return
+        rss = current_rss() if psutil is not None else peak_rss_so_far()
+        with self._lock:
+            self.picos[clave] = max(self.picos.get(clave, 0), rss)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._record(self._clave)
+
+
+def dataset_path(rows: int, fmt: str, lang: str, seed: int) -> str:
+    """Genera el archivo sintético si no existe (se reutiliza entre corridas)"""
+    if fmt == 'xlsx':
+        rows = min(rows, XLSX_MAX_ROWS - len(PREAMBLE) - 1)
+    path = os.path.join(DATA_DIR, f"transcript_{lang}_{rows}_s{seed}_v{GENERATOR_VERSION}.{fmt}")
+    if not os.path.exists(path):
+        print(f"Generando {os.path.basename(path)}...")
+        generate_transcript(path, rows, lang=lang, seed=seed)
+    return path
+
+
+def prepare_database(backend, conn) -> None:
+    """Crea las tablas de prueba si faltan y las vacía (carga inicial limpia)"""
+    cursor = conn.cursor()
+    backend.create_schema(cursor)
+    cursor.execute("DELETE FROM Instituto_ProgresoModulo")
+    cursor.execute("DELETE FROM Instituto_Usuario")
+    cursor.execute("DELETE FROM Instituto_Modulo")
+    conn.commit()
+
+
+def run_file_only(path: str, sampler: RssSampler, parse_cache: bool) -> dict:
+    """--no-db: solo detección de headers, lectura, normalización, filtrado y validación"""
+    from smart_reports.services.data_processor import TranscriptProcessor
+
+    processor = TranscriptProcessor(None, parse_cache=parse_cache, progress_callback=sampler.on_progress)
+    processor._init_stats(path, write_rejected=False)
+    df = processor.validate_dataframe(processor.load_file(path))
+    processor._end_phase()
+    return dict(processor.stats, total_registros=len(df))
+
+
+def run_with_db(path: str, sampler: RssSampler, backend, chunk_size, parse_cache: bool) -> dict:
+    """process_file completo contra la BD de prueba (sin manifiesto delta)"""
+    from smart_reports.services.data_processor import TranscriptProcessor
+
+    conn = backend.connect()
+    try:
+        prepare_database(backend, conn)
+        processor = TranscriptProcessor(conn, delta_mode=False, parse_cache=parse_cache,
+                                        progress_callback=sampler.on_progress, backend=backend)
+        return processor.process_file(path, chunk_size=chunk_size)
+    finally:
+        conn.close()
+
+
+def print_report(titulo: str, fases, total_segundos: float, filas: int, stats: dict) -> None:
+    """Tabla por fase; `filas` son las filas válidas y stats aporta los rechazos"""
+    print(f"\n=== {titulo} ===")
+    print(f"{'Fase':<28}{'Segundos':>10}{'Filas':>12}{'Filas/s':>14}{'Viajes BD':>11}{'RSS pico MB':>13}")
+    for fase in fases:
+        velocidad = f"{fase['filas_por_seg']:,.0f}" if fase['filas_por_seg'] else '-'
+        print(f"{fase['fase']:<28}{fase['segundos']:>10.2f}{fase['filas']:>12,}"
+              f"{velocidad:>14}{fase['round_trips']:>11,}{fase['rss_pico_mb']:>13,.0f}")
+    print(f"{'TOTAL':<28}{total_segundos:>10.2f}{filas:>12,}{filas / total_segundos:>14,.0f}")
+    print(f"Filas válidas: {filas:,}  |  Rechazadas: {stats['errores_total']:,}")
+    if stats['errores_total']:
+        detalle = ', '.join(f"{codigo}: {cantidad:,}" for codigo, cantidad in stats['errores_por_tipo'].items())
+        print(f"ADVERTENCIA: la carga rechazó filas ({detalle}); los tiempos no son comparables")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de ingesta de Transcript Status')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                        help='Filas por archivo (p. ej. 10000 100000 1000000 5000000)')
+    parser.add_argument('--formats', nargs='+', choices=['csv', 'xlsx'], default=['csv', 'xlsx'])
+    parser.add_argument('--lang', nargs='+', choices=['es', 'en'], default=['es'])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--connection-string', default=os.environ.get('SMART_REPORTS_BENCH_DSN'),
+                        help='Cadena ODBC de la BD LOCAL de prueba (se vacía en cada corrida)')
+    parser.add_argument('--sqlite', metavar='RUTA',
+                        help='BD SQLite de prueba en lugar de SQL Server (se vacía en cada corrida)')
+    parser.add_argument('--no-db', action='store_true', help='Solo fases de archivo, sin BD')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Bloque para .csv (0 = archivo completo; por defecto INGESTION_CONFIG)')
+    parser.add_argument('--parse-cache', action='store_true',
+                        help='Usar la caché de archivos parseados (por defecto se parsea siempre)')
+    parser.add_argument('--json', help='Guardar resultados en este archivo (para comparar versiones)')
+    args = parser.parse_args()
+
+    backend = None
+    if args.sqlite:
+        backend = get_backend('sqlite', path=args.sqlite)
+    elif not args.no_db:
+        if not args.connection_string:
+            parser.error('Indique --connection-string (o SMART_REPORTS_BENCH_DSN), --sqlite o use --no-db')
+        backend = get_backend('sqlserver', connection_string=args.connection_string)
+    if psutil is None:
+        print("psutil no está instalado: el RSS por fase es el pico acumulado del proceso")
+
+    resultados = []
+    for rows in args.sizes:
+        for fmt in args.formats:
+            for lang in args.lang:
+                path = dataset_path(rows, fmt, lang, args.seed)
+                inicio = time.perf_counter()
+                with RssSampler() as sampler:
+                    if args.no_db:
+                        stats = run_file_only(path, sampler, args.parse_cache)
+                    else:
+                        stats = run_with_db(path, sampler, backend, args.chunk_size, args.parse_cache)
+                total = time.perf_counter() - inicio
+
+                # Tiempos de stats['timings'] + pico de RSS muestreado por fase
+                fases = [dict(timing, clave=clave, fase=INGESTION_PHASES[clave],
+                              rss_pico_mb=sampler.picos.get(clave, 0) / 2**20)
+                         for clave, timing in stats['timings'].items()]
+
+                titulo = f"{os.path.basename(path)} ({'sin BD' if args.no_db else backend.describe()})"
+                print_report(titulo, fases, total, stats['total_registros'], stats)
+                resultados.append({'archivo': os.path.basename(path), 'filas': stats['total_registros'],
+                                   'filas_validas': stats['total_registros'],
+                                   'errores_total': stats['errores_total'],
+                                   'errores_por_tipo': stats['errores_por_tipo'],
+                                   'formato': fmt, 'idioma': lang, 'con_bd': not args.no_db,
+                                   'segundos': total, 'fases': fases})
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"\n✓ Resultados guardados en {args.json}")
+
+
+if __name__ == '__main__':
+    main()
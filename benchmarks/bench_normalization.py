@@ -0,0 +1,96 @@
+"""
+Benchmark: normalización fila por fila vs normalización columnar
+
+Compara el camino anterior (normalize_status, extract_module_info y
+convert_excel_date llamados por fila) con TranscriptProcessor.normalize_dataframe
+sobre un DataFrame sintético con la forma de un export de Cornerstone.
+
+Uso:
+    python benchmarks/bench_normalization.py
+    python benchmarks/bench_normalization.py --rows 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from smart_reports.services.data_processor import TranscriptProcessor, MODULOS_MAPPING
+
+
+def build_dataframe(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Genera un DataFrame ya con columnas normalizadas (id_usuario, titulo_modulo, ...)"""
+    rng = np.random.default_rng(seed)
+
+    titulos = list(MODULOS_MAPPING.keys()) + [
+        'Módulo 3. Introducción a las operaciones',   # variación de mayúsculas
+        'MÓDULO 15. CURSO NUEVO',                      # fuera de rango
+    ]
+    estados = ['Terminado', 'En Progreso', 'Registrado', 'En progreso']
+
+    # Fechas mezcladas: seriales de Excel, texto dd/mm/yyyy, texto ISO y vacías
+    seriales = rng.integers(44000, 45500, rows).astype(float)
+    fechas = pd.to_datetime(seriales, unit='D', origin='1899-12-30')
+    tipo_fecha = rng.integers(0, 4, rows)
+    fecha_inicio = np.where(tipo_fecha == 0, seriales.astype(object),
+                   np.where(tipo_fecha == 1, fechas.strftime('%d/%m/%Y'),
+                   np.where(tipo_fecha == 2, fechas.strftime('%Y-%m-%d 00:00:00'), None)))
+
+    return pd.DataFrame({
+        'id_usuario': rng.integers(1, rows // 5 + 2, rows).astype(str),
+        'titulo_modulo': rng.choice(titulos, rows),
+        'estado': rng.choice(estados, rows),
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': np.where(rng.random(rows) < 0.5, fecha_inicio, None),
+    })
+
+
+def normalize_per_row(processor: TranscriptProcessor, df: pd.DataFrame) -> pd.DataFrame:
+    """Camino anterior: una llamada por fila y por columna"""
+    ids, estados, inicios, fines = [], [], [], []
+    for titulo, estado, inicio, fin in zip(df['titulo_modulo'], df['estado'],
+                                           df['fecha_inicio'], df['fecha_fin']):
+        ids.append(processor.extract_module_info(titulo)[0])
+        estados.append(processor.normalize_status(estado))
+        inicios.append(processor.convert_excel_date(inicio))
+        fines.append(processor.convert_excel_date(fin))
+
+    return df.assign(IdModulo=pd.array(ids, dtype='Int64'), estado_normalizado=estados,
+                     fecha_inicio_iso=inicios, fecha_fin_iso=fines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Filas sintéticas (default: 1M)')
+    args = parser.parse_args()
+
+    processor = TranscriptProcessor(None)
+
+    print(f"Generando {args.rows:,} filas sintéticas...")
+    df = build_dataframe(args.rows)
+
+    inicio = time.perf_counter()
+    por_fila = normalize_per_row(processor, df)
+    t_fila = time.perf_counter() - inicio
+    print(f"  Fila por fila: {t_fila:8.2f} s  ({args.rows / t_fila:12,.0f} filas/s)")
+
+    inicio = time.perf_counter()
+    columnar = processor.normalize_dataframe(df)
+    t_columnar = time.perf_counter() - inicio
+    print(f"  Columnar:      {t_columnar:8.2f} s  ({args.rows / t_columnar:12,.0f} filas/s)")
+
+    # Ambos caminos deben producir exactamente el mismo resultado
+    columnas = ['IdModulo', 'estado_normalizado', 'fecha_inicio_iso', 'fecha_fin_iso']
+    pd.testing.assert_frame_equal(por_fila[columnas].astype(object),
+                                  columnar[columnas].astype(object))
+
+    print(f"\nSpeedup: {t_fila / t_columnar:.1f}x (resultados idénticos)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: motores de lectura de archivos Transcript Status
+
+Parsea el mismo archivo sintético (forma de un export de Cornerstone, ver
+transcript_generator) con cada motor instalado de services/file_readers y
+reporta segundos y filas/s. Además verifica que, tras normalizar, cada motor
+produzca exactamente las mismas inscripciones que el motor por defecto.
+
+Uso:
+    python benchmarks/bench_readers.py
+    python benchmarks/bench_readers.py --rows 200000 --formats xlsx --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas as pd
+
+from benchmarks.bench_ingestion import dataset_path
+from smart_reports.services.data_processor import TranscriptProcessor
+from smart_reports.services.file_readers import ENGINES_BY_EXTENSION, engine_available, read_table
+
+# Columnas que deben coincidir entre motores después de normalizar
+RESULT_COLUMNS = ['id_usuario', 'IdModulo', 'estado_normalizado', 'fecha_inicio_iso', 'fecha_fin_iso']
+
+
+def normalized_result(processor: TranscriptProcessor, df: pd.DataFrame) -> pd.DataFrame:
+    """Inscripciones normalizadas comparables entre motores"""
+    df = processor.normalize_dataframe(processor._filter_rows(processor.normalize_columns(df)))
+    resultado = df[RESULT_COLUMNS].reset_index(drop=True)
+    return resultado.assign(id_usuario=resultado['id_usuario'].astype(str))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de motores de lectura')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--formats', nargs='+', choices=['csv', 'xlsx'], default=['xlsx', 'csv'])
+    parser.add_argument('--lang', choices=['es', 'en'], default='es')
+    parser.add_argument('--repeat', type=int, default=1, help='Repeticiones por motor (se toma la mejor)')
+    args = parser.parse_args()
+
+    processor = TranscriptProcessor(None, parse_cache=False)
+    for fmt in args.formats:
+        path = dataset_path(args.rows, fmt, args.lang, seed=42)
+        header_row = processor._find_header_row(path)
+        motores = ENGINES_BY_EXTENSION['.' + fmt]
+
+        print(f"\n=== {os.path.basename(path)} ===")
+        print(f"{'Motor':<20}{'Segundos':>10}{'Filas/s':>14}{'vs defecto':>12}  Resultado")
+
+        referencia = None
+        tiempo_defecto = None
+        # El motor por defecto (último) primero: es la referencia de resultado y tiempo
+        for motor in [motores[-1]] + motores[:-1]:
+            if not engine_available(motor):
+                print(f"{motor:<20}{'no instalado':>36}")
+                continue
+
+            mejor = None
+            for _ in range(args.repeat):
+                inicio = time.perf_counter()
+                df, _ = read_table(path, header_row, engine=motor, fallback=False)
+                segundos = time.perf_counter() - inicio
+                mejor = segundos if mejor is None else min(mejor, segundos)
+
+            resultado = normalized_result(processor, df)
+            if referencia is None:
+                referencia, tiempo_defecto = resultado, mejor
+                veredicto = 'referencia'
+            else:
+                veredicto = '✓ idéntico' if resultado.equals(referencia) else '✗ DIFIERE'
+
+            print(f"{motor:<20}{mejor:>10.2f}{len(df) / mejor:>14,.0f}"
+                  f"{tiempo_defecto / mejor:>11.1f}x  {veredicto}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Generador de archivos Transcript Status sintéticos (forma de un export de Cornerstone)
+
+Produce archivos .csv o .xlsx con:
+- headers en español o inglés (más columnas que el procesador ignora)
+- filas basura antes de los headers (título del reporte, fecha, fila vacía)
+- los 14 títulos de módulo, variaciones de mayúsculas y cursos que no son módulos
+- estados con distintas escrituras (incluye estados que el filtro descarta)
+- fechas: en .xlsx seriales de Excel, texto dd/mm/yyyy o vacías; en .csv texto
+  dd/mm/yyyy o vacías (un export CSV no trae seriales)
+
+Uso:
+    python benchmarks/transcript_generator.py --rows 100000 --format xlsx --lang en
+"""
+import argparse
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from smart_reports.services.data_processor import MODULOS_MAPPING
+
+
+HEADERS = {
+    'es': ['Nombre completo del usuario', 'Identificación de usuario', 'Departamento',
+           'Título de la capacitación', 'Tipo de capacitación', 'Estado del expediente',
+           'Fecha asignada del expediente', 'Fecha de finalización de expediente'],
+    'en': ['User Name', 'User ID', 'Department',
+           'Training Title', 'Training Type', 'Transcript Status',
+           'Transcript Assigned Date', 'Transcript Completed Date'],
+}
+
+# Filas previas a los headers (no deben contener palabras clave de header)
+PREAMBLE = [
+    ['Reporte de expedientes - Instituto Hutchison Ports'],
+    ['Generado el', '2024-06-30 08:00'],
+    [],
+]
+
+EXTRA_TITLES = [
+    'Módulo 3. Introducción a las operaciones',     # variación de mayúsculas
+    'Curso de Inducción General',                   # no es módulo: lo descarta el filtro
+    'Liderazgo Operativo 2024',
+]
+
+STATUSES = ['Terminado', 'En Progreso', 'En progreso', 'Registrado',
+            'Completed', 'Not Started']                # los dos últimos los descarta el filtro
+STATUS_WEIGHTS = [0.40, 0.25, 0.05, 0.20, 0.05, 0.05]
+
+DEPARTMENTS = ['Operaciones', 'Mantenimiento', 'Administración', 'TI', 'RRHH', 'Seguridad']
+
+# Límite de filas de una hoja de Excel
+XLSX_MAX_ROWS = 1048576
+
+# Filas generadas por bloque (memoria acotada para archivos de millones de filas)
+BLOCK_ROWS = 250000
+
+# Versión del formato generado: cambia el nombre de los archivos que reutiliza el benchmark
+GENERATOR_VERSION = 2
+
+
+def generate_block(rows: int, start: int, users: int, rng: np.random.Generator,
+                   serial_dates: bool = True) -> pd.DataFrame:
+    """
+    Un bloque de filas de datos con las columnas de HEADERS (orden fijo)
+    serial_dates: Mezclar seriales de Excel con fechas en texto (celdas de .xlsx).
+                  False escribe todas las fechas como texto dd/mm/yyyy (.csv).
+    """
+    titulos = np.array(list(MODULOS_MAPPING.keys()) + EXTRA_TITLES, dtype=object)
+    pesos = np.r_[np.full(len(MODULOS_MAPPING), 0.9 / len(MODULOS_MAPPING)),
+                  np.full(len(EXTRA_TITLES), 0.1 / len(EXTRA_TITLES))]
+
+    user_ids = rng.integers(100000, 100000 + users, rows)
+    estados = rng.choice(np.array(STATUSES, dtype=object), rows, p=STATUS_WEIGHTS)
+
+    # Fechas: 70% serial de Excel, 20% texto dd/mm/yyyy, 10% vacía (sin seriales: 90% texto)
+    asignada = rng.integers(44562, 45473, rows).astype(float)          # 2022-01-01 .. 2024-06-30
+    finalizada = asignada + rng.integers(1, 120, rows)
+    tipo = rng.random(rows)
+    texto_inicio = _serial_to_text(asignada)
+    if serial_dates:
+        fecha_inicio = np.where(tipo < 0.7, asignada.astype(object),
+                                np.where(tipo < 0.9, texto_inicio, None))
+        fin = np.where(tipo < 0.7, finalizada.astype(object), _serial_to_text(finalizada))
+    else:
+        fecha_inicio = np.where(tipo < 0.9, texto_inicio, None)
+        fin = _serial_to_text(finalizada)
+
+    terminado = np.isin(estados, ['Terminado', 'Completed'])
+    fecha_fin = np.where(terminado, fin, None)
+
+    return pd.DataFrame({
+        'nombre': np.char.add('Usuario ', user_ids.astype(str)).astype(object),
+        'id': user_ids.astype(str).astype(object),
+        'departamento': rng.choice(np.array(DEPARTMENTS, dtype=object), rows),
+        'titulo': rng.choice(titulos, rows, p=pesos),
+        'tipo': 'Curso en línea',
+        'estado': estados,
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+    }, index=pd.RangeIndex(start, start + rows))
+
+
+def _serial_to_text(seriales: np.ndarray) -> np.ndarray:
+    """Seriales de Excel -> texto dd/mm/yyyy (como los escribe un export en texto)"""
+    texto = pd.to_datetime(seriales, unit='D', origin='1899-12-30').strftime('%d/%m/%Y')
+    return np.asarray(texto, dtype=object)
+
+
+def generate_transcript(path: str, rows: int, lang: str = 'es', seed: int = 42) -> str:
+    """
+    Escribe un archivo Transcript Status sintético en `path` (.csv o .xlsx)
+    Retorna la ruta escrita. En .xlsx las filas se limitan a lo que cabe en una hoja.
+    """
+    if lang not in HEADERS:
+        raise ValueError(f"Idioma no soportado: {lang} (use 'es' o 'en')")
+
+    rng = np.random.default_rng(seed)
+    users = max(rows // 6, 1)                      # ~6 módulos por usuario
+    headers = HEADERS[lang]
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    if path.endswith('.xlsx'):
+        limite = XLSX_MAX_ROWS - len(PREAMBLE) - 1
+        if rows > limite:
+            print(f"ADVERTENCIA: .xlsx admite {limite:,} filas de datos; se generan {limite:,}")
+            rows = limite
+        _write_xlsx(path, rows, users, headers, rng)
+    elif path.endswith('.csv'):
+        _write_csv(path, rows, users, headers, rng)
+    else:
+        raise ValueError(f"Formato no soportado: {path}")
+
+    return path
+
+
+def _write_csv(path: str, rows: int, users: int, headers, rng) -> None:
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerows(PREAMBLE)
+        writer.writerow(headers)
+        for inicio in range(0, rows, BLOCK_ROWS):
+            bloque = generate_block(min(BLOCK_ROWS, rows - inicio), inicio, users, rng,
+                                    serial_dates=False)
+            bloque.to_csv(f, header=False, index=False)
+
+
+def _write_xlsx(path: str, rows: int, users: int, headers, rng) -> None:
+    import openpyxl
+
+    # write_only: las filas se escriben en streaming sin mantener la hoja en memoria
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Transcript')
+    for fila in PREAMBLE:
+        sheet.append(fila)
+    sheet.append(headers)
+    for inicio in range(0, rows, BLOCK_ROWS):
+        bloque = generate_block(min(BLOCK_ROWS, rows - inicio), inicio, users, rng)
+        for fila in bloque.itertuples(index=False, name=None):
+            sheet.append(fila)
+    workbook.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera un archivo Transcript Status sintético')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--lang', choices=sorted(HEADERS), default='es')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-o', '--output', help='Ruta de salida (por defecto benchmarks/data/...)')
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(os.path.dirname(__file__), 'data',
+                                         f"transcript_{args.lang}_{args.rows}.{args.format}")
+    generate_transcript(output, args.rows, lang=args.lang, seed=args.seed)
+    print(f"✓ Archivo generado: {output}")
+
+
+if __name__ == '__main__':
+    main()
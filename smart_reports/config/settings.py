@@ -1,6 +1,7 @@
 """
 Configuración global del sistema Smart Reports
 """
+import os
 
 # Configuración de Base de Datos
 DATABASE_CONFIG = {
@@ -11,6 +12,33 @@ DATABASE_CONFIG = {
     'driver': 'ODBC Driver 17 for SQL Server'
 }
 
+# Motor de base de datos (database/backends)
+STORAGE_CONFIG = {
+    # sqlserver = DATABASE_CONFIG (producción) | sqlite = archivo local, sin servidor
+    'backend': os.environ.get('SMART_REPORTS_BACKEND', 'sqlserver'),
+    'sqlite_path': os.environ.get('SMART_REPORTS_SQLITE', 'data/instituto_hp.db'),
+}
+
+# Pool de conexiones (database/connection.py)
+POOL_CONFIG = {
+    'max_size': 5,                 # Conexiones abiertas como máximo (en uso + libres)
+    'timeout': 30,                 # Segundos de espera por una conexión libre antes de fallar
+    'health_check_idle': 60,       # Segundos inactiva tras los que se verifica con SELECT 1 al entregarla
+}
+
+# Caché de resultados de consultas (database/query_cache.py)
+CACHE_CONFIG = {
+    'enabled': True,
+    'max_entries': 256,            # Entradas como máximo (desalojo LRU)
+    'default_ttl': 60,             # Segundos de vigencia si la consulta no define el suyo
+    'ttl': {                       # Segundos de vigencia por método de DatabaseQueries
+        'get_all_business_units': 600,
+        'get_all_modules': 600,
+        'get_module_status_counts': 120,
+        'get_users_by_unit_counts': 120,
+    },
+}
+
 # Colores corporativos
 COLORS = {
     'primary': '#6B5B95',      # Morado principal
@@ -37,7 +65,105 @@ PATHS = {
     'logo': 'assets/logo.png',
     'reports': 'reports/',
     'logs': 'logs/',
-    'backups': 'backups/'
+    'backups': 'backups/',
+    'cache': 'data/cache/'
+}
+
+# Configuración de ingesta de archivos Transcript Status
+INGESTION_CONFIG = {
+    'bulk_mode': True,             # MERGE set-based en lugar de UPSERT fila por fila
+    'staging_batch_size': 10000,   # Filas por executemany al llenar la tabla staging
+    'csv_chunk_size': 50000,       # Filas por bloque (con commit) al leer .csv; 0 = todo en memoria
+    'checkpoint_rows': 50000,      # Filas por lote (commit + checkpoint) al cargar .xlsx/.xls; 0 = un commit
+    'delta_mode': True,            # Escribir solo inscripciones nuevas o modificadas (manifiesto local)
+    'max_workers': None,           # Procesos para importar varios archivos (None = núcleos de la CPU)
+    'parse_cache': True,           # Reutilizar archivos ya parseados (clave: hash del contenido)
+    'parse_cache_max_mb': 1024,    # Tamaño máximo de la caché de archivos parseados (LRU)
+    'reader_engine': 'auto',       # auto | calamine | openpyxl_readonly | openpyxl | xlrd | pyarrow | pandas
+    'header_profiles': True,       # Recordar fila de headers y mapeo de columnas por plantilla de export
+    'error_sample_size': 100,      # Mensajes de error guardados en stats['errores'] (el resto solo se cuenta)
+    'rejected_rows_file': True,    # Escribir las filas rechazadas en <archivo>_rechazados_<fecha>.csv
+    'module_fuzzy_cutoff': 0.9,    # Similitud mínima (0-1) para aceptar un título de módulo aproximado
+    'watch_interval': 30           # Segundos entre revisiones de la carpeta (python -m smart_reports.ingest --watch)
+}
+
+# Catálogo base de módulos: IdModulo -> (título en Cornerstone, nombre corto)
+# Se combina con Instituto_Modulo y, si existe, Instituto_ModuloAlias: un módulo
+# nuevo o un curso renombrado se da de alta en la BD sin cambiar el código.
+MODULE_CATALOG = {
+    1: ('MÓDULO 1. INTRODUCCIÓN A LA FILOSOFÍA HUTCHISON PORTS', 'Filosofía HP'),
+    2: ('MÓDULO 2. SOSTENIBILIDAD, NUESTRO COMPROMISO CON EL FUTURO', 'Sostenibilidad'),
+    3: ('MÓDULO 3. INTRODUCCIÓN A LAS OPERACIONES', 'Operaciones'),
+    4: ('MÓDULO 4. RELACIONES LABORALES', 'Relaciones Laborales'),
+    5: ('MÓDULO 5. SEGURIDAD EN LAS OPERACIONES', 'Seguridad'),
+    6: ('MÓDULO 6. CIBERSEGURIDAD', 'Ciberseguridad'),
+    7: ('MÓDULO 7. ENTORNO LABORAL SALUDABLE', 'Entorno Laboral'),
+    8: ('MÓDULO 8. PROCESOS DE RECURSOS HUMANOS', 'RRHH'),
+    9: ('MÓDULO 9. PROGRAMAS DE BIENESTAR INTEGRAL', 'Bienestar'),
+    10: ('MÓDULO 10. DESARROLLO DE NUEVOS PRODUCTOS', 'Nuevos Productos'),
+    11: ('MÓDULO 11. PRODUCTOS DIGITALES DE HP', 'Productos Digitales'),
+    12: ('MÓDULO 12. TECNOLOGÍA: IMPULSO PARA LA EFICIENCIA Y PRODUCTIVIDAD', 'Tecnología'),
+    13: ('MÓDULO 13. ACTIVACIÓN DE PROTOCOLOS Y BRIGADAS DE CONTINGENCIA', 'Contingencia'),
+    14: ('MÓDULO 14. SISTEMA INTEGRADO DE GESTIÓN DE CALIDAD Y MEJORA CONTINUA', 'Calidad'),
+}
+
+# Títulos alternativos (otro idioma, nombre anterior del curso) -> IdModulo
+MODULE_ALIASES = {}
+
+# Palabras clave que identifican la fila de headers de un Transcript Status
+HEADER_KEYWORDS = [
+    'Nombre completo', 'User Name', 'Usuario',
+    'Identificación', 'User ID',
+    'Título', 'Training Title',
+    'Estado', 'Transcript Status',
+    'Capacitación', 'Training'
+]
+
+# Mapeo de columnas del archivo -> columna estándar del procesador
+# Cada columna del archivo (en minúsculas) toma la PRIMERA columna estándar con
+# alguna regla que cumpla: 'contiene' = todas las palabras aparecen en el nombre,
+# 'igual' = el nombre es exactamente ese texto. Para una plantilla nueva basta
+# agregar reglas aquí.
+COLUMN_MAPPINGS = {
+    'id_usuario': [
+        {'contiene': ['identificación', 'usuario']},
+        {'contiene': ['user id']},
+        {'igual': 'userid'},
+        {'igual': 'id usuario'},
+    ],
+    'nombre_usuario': [
+        {'contiene': ['nombre completo']},
+        {'contiene': ['user name']},
+        {'igual': 'username'},
+        {'igual': 'nombre usuario'},
+    ],
+    'titulo_modulo': [
+        {'contiene': ['título', 'capacitación']},
+        {'contiene': ['training title']},
+        {'contiene': ['titulo capacitacion']},
+        {'contiene': ['course title']},
+    ],
+    'estado': [
+        {'contiene': ['estado', 'expediente']},
+        {'contiene': ['transcript status']},
+        {'igual': 'status'},
+        {'igual': 'estado'},
+    ],
+    # Fecha asignada del expediente -> FechaInicio en BD
+    'fecha_inicio': [
+        {'contiene': ['fecha asignada', 'expediente']},
+        {'contiene': ['transcript assigned date']},
+        {'contiene': ['assigned date']},
+        {'contiene': ['fecha asignada']},
+    ],
+    # Fecha de finalización de expediente -> FechaFinalizacion en BD
+    'fecha_fin': [
+        {'contiene': ['fecha', 'finalización', 'expediente']},
+        {'contiene': ['transcript completed date']},
+        {'contiene': ['completed date']},
+        {'contiene': ['fecha finalizacion']},
+        {'contiene': ['fecha', 'completado']},
+    ],
 }
 
 # Estados de módulos
@@ -0,0 +1,145 @@
+"""
+Backends de almacenamiento: lo que cambia entre motores de base de datos
+Las consultas del sistema son SQL estándar con marcadores `?` (pyodbc y sqlite3
+usan el mismo estilo). Lo propio de cada motor (funciones de fecha, tablas
+temporales, MERGE/UPSERT, IDENTITY_INSERT, catálogo de tablas, errores de
+conexión) se pide al backend:
+- Fragmentos SQL para componer consultas: now(), ago(), month_key(), ...
+- Operaciones sobre un cursor que en algún motor requieren varias sentencias:
+  insert_module(), upsert_progress(), create_schema()
+- Varias lecturas en un solo viaje cuando el motor lo permite: fetch_batch()
+Implementaciones: sqlserver.SqlServerBackend (producción) y sqlite.SqliteBackend
+(BD local embebida). Ambas deben pasar backends/contract.py.
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+from smart_reports.config.settings import STORAGE_CONFIG
+
+
+class StorageBackend(ABC):
+    """
+    Interfaz de un motor de base de datos
+    Las subclases implementan los métodos abstractos (si falta alguno, la clase no
+    se puede instanciar); el resto tiene un comportamiento por defecto redefinible.
+    """
+
+    name = ''
+    # Excepciones del driver (las que el pool y los reintentos consideran de BD)
+    errors: Tuple[type, ...] = ()
+
+    @abstractmethod
+    def connect(self):
+        """Abre una conexión DB-API nueva (autocommit desactivado)"""
+
+    @abstractmethod
+    def describe(self) -> str:
+        """Destino legible de la conexión (para mensajes)"""
+
+    def identity(self) -> str:
+        """
+        Identidad estable de la BD destino (mismo valor = misma BD)
+        Clave de los archivos locales que dependen de la BD (ver ingestion_manifest).
+        Puede contener la cadena de conexión: no se muestra, solo se hashea.
+        """
+        return f"{self.name}:{self.describe()}"
+
+    def is_connection_error(self, error: Exception) -> bool:
+        """True si el error indica que la conexión ya no sirve y debe descartarse"""
+        return False
+
+    @contextmanager
+    def fast_executemany(self, cursor):
+        """Bloque en el que executemany envía cada lote en un solo viaje (si el driver lo soporta)"""
+        yield cursor
+
+    def executemany_round_trips(self, cursor, rows: int) -> int:
+        """Viajes a la BD que cuesta un executemany de `rows` filas"""
+        return 1
+
+    # ==================== FRAGMENTOS SQL ====================
+
+    @abstractmethod
+    def now(self) -> str:
+        """Expresión de la fecha y hora actual (hora local del servidor)"""
+
+    @abstractmethod
+    def ago(self, unit: str) -> str:
+        """
+        Expresión de "hace N unidades" respecto de ahora; N es un marcador `?`
+        unit: 'day' o 'month'
+        """
+
+    @abstractmethod
+    def month_key(self, expr: str) -> str:
+        """Expresión 'YYYY-MM' de una fecha"""
+
+    @abstractmethod
+    def as_date(self, expr: str) -> str:
+        """Expresión de la parte fecha (sin hora)"""
+
+    @abstractmethod
+    def format_date_dmy(self, expr: str) -> str:
+        """Expresión de texto 'DD/MM/YYYY' de una fecha"""
+
+    @abstractmethod
+    def existing_tables_sql(self, count: int) -> str:
+        """Consulta de las tablas (de usuario) existentes entre `count` nombres dados como `?`"""
+
+    # ==================== OPERACIONES ====================
+
+    def fetch_batch(self, cursor, queries: Sequence[str]) -> List[list]:
+        """
+        Filas de cada una de varias consultas sin parámetros, en el mismo orden
+        Por defecto una ejecución por consulta; los motores con lotes de varias
+        sentencias lo hacen en un solo viaje (un conjunto de resultados por consulta).
+        """
+        resultados = []
+        for query in queries:
+            cursor.execute(query)
+            resultados.append(cursor.fetchall())
+        return resultados
+
+    def table_exists(self, cursor, table: str) -> bool:
+        cursor.execute(self.existing_tables_sql(1), (table,))
+        return cursor.fetchone() is not None
+
+    def existing_tables(self, cursor, tables: Sequence[str]) -> Set[str]:
+        cursor.execute(self.existing_tables_sql(len(tables)), tuple(tables))
+        return {row[0] for row in cursor.fetchall()}
+
+    @abstractmethod
+    def insert_module(self, cursor, module_id: int, nombre: str) -> None:
+        """Inserta un módulo con su IdModulo explícito (la columna es autonumérica)"""
+
+    @abstractmethod
+    def upsert_progress(self, cursor, valores: List[tuple], batch_size: int,
+                        on_batch: Optional[Callable[[int], None]] = None) -> Tuple[int, int]:
+        """
+        Aplica inscripciones keyed en (UserId, IdModulo) en una operación set-based
+        Args:
+            valores: (UserId, IdModulo, EstatusModuloUsuario, FechaInicio, FechaFinalizacion)
+            batch_size: Filas por executemany al llenar la tabla staging
+            on_batch: Recibe las filas cargadas en staging tras cada lote
+        Retorna (insertadas, modificadas). No hace commit.
+        """
+
+    @abstractmethod
+    def create_schema(self, cursor) -> None:
+        """Crea las tablas Instituto_* que falten (no hace commit)"""
+
+
+def get_backend(name: Optional[str] = None, **options) -> StorageBackend:
+    """
+    Backend configurado (STORAGE_CONFIG['backend']) o el indicado
+    options se pasan al constructor (p. ej. path= para sqlite)
+    """
+    name = name or STORAGE_CONFIG['backend']
+    if name == 'sqlserver':
+        from smart_reports.database.backends.sqlserver import SqlServerBackend
+        return SqlServerBackend(**options)
+    if name == 'sqlite':
+        from smart_reports.database.backends.sqlite import SqliteBackend
+        return SqliteBackend(**options)
+    raise ValueError(f"Backend de BD desconocido: {name!r} (sqlserver | sqlite)")
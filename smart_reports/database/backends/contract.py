@@ -0,0 +1,362 @@
+"""
+Contrato de los backends de BD: lo que todo backend debe cumplir
+Cada verificación usa una conexión del backend sobre tablas Instituto_* VACÍAS:
+las tablas se crean si faltan y se vacían antes de cada verificación.
+ATENCIÓN: nunca se usa DATABASE_CONFIG; con sqlserver hay que indicar la cadena
+de conexión de una BD de prueba.
+
+Uso:
+    python -m smart_reports.database.backends.contract --backend sqlite
+    python -m smart_reports.database.backends.contract --backend sqlserver \\
+        --connection-string "Driver={ODBC Driver 17 for SQL Server};Server=(localdb)\\MSSQLLocalDB;..."
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from typing import Callable, List, Tuple
+
+from smart_reports.database.backends.base import StorageBackend, get_backend
+
+
+TABLES = ['Instituto_ProgresoModulo', 'Instituto_Modulo', 'Instituto_Usuario', 'Instituto_UnidadDeNegocio']
+
+CHECKS: List[Tuple[str, Callable]] = []
+
+
+def check(nombre: str):
+    """Registra una verificación del contrato: fn(backend, conn)"""
+    def registrar(fn):
+        CHECKS.append((nombre, fn))
+        return fn
+    return registrar
+
+
+def expect(condicion: bool, mensaje: str) -> None:
+    if not condicion:
+        raise AssertionError(mensaje)
+
+
+def _progreso(cursor, user_id: str, module_id: int):
+    cursor.execute("""
+        SELECT EstatusModuloUsuario, FechaInicio, FechaFinalizacion, FechaUltimaActualizacion
+        FROM Instituto_ProgresoModulo WHERE UserId = ? AND IdModulo = ?
+    """, (user_id, module_id))
+    return cursor.fetchone()
+
+
+# ==================== VERIFICACIONES ====================
+
+@check('Esquema idempotente y catálogo de tablas')
+def check_schema(backend: StorageBackend, conn) -> None:
+    cursor = conn.cursor()
+    backend.create_schema(cursor)
+    backend.create_schema(cursor)
+    expect(backend.existing_tables(cursor, TABLES) == set(TABLES), "Faltan tablas Instituto_*")
+    expect(backend.table_exists(cursor, 'Instituto_Usuario'), "table_exists no encuentra una tabla existente")
+    expect(not backend.table_exists(cursor, 'Instituto_NoExiste'), "table_exists encuentra una tabla inexistente")
+
+
+@check('Módulo con IdModulo explícito')
+def check_insert_module(backend: StorageBackend, conn) -> None:
+    cursor = conn.cursor()
+    backend.insert_module(cursor, 7, 'Módulo 7')
+    cursor.execute("SELECT IdModulo, NombreModulo, FechaDeAsignacion, Activo FROM Instituto_Modulo")
+    filas = [tuple(fila) for fila in cursor.fetchall()]
+    expect(len(filas) == 1 and filas[0][:2] == (7, 'Módulo 7'), f"Módulo insertado: {filas}")
+    expect(filas[0][2] is not None and filas[0][3] == 1, "Sin FechaDeAsignacion o Activo")
+
+
+@check('Inserción en lote (executemany)')
+def check_executemany(backend: StorageBackend, conn) -> None:
+    cursor = conn.cursor()
+    usuarios = [(f'U{i}', f'Usuario {i}', f'U{i}@hutchison.mx') for i in range(50)]
+    with backend.fast_executemany(cursor):
+        cursor.executemany("""
+            INSERT INTO Instituto_Usuario (UserId, Nombre, Email, TipoDeCorreo)
+            VALUES (?, ?, ?, 'Corporativo')
+        """, usuarios)
+    cursor.execute("SELECT COUNT(*) FROM Instituto_Usuario")
+    expect(cursor.fetchone()[0] == 50, "No se insertaron los 50 usuarios")
+
+
+@check('UPSERT de inscripciones: conteos y valores')
+def check_upsert(backend: StorageBackend, conn) -> None:
+    cursor = conn.cursor()
+    inicio, fin = date(2024, 1, 15), date(2024, 2, 20)
+    primera = [('U1', 1, 'En progreso', inicio, None),
+               ('U2', 1, 'Registrado', None, None),
+               ('U3', 2, 'Terminado', inicio, fin)]
+    expect(backend.upsert_progress(cursor, primera, 1000) == (3, 0), "Primera carga: se esperaban 3 insertadas")
+
+    segunda = [('U1', 1, 'Terminado', inicio, fin),
+               ('U2', 1, 'Registrado', None, None),
+               ('U4', 2, 'No iniciado', None, None)]
+    expect(backend.upsert_progress(cursor, segunda, 1000) == (1, 2),
+           "Segunda carga: se esperaban 1 insertada y 2 modificadas")
+
+    estado, fecha_inicio, fecha_fin, actualizada = _progreso(cursor, 'U1', 1)
+    expect(estado == 'Terminado', f"Estado no actualizado: {estado}")
+    expect((fecha_inicio, fecha_fin) == (inicio, fin), f"Fechas: {fecha_inicio!r}, {fecha_fin!r}")
+    expect(actualizada is not None, "Sin FechaUltimaActualizacion en la fila actualizada")
+    expect(_progreso(cursor, 'U3', 2)[0] == 'Terminado', "Se modificó una fila ausente de la carga")
+
+    cursor.execute("SELECT COUNT(*) FROM Instituto_ProgresoModulo")
+    expect(cursor.fetchone()[0] == 4, "Se esperaban 4 inscripciones")
+
+
+@check('UPSERT: una carga posterior corrige la inscripción guardada')
+def check_upsert_correction(backend: StorageBackend, conn) -> None:
+    cursor = conn.cursor()
+    inicio, fin = date(2024, 1, 15), date(2024, 2, 20)
+    backend.upsert_progress(cursor, [('U1', 1, 'Completado', inicio, fin),
+                                     ('U2', 1, 'En proceso', inicio, None)], 1000)
+
+    # El export del LMS manda: estado revertido, reasignación y fechas corregidas se aplican
+    correccion = [('U1', 1, 'En proceso', inicio + timedelta(days=30), None),
+                  ('U2', 1, 'Registrado', inicio - timedelta(days=5), None)]
+    expect(backend.upsert_progress(cursor, correccion, 1000) == (0, 2),
+           "Segunda carga: se esperaban 2 modificadas")
+    expect(_progreso(cursor, 'U1', 1)[:3] == ('En proceso', inicio + timedelta(days=30), None),
+           f"No se bajó el estado: {_progreso(cursor, 'U1', 1)[:3]!r}")
+    expect(_progreso(cursor, 'U2', 1)[:3] == ('Registrado', inicio - timedelta(days=5), None),
+           f"No se corrigió la fecha: {_progreso(cursor, 'U2', 1)[:3]!r}")
+
+
+@check('UPSERT por lotes: avance de staging')
+def check_upsert_batches(backend: StorageBackend, conn) -> None:
+    cursor = conn.cursor()
+    valores = [(f'U{i}', 3, 'Registrado', None, None) for i in range(25)]
+    avances = []
+    expect(backend.upsert_progress(cursor, valores, 10, on_batch=avances.append) == (25, 0),
+           "Se esperaban 25 insertadas")
+    expect(avances == [10, 20, 25], f"Avance de staging: {avances}")
+
+
+@check('Fragmentos de fecha')
+def check_dates(backend: StorageBackend, conn) -> None:
+    cursor = conn.cursor()
+    hoy = date.today()
+    valores = [('U1', 1, 'Completado', None, hoy),
+               ('U2', 1, 'Completado', None, hoy - timedelta(days=60)),
+               ('U3', 1, 'Completado', None, date(2024, 3, 5))]
+    backend.upsert_progress(cursor, valores, 1000)
+
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM Instituto_ProgresoModulo
+        WHERE FechaFinalizacion >= {backend.ago('day')}
+    """, (30,))
+    expect(cursor.fetchone()[0] == 1, "ago('day'): se esperaba 1 fila en los últimos 30 días")
+
+    cursor.execute(f"""
+        SELECT COUNT(*) FROM Instituto_ProgresoModulo
+        WHERE FechaFinalizacion >= {backend.ago('month')}
+    """, (3,))
+    expect(cursor.fetchone()[0] == 2, "ago('month'): se esperaban 2 filas en los últimos 3 meses")
+
+    mes = backend.month_key('FechaFinalizacion')
+    cursor.execute(f"""
+        SELECT {mes} as Mes, COUNT(*) FROM Instituto_ProgresoModulo
+        WHERE UserId IN ('U1', 'U3')
+        GROUP BY {mes} ORDER BY Mes
+    """)
+    meses = [tuple(fila) for fila in cursor.fetchall()]
+    expect(meses == [('2024-03', 1), (hoy.strftime('%Y-%m'), 1)], f"month_key: {meses}")
+
+    cursor.execute(f"""
+        SELECT {backend.format_date_dmy('FechaFinalizacion')}, {backend.as_date('FechaFinalizacion')}
+        FROM Instituto_ProgresoModulo WHERE UserId = 'U3'
+    """)
+    texto, solo_fecha = cursor.fetchone()
+    expect(texto == '05/03/2024', f"format_date_dmy: {texto!r}")
+    expect(str(solo_fecha)[:10] == '2024-03-05', f"as_date: {solo_fecha!r}")
+
+    cursor.execute(f"SELECT {backend.now()}")
+    expect(cursor.fetchone()[0] is not None, "now() sin valor")
+
+
+@check('Consultas de dashboard (SQL común)')
+def check_dashboard_sql(backend: StorageBackend, conn) -> None:
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO Instituto_UnidadDeNegocio (NombreUnidad) VALUES ('TNG')")
+    cursor.execute("SELECT IdUnidadDeNegocio FROM Instituto_UnidadDeNegocio")
+    unidad = cursor.fetchone()[0]
+    cursor.executemany("INSERT INTO Instituto_Usuario (UserId, Nombre, IdUnidadDeNegocio) VALUES (?, ?, ?)",
+                       [('U1', 'Uno', unidad), ('U2', 'Dos', unidad)])
+    backend.upsert_progress(cursor, [('U1', 1, 'Terminado', None, None),
+                                     ('U2', 1, 'En Progreso', None, None)], 1000)
+
+    cursor.execute("""
+        SELECT
+            CAST(SUM(CASE WHEN EstatusModuloUsuario = 'Terminado' THEN 1 ELSE 0 END) AS FLOAT) * 100 /
+            NULLIF(COUNT(*), 0) as rate
+        FROM Instituto_ProgresoModulo
+    """)
+    expect(abs(cursor.fetchone()[0] - 50.0) < 1e-9, "Tasa de completado distinta de 50%")
+
+    cursor.execute("""
+        SELECT un.NombreUnidad, COUNT(u.UserId)
+        FROM Instituto_Usuario u
+        JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
+        GROUP BY un.IdUnidadDeNegocio, un.NombreUnidad
+        ORDER BY COUNT(u.UserId) DESC
+    """)
+    expect([tuple(fila) for fila in cursor.fetchall()] == [('TNG', 2)], "Usuarios por unidad")
+
+
+@check('Lote de lecturas (fetch_batch)')
+def check_fetch_batch(backend: StorageBackend, conn) -> None:
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO Instituto_Usuario (UserId, Nombre) VALUES (?, ?)",
+                       [('U1', 'Uno'), ('U2', 'Dos'), ('U3', 'Tres')])
+    backend.upsert_progress(cursor, [('U1', 1, 'Completado', None, None),
+                                     ('U2', 1, 'Registrado', None, None)], 1000)
+    consultas = [
+        "SELECT COUNT(*) FROM Instituto_Usuario",
+        "SELECT UserId FROM Instituto_Usuario WHERE UserId <> 'U3' ORDER BY UserId",
+        "SELECT UserId FROM Instituto_Usuario WHERE UserId = 'NoExiste'",
+        "SELECT EstatusModuloUsuario, COUNT(*) FROM Instituto_ProgresoModulo "
+        "GROUP BY EstatusModuloUsuario ORDER BY EstatusModuloUsuario",
+    ]
+    esperado = []
+    for consulta in consultas:
+        cursor.execute(consulta)
+        esperado.append([tuple(fila) for fila in cursor.fetchall()])
+
+    obtenido = [[tuple(fila) for fila in filas] for filas in backend.fetch_batch(cursor, consultas)]
+    expect(obtenido == esperado, f"fetch_batch: {obtenido!r} (esperado {esperado!r})")
+
+
+@check('Rollback descarta lo no confirmado')
+def check_rollback(backend: StorageBackend, conn) -> None:
+    cursor = conn.cursor()
+    backend.upsert_progress(cursor, [('U1', 1, 'Registrado', None, None)], 1000)
+    conn.rollback()
+    cursor.execute("SELECT COUNT(*) FROM Instituto_ProgresoModulo")
+    expect(cursor.fetchone()[0] == 0, "La inscripción sobrevivió al rollback")
+
+
+@check('Identidad de la BD destino (manifiesto delta por BD)')
+def check_identity(backend: StorageBackend, conn) -> None:
+    from smart_reports.services.ingestion_manifest import manifest_path
+
+    expect(backend.identity() == backend.identity(), "identity() no es estable")
+    with tempfile.TemporaryDirectory() as tempdir:
+        otras = [get_backend('sqlite', path=os.path.join(tempdir, nombre)) for nombre in ('a.db', 'b.db')]
+        rutas = {manifest_path(b) for b in [backend] + otras}
+    expect(len(rutas) == 3, f"Dos BD destino comparten manifiesto: {sorted(rutas)}")
+
+
+CSV_FECHAS_MIXTAS = (
+    "Nombre completo del usuario,Identificación de usuario,Departamento,Título de la capacitación,"
+    "Tipo de capacitación,Estado del expediente,Fecha asignada del expediente,"
+    "Fecha de finalización de expediente\n"
+    "Usuario Uno,200001,TI,MÓDULO 3. INTRODUCCIÓN A LAS OPERACIONES,Curso,Terminado,44642,44650.0\n"
+    "Usuario Dos,200002,TI,MÓDULO 3. INTRODUCCIÓN A LAS OPERACIONES,Curso,En progreso,21/03/2022,\n"
+    "Usuario Tres,200003,TI,MÓDULO 3. INTRODUCCIÓN A LAS OPERACIONES,Curso,Terminado,2022-03-21,44650\n"
+)
+
+
+@check('Carga de CSV con fechas seriales y en texto')
+def check_csv_mixed_dates(backend: StorageBackend, conn) -> None:
+    # Importación diferida: el contrato de backends no depende de la capa de servicios
+    from smart_reports.services.data_processor import TranscriptProcessor
+    from smart_reports.services.ingestion_checkpoint import IngestionCheckpoint
+
+    esperado = {'200001': ('Completado', date(2022, 3, 22), date(2022, 3, 30)),
+                '200002': ('En proceso', date(2022, 3, 21), None),
+                '200003': ('Completado', date(2022, 3, 21), date(2022, 3, 30))}
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'fechas_mixtas.csv')
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(CSV_FECHAS_MIXTAS)
+
+        # En memoria la columna llega como texto ('44642', '21/03/2022'); en bloques de
+        # una fila, como número o como texto según el bloque
+        for chunk_size in (0, 1):
+            reset_tables(backend, conn)
+            procesador = TranscriptProcessor(conn, delta_mode=False, parse_cache=False,
+                                             header_profiles=False, checkpoint_rows=0, backend=backend)
+            procesador.checkpoints = IngestionCheckpoint(os.path.join(carpeta, 'checkpoints'))
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = procesador.process_file(ruta, chunk_size=chunk_size)
+
+            expect(stats['errores_total'] == 0,
+                   f"chunk_size={chunk_size}: filas rechazadas {stats['errores_por_tipo']}")
+            cursor = conn.cursor()
+            for user_id, valores in esperado.items():
+                obtenido = _progreso(cursor, user_id, 3)
+                expect(obtenido is not None and tuple(obtenido[:3]) == valores,
+                       f"chunk_size={chunk_size}, {user_id}: {obtenido!r}")
+
+
+# ==================== EJECUCIÓN ====================
+
+def reset_tables(backend: StorageBackend, conn) -> None:
+    """Crea las tablas que falten y las vacía"""
+    cursor = conn.cursor()
+    backend.create_schema(cursor)
+    for tabla in TABLES:
+        cursor.execute(f"DELETE FROM {tabla}")
+    conn.commit()
+
+
+def run_contract(backend: StorageBackend) -> List[Tuple[str, str]]:
+    """Ejecuta todas las verificaciones; retorna [(nombre, error o '')]"""
+    resultados = []
+    conn = backend.connect()
+    try:
+        for nombre, fn in CHECKS:
+            try:
+                reset_tables(backend, conn)
+                fn(backend, conn)
+                resultados.append((nombre, ''))
+            except Exception as e:
+                resultados.append((nombre, f"{type(e).__name__}: {e}"))
+            finally:
+                conn.rollback()
+        reset_tables(backend, conn)
+    finally:
+        conn.close()
+    return resultados
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m smart_reports.database.backends.contract',
+                                     description='Verifica que un backend de BD cumple el contrato')
+    parser.add_argument('--backend', choices=['sqlite', 'sqlserver'], required=True)
+    parser.add_argument('--path', help='sqlite: archivo de la BD de prueba (por defecto uno temporal)')
+    parser.add_argument('--connection-string', default=os.environ.get('SMART_REPORTS_BENCH_DSN'),
+                        help='sqlserver: cadena ODBC de una BD de PRUEBA (o SMART_REPORTS_BENCH_DSN)')
+    args = parser.parse_args(argv)
+
+    temporal = None
+    if args.backend == 'sqlite':
+        if not args.path:
+            temporal = tempfile.TemporaryDirectory()
+            args.path = os.path.join(temporal.name, 'contrato.db')
+        backend = get_backend('sqlite', path=args.path)
+    else:
+        if not args.connection_string:
+            parser.error('Indique --connection-string (o SMART_REPORTS_BENCH_DSN) de una BD de prueba')
+        backend = get_backend('sqlserver', connection_string=args.connection_string)
+
+    print(f"Contrato de backend: {backend.describe()}")
+    try:
+        resultados = run_contract(backend)
+    finally:
+        if temporal is not None:
+            temporal.cleanup()
+
+    for nombre, error in resultados:
+        print(f"  {'✓' if not error else '✗'} {nombre}" + (f": {error}" if error else ''))
+    fallidas = sum(1 for _, error in resultados if error)
+    print(f"{len(resultados) - fallidas}/{len(resultados)} verificaciones correctas")
+    return 1 if fallidas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Backend SQLite: base de datos local embebida (un archivo, sin servidor)
+Mismo esquema Instituto_* que SQL Server, para cargar archivos y ver los
+dashboards fuera de la red corporativa o medir la ingesta en local.
+"""
+import os
+import sqlite3
+from datetime import date, datetime
+from typing import Callable, List, Optional, Tuple
+
+from smart_reports.config.settings import POOL_CONFIG, STORAGE_CONFIG
+from smart_reports.database.backends.base import StorageBackend
+
+
+# Fechas como texto ISO (lo que esperan date()/strftime) y de vuelta a date/datetime
+# según el tipo declarado de la columna, igual que las entrega pyodbc
+sqlite3.register_adapter(date, lambda valor: valor.isoformat())
+sqlite3.register_adapter(datetime, lambda valor: valor.isoformat(sep=' '))
+sqlite3.register_converter('DATE', lambda valor: date.fromisoformat(valor.decode()[:10]))
+sqlite3.register_converter('DATETIME', lambda valor: datetime.fromisoformat(valor.decode()))
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS Instituto_UnidadDeNegocio (
+        IdUnidadDeNegocio INTEGER PRIMARY KEY,
+        NombreUnidad TEXT NOT NULL,
+        Descripcion TEXT NULL,
+        Activo BIT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS Instituto_Usuario (
+        UserId TEXT NOT NULL PRIMARY KEY,
+        Nombre TEXT NULL,
+        Email TEXT NULL,
+        TipoDeCorreo TEXT NULL,
+        IdUnidadDeNegocio INTEGER NULL,
+        Nivel TEXT NULL,
+        Division TEXT NULL,
+        Activo BIT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS Instituto_Modulo (
+        IdModulo INTEGER PRIMARY KEY,
+        NombreModulo TEXT NOT NULL,
+        FechaDeAsignacion DATETIME NULL,
+        Activo BIT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS Instituto_ProgresoModulo (
+        IdInscripcion INTEGER PRIMARY KEY,
+        UserId TEXT NOT NULL,
+        IdModulo INTEGER NOT NULL,
+        EstatusModuloUsuario TEXT NULL,
+        CalificacionModuloUsuario DECIMAL(5, 2) NULL,
+        FechaInicio DATE NULL,
+        FechaFinalizacion DATE NULL,
+        FechaUltimaActualizacion DATETIME NULL
+    )""",
+    # El UPSERT (ON CONFLICT) necesita la clave única, también en BD creadas antes
+    """CREATE UNIQUE INDEX IF NOT EXISTS UQ_Progreso_Usuario_Modulo
+        ON Instituto_ProgresoModulo (UserId, IdModulo)""",
+]
+
+NOW = "datetime('now', 'localtime')"
+
+# Sentencias preparadas retenidas por conexión (por defecto sqlite3 guarda 128)
+STATEMENT_CACHE_SIZE = 256
+
+
+class SqliteBackend(StorageBackend):
+    """SQLite (módulo sqlite3 de la biblioteca estándar)"""
+
+    name = 'sqlite'
+    errors = (sqlite3.Error,)
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Archivo de la BD (se crea si no existe). None usa STORAGE_CONFIG['sqlite_path'].
+                  Debe ser un archivo: cada conexión a ':memory:' sería una BD distinta.
+        """
+        self.path = path or STORAGE_CONFIG['sqlite_path']
+        self._schema_ready = False
+
+    def connect(self):
+        directorio = os.path.dirname(self.path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        # check_same_thread=False: el pool entrega cada conexión a un solo hilo a la vez
+        # cached_statements: caben todas las sentencias preparadas del catálogo (statements.py)
+        conn = sqlite3.connect(self.path, timeout=POOL_CONFIG['timeout'],
+                               detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        # WAL: los dashboards leen mientras una carga escribe
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+
+        # BD local nueva: se crea con el esquema en la primera conexión
+        if not self._schema_ready:
+            self.create_schema(conn.cursor())
+            conn.commit()
+            self._schema_ready = True
+        return conn
+
+    def describe(self) -> str:
+        return f"SQLite {os.path.abspath(self.path)}"
+
+    def is_connection_error(self, error: Exception) -> bool:
+        return isinstance(error, sqlite3.ProgrammingError) and 'closed' in str(error).lower()
+
+    # ==================== FRAGMENTOS SQL ====================
+
+    def now(self) -> str:
+        return NOW
+
+    def ago(self, unit: str) -> str:
+        if unit not in ('day', 'month'):
+            raise ValueError(f"Unidad no soportada: {unit}")
+        return f"datetime('now', 'localtime', '-' || ? || ' {unit}s')"
+
+    def month_key(self, expr: str) -> str:
+        return f"strftime('%Y-%m', {expr})"
+
+    def as_date(self, expr: str) -> str:
+        return f'date({expr})'
+
+    def format_date_dmy(self, expr: str) -> str:
+        return f"strftime('%d/%m/%Y', {expr})"
+
+    def existing_tables_sql(self, count: int) -> str:
+        return f"""
+            SELECT name FROM sqlite_master
+            WHERE type = 'table'
+            AND name IN ({', '.join('?' * count)})
+        """
+
+    # ==================== OPERACIONES ====================
+
+    def insert_module(self, cursor, module_id: int, nombre: str) -> None:
+        # INTEGER PRIMARY KEY acepta el valor explícito (sin IDENTITY_INSERT)
+        cursor.execute(f"""
+            INSERT INTO Instituto_Modulo (IdModulo, NombreModulo, FechaDeAsignacion, Activo)
+            VALUES (?, ?, {NOW}, 1)
+        """, (module_id, nombre))
+
+    def upsert_progress(self, cursor, valores: List[tuple], batch_size: int,
+                        on_batch: Optional[Callable[[int], None]] = None) -> Tuple[int, int]:
+        """Tabla temporal + INSERT ... ON CONFLICT DO UPDATE (equivalente al MERGE)"""
+        cursor.execute("DROP TABLE IF EXISTS temp.ProgresoStaging")
+        cursor.execute("""
+            CREATE TEMP TABLE ProgresoStaging (
+                UserId TEXT, IdModulo INTEGER, EstatusModuloUsuario TEXT,
+                FechaInicio DATE, FechaFinalizacion DATE
+            )
+        """)
+
+        for inicio in range(0, len(valores), batch_size):
+            cursor.executemany("""
+                INSERT INTO temp.ProgresoStaging
+                (UserId, IdModulo, EstatusModuloUsuario, FechaInicio, FechaFinalizacion)
+                VALUES (?, ?, ?, ?, ?)
+            """, valores[inicio:inicio + batch_size])
+            if on_batch is not None:
+                on_batch(min(inicio + batch_size, len(valores)))
+
+        # El UPSERT no informa qué filas insertó: se cuentan antes las que no existen
+        cursor.execute("""
+            SELECT
+                COUNT(*),
+                COALESCE(SUM(CASE WHEN destino.IdInscripcion IS NULL THEN 1 ELSE 0 END), 0)
+            FROM temp.ProgresoStaging origen
+            LEFT JOIN Instituto_ProgresoModulo destino
+                ON destino.UserId = origen.UserId AND destino.IdModulo = origen.IdModulo
+        """)
+        total, insertadas = cursor.fetchone()
+
+        # WHERE true: sin él SQLite confunde ON CONFLICT con la condición de un JOIN
+        cursor.execute(f"""
+            INSERT INTO Instituto_ProgresoModulo
+                (UserId, IdModulo, EstatusModuloUsuario, FechaInicio, FechaFinalizacion)
+            SELECT UserId, IdModulo, EstatusModuloUsuario, FechaInicio, FechaFinalizacion
+            FROM temp.ProgresoStaging WHERE true
+            ON CONFLICT (UserId, IdModulo) DO UPDATE SET
+                EstatusModuloUsuario = excluded.EstatusModuloUsuario,
+                FechaInicio = excluded.FechaInicio,
+                FechaFinalizacion = excluded.FechaFinalizacion,
+                FechaUltimaActualizacion = {NOW}
+        """)
+        cursor.execute("DROP TABLE temp.ProgresoStaging")
+        return insertadas, total - insertadas
+
+    def create_schema(self, cursor) -> None:
+        for sentencia in SCHEMA:
+            cursor.execute(sentencia)
@@ -0,0 +1,215 @@
+"""
+Backend SQL Server (pyodbc): la base de datos de producción
+"""
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from smart_reports.config.settings import DATABASE_CONFIG
+from smart_reports.database.backends.base import StorageBackend
+
+try:
+    import pyodbc
+except ImportError:
+    pyodbc = None
+
+
+# SQLSTATE de conexión perdida o cerrada: la conexión se descarta del pool
+DEAD_CONNECTION_STATES = {'08S01', '08S02', '08001', '08003', '08004', '08007', 'HYT01'}
+
+SCHEMA = """
+IF OBJECT_ID('Instituto_UnidadDeNegocio', 'U') IS NULL
+    CREATE TABLE Instituto_UnidadDeNegocio (
+        IdUnidadDeNegocio INT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+        NombreUnidad NVARCHAR(100) NOT NULL,
+        Descripcion NVARCHAR(255) NULL,
+        Activo BIT NULL
+    );
+IF OBJECT_ID('Instituto_Usuario', 'U') IS NULL
+    CREATE TABLE Instituto_Usuario (
+        UserId NVARCHAR(50) NOT NULL PRIMARY KEY,
+        Nombre NVARCHAR(200) NULL,
+        Email NVARCHAR(200) NULL,
+        TipoDeCorreo NVARCHAR(50) NULL,
+        IdUnidadDeNegocio INT NULL,
+        Nivel NVARCHAR(50) NULL,
+        Division NVARCHAR(100) NULL,
+        Activo BIT NULL
+    );
+IF OBJECT_ID('Instituto_Modulo', 'U') IS NULL
+    CREATE TABLE Instituto_Modulo (
+        IdModulo INT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+        NombreModulo NVARCHAR(200) NOT NULL,
+        FechaDeAsignacion DATETIME NULL,
+        Activo BIT NULL
+    );
+IF OBJECT_ID('Instituto_ProgresoModulo', 'U') IS NULL
+    CREATE TABLE Instituto_ProgresoModulo (
+        IdInscripcion INT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+        UserId NVARCHAR(50) NOT NULL,
+        IdModulo INT NOT NULL,
+        EstatusModuloUsuario NVARCHAR(50) NULL,
+        CalificacionModuloUsuario DECIMAL(5, 2) NULL,
+        FechaInicio DATE NULL,
+        FechaFinalizacion DATE NULL,
+        FechaUltimaActualizacion DATETIME NULL,
+        CONSTRAINT UQ_Progreso_Usuario_Modulo UNIQUE (UserId, IdModulo)
+    );
+"""
+
+
+class SqlServerBackend(StorageBackend):
+    """SQL Server vía ODBC (DATABASE_CONFIG o una cadena de conexión explícita)"""
+
+    name = 'sqlserver'
+
+    def __init__(self, connection_string: Optional[str] = None):
+        """
+        Args:
+            connection_string: Cadena ODBC. None la arma con DATABASE_CONFIG.
+        """
+        if pyodbc is None:
+            raise ImportError("El backend sqlserver requiere pyodbc (pip install pyodbc)")
+        self.errors = (pyodbc.Error,)
+        self._connection_string = connection_string
+
+    @staticmethod
+    def default_connection_string() -> str:
+        """Cadena de conexión ODBC a partir de DATABASE_CONFIG"""
+        return (
+            f"DRIVER={{{DATABASE_CONFIG['driver']}}};"
+            f"SERVER={DATABASE_CONFIG['server']};"
+            f"DATABASE={DATABASE_CONFIG['database']};"
+            f"UID={DATABASE_CONFIG['username']};"
+            f"PWD={DATABASE_CONFIG['password']};"
+            f"TrustServerCertificate=yes;"
+        )
+
+    def connect(self):
+        return pyodbc.connect(self._connection_string or self.default_connection_string())
+
+    def describe(self) -> str:
+        if self._connection_string:
+            return 'SQL Server (cadena de conexión explícita)'
+        return f"SQL Server {DATABASE_CONFIG['server']}/{DATABASE_CONFIG['database']}"
+
+    def identity(self) -> str:
+        if self._connection_string:
+            return f"{self.name}:{self._connection_string}"
+        return f"{self.name}:{DATABASE_CONFIG['server']}/{DATABASE_CONFIG['database']}"
+
+    def is_connection_error(self, error: Exception) -> bool:
+        if not isinstance(error, pyodbc.Error):
+            return False
+        estado = str(error.args[0]) if error.args else ''
+        return estado in DEAD_CONNECTION_STATES or 'closed connection' in str(error).lower()
+
+    @contextmanager
+    def fast_executemany(self, cursor):
+        cursor.fast_executemany = True
+        try:
+            yield cursor
+        finally:
+            cursor.fast_executemany = False
+
+    def executemany_round_trips(self, cursor, rows: int) -> int:
+        # Sin fast_executemany pyodbc envía una sentencia por fila
+        return 1 if getattr(cursor, 'fast_executemany', False) else rows
+
+    # ==================== FRAGMENTOS SQL ====================
+
+    def now(self) -> str:
+        return 'GETDATE()'
+
+    def ago(self, unit: str) -> str:
+        if unit not in ('day', 'month'):
+            raise ValueError(f"Unidad no soportada: {unit}")
+        return f'DATEADD({unit}, -?, GETDATE())'
+
+    def month_key(self, expr: str) -> str:
+        return f"FORMAT({expr}, 'yyyy-MM')"
+
+    def as_date(self, expr: str) -> str:
+        return f'CAST({expr} AS DATE)'
+
+    def format_date_dmy(self, expr: str) -> str:
+        return f'CONVERT(VARCHAR(10), {expr}, 103)'
+
+    def existing_tables_sql(self, count: int) -> str:
+        return f"""
+            SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_TYPE = 'BASE TABLE'
+            AND TABLE_NAME IN ({', '.join('?' * count)})
+        """
+
+    # ==================== OPERACIONES ====================
+
+    def fetch_batch(self, cursor, queries: Sequence[str]) -> List[list]:
+        """Un solo lote T-SQL; cada SELECT es un conjunto de resultados (cursor.nextset())"""
+        # NOCOUNT: sin él los mensajes de filas afectadas se cuentan como conjuntos de resultados
+        cursor.execute('SET NOCOUNT ON;\n' + ';\n'.join(query.strip() for query in queries))
+        resultados = [cursor.fetchall()]
+        while cursor.nextset():
+            resultados.append(cursor.fetchall())
+        if len(resultados) != len(queries):
+            raise RuntimeError(f"El lote devolvió {len(resultados)} conjuntos de resultados, "
+                               f"se esperaban {len(queries)}")
+        return resultados
+
+    def insert_module(self, cursor, module_id: int, nombre: str) -> None:
+        cursor.execute("""
+            SET IDENTITY_INSERT Instituto_Modulo ON;
+            INSERT INTO Instituto_Modulo (IdModulo, NombreModulo, FechaDeAsignacion, Activo)
+            VALUES (?, ?, GETDATE(), 1);
+            SET IDENTITY_INSERT Instituto_Modulo OFF;
+        """, (module_id, nombre))
+
+    def upsert_progress(self, cursor, valores: List[tuple], batch_size: int,
+                        on_batch: Optional[Callable[[int], None]] = None) -> Tuple[int, int]:
+        """#ProgresoStaging con fast_executemany + un único MERGE"""
+        # Tabla staging con los mismos tipos que la tabla destino
+        cursor.execute("""
+            IF OBJECT_ID('tempdb..#ProgresoStaging') IS NOT NULL DROP TABLE #ProgresoStaging;
+            SELECT TOP 0 UserId, IdModulo, EstatusModuloUsuario, FechaInicio, FechaFinalizacion
+            INTO #ProgresoStaging
+            FROM Instituto_ProgresoModulo;
+        """)
+
+        with self.fast_executemany(cursor):
+            for inicio in range(0, len(valores), batch_size):
+                cursor.executemany("""
+                    INSERT INTO #ProgresoStaging
+                    (UserId, IdModulo, EstatusModuloUsuario, FechaInicio, FechaFinalizacion)
+                    VALUES (?, ?, ?, ?, ?)
+                """, valores[inicio:inicio + batch_size])
+                if on_batch is not None:
+                    on_batch(min(inicio + batch_size, len(valores)))
+
+        cursor.execute("""
+            SET NOCOUNT ON;
+            DECLARE @acciones TABLE (Accion NVARCHAR(10));
+
+            MERGE Instituto_ProgresoModulo WITH (HOLDLOCK) AS destino
+            USING #ProgresoStaging AS origen
+                ON destino.UserId = origen.UserId AND destino.IdModulo = origen.IdModulo
+            WHEN MATCHED THEN
+                UPDATE SET EstatusModuloUsuario = origen.EstatusModuloUsuario,
+                           FechaInicio = origen.FechaInicio,
+                           FechaFinalizacion = origen.FechaFinalizacion,
+                           FechaUltimaActualizacion = GETDATE()
+            WHEN NOT MATCHED BY TARGET THEN
+                INSERT (UserId, IdModulo, EstatusModuloUsuario, FechaInicio, FechaFinalizacion)
+                VALUES (origen.UserId, origen.IdModulo, origen.EstatusModuloUsuario,
+                        origen.FechaInicio, origen.FechaFinalizacion)
+            OUTPUT $action INTO @acciones;
+
+            SELECT
+                COALESCE(SUM(CASE WHEN Accion = 'INSERT' THEN 1 ELSE 0 END), 0),
+                COALESCE(SUM(CASE WHEN Accion = 'UPDATE' THEN 1 ELSE 0 END), 0)
+            FROM @acciones;
+        """)
+        insertadas, modificadas = cursor.fetchone()
+        cursor.execute("DROP TABLE #ProgresoStaging")
+        return insertadas, modificadas
+
+    def create_schema(self, cursor) -> None:
+        cursor.execute(SCHEMA)
@@ -1,82 +1,313 @@
 """
-Gestión de conexión a SQL Server
+Gestión de conexiones a la base de datos
+Pool acotado y seguro entre hilos: cada consulta toma una conexión, usa su
+propio cursor y la devuelve. Así la interfaz, los paneles y los trabajos en
+segundo plano pueden consultar a la vez sin mezclar resultados.
+El motor (SQL Server o SQLite local) lo define el backend (database/backends).
 """
-import pyodbc
-from smart_reports.config.settings import DATABASE_CONFIG
+import threading
+import time
+from contextlib import contextmanager
+
+from smart_reports.config.settings import POOL_CONFIG
+from smart_reports.database.backends.base import StorageBackend, get_backend
+from smart_reports.database import statements
+
+
+class PoolTimeout(Exception):
+    """No se liberó ninguna conexión del pool dentro del tiempo de espera"""
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones DB-API
+    - Hasta max_size conexiones; sin libres, connection() espera hasta `timeout`
+    - Las libres se reutilizan en orden LIFO (la más reciente sigue "caliente")
+    - Al entregar una conexión inactiva más de health_check_idle segundos se
+      verifica con SELECT 1; si murió se reemplaza por una nueva
+    - Una conexión que falla con error de conexión se descarta al devolverla, y
+      las libres se verifican antes de su siguiente uso
+    - Al devolverla se hace rollback de lo no confirmado: vuelve limpia al pool
+    """
+
+    def __init__(self, factory, max_size: int = None, timeout: float = None,
+                 health_check_idle: float = None, backend: StorageBackend = None):
+        """
+        Args:
+            factory: Función sin argumentos que abre una conexión nueva
+            max_size, timeout, health_check_idle: None usa POOL_CONFIG
+            backend: Motor de las conexiones (errores del driver y cuáles son de
+                     conexión perdida). None usa el configurado.
+        """
+        self._factory = factory
+        self.backend = backend or get_backend()
+        self.max_size = POOL_CONFIG['max_size'] if max_size is None else max_size
+        self.timeout = POOL_CONFIG['timeout'] if timeout is None else timeout
+        self.health_check_idle = (POOL_CONFIG['health_check_idle']
+                                  if health_check_idle is None else health_check_idle)
+
+        self._lock = threading.Condition()
+        self._idle = []          # [(conexión, momento de devolución)], LIFO
+        self._created = 0        # Abiertas: en uso + libres
+        self._closed = False
+
+    @property
+    def in_use(self) -> int:
+        with self._lock:
+            return self._created - len(self._idle)
+
+    def acquire(self, timeout: float = None):
+        """Toma una conexión (libre, nueva o, si no hay cupo, la primera que se devuelva)"""
+        timeout = self.timeout if timeout is None else timeout
+        limite = time.monotonic() + timeout
+
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise RuntimeError("El pool de conexiones está cerrado")
+                if self._idle:
+                    conn, devuelta = self._idle.pop()
+                    break
+                if self._created < self.max_size:
+                    # Se reserva el cupo; la conexión se abre fuera del lock
+                    self._created += 1
+                    conn, devuelta = None, None
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0 or not self._lock.wait(restante):
+                    raise PoolTimeout(f"Sin conexiones libres tras {timeout}s "
+                                      f"({self.max_size} en uso)")
+
+        if conn is not None and time.monotonic() - devuelta > self.health_check_idle:
+            if not self._is_alive(conn):
+                print("ADVERTENCIA: Conexión inactiva perdida, se reconecta")
+                self._close_quietly(conn)
+                conn = None
+
+        if conn is None:
+            try:
+                conn = self._factory()
+            except Exception:
+                self._forget()
+                raise
+        return conn
+
+    def release(self, conn, broken: bool = False) -> None:
+        """Devuelve la conexión al pool (o la descarta si está rota o el pool se cerró)"""
+        if not broken:
+            try:
+                conn.rollback()
+            except self.backend.errors as e:
+                broken = True
+                if not self.backend.is_connection_error(e):
+                    print(f"ADVERTENCIA: Conexión descartada al devolverla al pool: {e}")
+
+        with self._lock:
+            if not broken and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+                self._lock.notify()
+                return
+            if broken:
+                # Una caída de red o reinicio del servidor suele matar todas: las
+                # libres se verifican (SELECT 1) antes de volver a entregarse
+                self._idle = [(libre, float('-inf')) for libre, _ in self._idle]
+
+        self._close_quietly(conn)
+        self._forget()
+
+    @contextmanager
+    def connection(self):
+        """Conexión del pool para el bloque `with`; se devuelve al salir"""
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except Exception as e:
+            broken = self.backend.is_connection_error(e)
+            raise
+        finally:
+            self.release(conn, broken)
+
+    @contextmanager
+    def cursor(self, commit: bool = False):
+        """
+        Cursor propio sobre una conexión del pool
+        commit=True confirma al terminar el bloque sin errores; ante un error
+        (o sin commit) lo no confirmado se revierte al devolver la conexión.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                if commit:
+                    conn.commit()
+            finally:
+                try:
+                    cursor.close()
+                except self.backend.errors:
+                    pass
+
+    def close(self) -> None:
+        """Cierra las conexiones libres; las que están en uso se cierran al devolverse"""
+        with self._lock:
+            self._closed = True
+            libres, self._idle = self._idle, []
+            self._created -= len(libres)
+            self._lock.notify_all()
+        for conn, _ in libres:
+            self._close_quietly(conn)
+
+    def _forget(self) -> None:
+        """Libera el cupo de una conexión cerrada o que no se pudo abrir"""
+        with self._lock:
+            self._created -= 1
+            self._lock.notify()
+
+    def _is_alive(self, conn) -> bool:
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except self.backend.errors:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
 
 
 class DatabaseConnection:
-    """Singleton para gestionar la conexión a la base de datos"""
+    """
+    Acceso a la base de datos (singleton por proceso) sobre un ConnectionPool
+    Uso recomendado:
+        with db.cursor() as cursor: ...              # lectura
+        with db.cursor(commit=True) as cursor: ...   # escritura
+        db.query('user_search', (user_id,))          # sentencia del catálogo
+    execute / execute_one reintentan una vez si la conexión se había perdido.
+    """
 
     _instance = None
-    _connection = None
-    _cursor = None
+    _instance_lock = threading.Lock()
 
     def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(DatabaseConnection, cls).__new__(cls)
+        with cls._instance_lock:
+            if cls._instance is None:
+                instance = super(DatabaseConnection, cls).__new__(cls)
+                instance._pool = None
+                instance._backend = None
+                instance._pool_lock = threading.Lock()
+                cls._instance = instance
         return cls._instance
 
+    @property
+    def backend(self) -> StorageBackend:
+        """Motor de BD configurado (STORAGE_CONFIG), para los fragmentos SQL propios del motor"""
+        if self._backend is None:
+            self._backend = get_backend()
+        return self._backend
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """Pool del proceso (se crea en el primer uso)"""
+        with self._pool_lock:
+            if self._pool is None or self._pool._closed:
+                self._pool = ConnectionPool(self.create_connection, backend=self.backend)
+            return self._pool
+
     def connect(self):
-        """Establece conexión con SQL Server"""
-        if self._connection is not None:
-            return self._connection
+        """
+        Verifica que la BD responde (abre la primera conexión del pool)
+        Lanza la excepción de conexión si no hay acceso.
+        """
+        with self.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        return self.pool
 
+    def create_connection(self):
+        """
+        Abre una conexión NUEVA, fuera del pool
+        Para trabajos largos en segundo plano (p. ej. la carga de archivos, con su
+        transacción y tablas temporales de sesión) que no deben ocupar ni
+        ensuciar una conexión del pool. El llamador la cierra.
+        """
         try:
-            connection_string = (
-                f"DRIVER={{{DATABASE_CONFIG['driver']}}};"
-                f"SERVER={DATABASE_CONFIG['server']};"
-                f"DATABASE={DATABASE_CONFIG['database']};"
-                f"UID={DATABASE_CONFIG['username']};"
-                f"PWD={DATABASE_CONFIG['password']};"
-                f"TrustServerCertificate=yes;"
-            )
-
-            self._connection = pyodbc.connect(connection_string)
-            self._cursor = self._connection.cursor()
-
-            return self._connection
-
-        except pyodbc.Error as e:
-            raise Exception(f"Error de conexión a BD: {str(e)}")
-
-    def get_cursor(self):
-        """Retorna el cursor de la conexión"""
-        if self._cursor is None:
-            self.connect()
-        return self._cursor
-
-    def commit(self):
-        """Commit de transacción"""
-        if self._connection:
-            self._connection.commit()
-
-    def rollback(self):
-        """Rollback de transacción"""
-        if self._connection:
-            self._connection.rollback()
+            return self.backend.connect()
 
-    def close(self):
-        """Cierra la conexión"""
-        if self._connection:
-            self._connection.close()
-            self._connection = None
-            self._cursor = None
+        except self.backend.errors as e:
+            raise Exception(f"Error de conexión a BD ({self.backend.describe()}): {str(e)}")
 
-    def execute(self, query, params=None):
-        """Ejecuta una query y retorna resultados"""
-        cursor = self.get_cursor()
+    def connection(self):
+        """Context manager: conexión del pool (ver ConnectionPool.connection)"""
+        return self.pool.connection()
+
+    def cursor(self, commit: bool = False):
+        """Context manager: cursor propio sobre una conexión del pool"""
+        return self.pool.cursor(commit)
+
+    def _run(self, work):
+        """Ejecuta work(cursor) como lectura; si la conexión estaba muerta, reintenta una vez con otra"""
+        for intento in (1, 2):
+            try:
+                with self.cursor() as cursor:
+                    return work(cursor)
+            except self.backend.errors as e:
+                if intento == 2 or not self.backend.is_connection_error(e):
+                    raise
+                print(f"ADVERTENCIA: Conexión perdida ({e}), se reintenta con una nueva")
+
+    @staticmethod
+    def _execute(cursor, query, params):
         if params:
             cursor.execute(query, params)
         else:
             cursor.execute(query)
-        return cursor.fetchall()
+        return cursor
+
+    def execute(self, query, params=None):
+        """Ejecuta una query y retorna resultados"""
+        return self._run(lambda cursor: self._execute(cursor, query, params).fetchall())
 
     def execute_one(self, query, params=None):
         """Ejecuta query y retorna un solo resultado"""
-        cursor = self.get_cursor()
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        return cursor.fetchone()
+        return self._run(lambda cursor: self._execute(cursor, query, params).fetchone())
+
+    # ==================== CATÁLOGO DE SENTENCIAS ====================
+
+    def sql(self, name, count=None):
+        """Texto de una sentencia del catálogo (statements.STATEMENTS) para este motor"""
+        return statements.sql(name, self.backend, count)
+
+    def query(self, name, params=None, count=None):
+        """Ejecuta una sentencia del catálogo y retorna resultados"""
+        return self.execute(self.sql(name, count), params)
+
+    def query_one(self, name, params=None, count=None):
+        """Ejecuta una sentencia del catálogo y retorna un solo resultado"""
+        return self.execute_one(self.sql(name, count), params)
+
+    def query_batch(self, names):
+        """
+        Ejecuta varias sentencias del catálogo (sin parámetros) en un solo viaje si el
+        motor lo permite (ver StorageBackend.fetch_batch); retorna las filas de cada una
+        """
+        queries = [self.sql(name) for name in names]
+        return self._run(lambda cursor: self.backend.fetch_batch(cursor, queries))
+
+    # ==================== CIERRE ====================
+
+    def close(self):
+        """
+        Cierra el pool del proceso (al salir de la aplicación)
+        Ninguna conexión queda retenida fuera de un bloque cursor()/connection(),
+        así que no hay nada más que devolver; el siguiente uso abre un pool nuevo.
+        """
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
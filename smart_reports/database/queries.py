@@ -1,151 +1,139 @@
 """
 Todas las consultas SQL del sistema
 """
+from dataclasses import dataclass, field
+from typing import List
+
+from smart_reports.config.settings import CACHE_CONFIG
 from .connection import DatabaseConnection
+from .query_cache import query_cache
+from .statements import DASHBOARD_SNAPSHOT, update_statement
+
+
+@dataclass
+class DashboardSnapshot:
+    """Agregados del dashboard leídos juntos (ver DatabaseQueries.get_dashboard_snapshot)"""
+    total_users: int = 0
+    total_modules: int = 0                 # Módulos activos del catálogo
+    total_enrollments: int = 0
+    modules_in_progress: int = 0           # Módulos con al menos una inscripción
+    completion_rate: float = 0.0           # % de inscripciones completadas
+    users_by_unit: List[tuple] = field(default_factory=list)        # (NombreUnidad, Total)
+    modules_progress: List[tuple] = field(default_factory=list)     # (NombreModulo, Completados, EnProceso, Registrados)
+    top_units: List[tuple] = field(default_factory=list)            # (NombreUnidad, Completados)
+    status_distribution: List[tuple] = field(default_factory=list)  # (Estado, Total)
 
 
 class DatabaseQueries:
-    """Centraliza todas las consultas SQL"""
+    """Centraliza todas las consultas SQL (sentencias del catálogo statements.py)"""
 
     def __init__(self):
         self.db = DatabaseConnection()
+        self.cache = query_cache
+
+    def _cached(self, name, statement, tables, params=None):
+        """Lectura con caché (TTL de CACHE_CONFIG['ttl'][name]); `tables` = tablas que lee"""
+        query = self.db.sql(statement)
+        return self.cache.get_or_load(query, params, lambda: self.db.execute(query, params),
+                                      tables, CACHE_CONFIG['ttl'].get(name))
 
     # ==================== UNIDADES DE NEGOCIO ====================
 
     def get_all_business_units(self):
         """Obtiene todas las unidades de negocio"""
-        query = "SELECT IdUnidadDeNegocio, NombreUnidad FROM Instituto_UnidadDeNegocio ORDER BY NombreUnidad"
-        return self.db.execute(query)
+        return self._cached('get_all_business_units', 'business_units', ['Instituto_UnidadDeNegocio'])
 
     def get_users_by_business_unit(self, unit_id):
         """Obtiene usuarios de una unidad de negocio"""
-        query = """
-            SELECT u.UserId, u.Nombre, u.Email, un.NombreUnidad,
-                   u.Division, u.Nivel, u.Activo
-            FROM dbo.Instituto_Usuario u
-            INNER JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
-            WHERE un.IdUnidadDeNegocio = ?
-            ORDER BY u.Nombre
-        """
-        return self.db.execute(query, (unit_id,))
+        return self.db.query('users_by_business_unit', (unit_id,))
 
     # ==================== MÓDULOS ====================
 
     def get_all_modules(self):
         """Obtiene todos los módulos"""
-        query = "SELECT IdModulo, NombreModulo FROM Instituto_Modulo WHERE Activo = 1 ORDER BY NombreModulo"
-        return self.db.execute(query)
+        return self._cached('get_all_modules', 'active_modules', ['Instituto_Modulo'])
 
     def get_modules_by_status(self, module_id=None, statuses=None):
         """Obtiene módulos filtrados por estado"""
-        query = """
-            SELECT m.NombreModulo, u.Nombre as Usuario,
-                   pm.EstatusModuloUsuario as Estado,
-                   pm.CalificacionModuloUsuario as Calificacion,
-                   pm.FechaInicio, pm.FechaFinalizacion
-            FROM Instituto_ProgresoModulo pm
-            INNER JOIN Instituto_Modulo m ON pm.IdModulo = m.IdModulo
-            INNER JOIN dbo.Instituto_Usuario u ON pm.UserId = u.UserId
-            WHERE pm.EstatusModuloUsuario IN ({})
-        """
-
         params = list(statuses) if statuses else []
+        if not params:
+            return []
 
         if module_id:
-            query += " AND m.IdModulo = ?"
-            params.append(module_id)
-
-        query += " ORDER BY m.NombreModulo, u.Nombre"
-
-        placeholders = ','.join(['?' for _ in statuses])
-        query = query.format(placeholders)
-
-        return self.db.execute(query, params)
+            return self.db.query('progress_by_status_module', params + [module_id], count=len(params))
+        return self.db.query('progress_by_status', params, count=len(params))
 
     # ==================== USUARIOS ====================
 
     def get_user_by_id(self, user_id):
         """Busca usuario por ID - ERROR 7: Consulta completa con todos los campos"""
-        query = """
-            SELECT u.UserId, u.Nombre, u.Email, un.NombreUnidad,
-                   u.Nivel, u.Division, u.Activo
-            FROM dbo.Instituto_Usuario u
-            LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
-            WHERE u.UserId = ?
-        """
-        return self.db.execute_one(query, (user_id,))
+        return self.db.query_one('user_by_id', (user_id,))
 
     def get_new_users(self, days=30):
         """Obtiene usuarios nuevos - ERROR 4: Removida FechaRegistro"""
-        query = """
-            SELECT u.UserId, u.Nombre, u.Email, un.NombreUnidad,
-                   u.Division, u.Activo
-            FROM dbo.Instituto_Usuario u
-            LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
-            ORDER BY u.Nombre
-        """
-        return self.db.execute(query)
+        return self.db.query('users_all')
 
     def insert_user(self, user_id, nombre, email, unit_id=None):
         """Inserta nuevo usuario"""
-        query = """
-            INSERT INTO dbo.Instituto_Usuario (UserId, Nombre, Email, IdUnidadDeNegocio)
-            VALUES (?, ?, ?, ?)
-        """
-        cursor = self.db.get_cursor()
-        cursor.execute(query, (user_id, nombre, email, unit_id))
-        self.db.commit()
+        with self.db.cursor(commit=True) as cursor:
+            cursor.execute(self.db.sql('user_insert'), (user_id, nombre, email, unit_id))
+        self.cache.invalidate(['Instituto_Usuario'])
 
     # ==================== DASHBOARDS ====================
 
     def get_module_status_counts(self):
         """Obtiene conteo de módulos por estado"""
-        query = """
-            SELECT EstatusModuloUsuario, COUNT(*) as Total
-            FROM Instituto_ProgresoModulo
-            GROUP BY EstatusModuloUsuario
-        """
-        return self.db.execute(query)
+        return self._cached('get_module_status_counts', 'module_status_counts', ['Instituto_ProgresoModulo'])
 
     def get_users_by_unit_counts(self):
         """Obtiene conteo de usuarios por unidad"""
-        query = """
-            SELECT un.NombreUnidad, COUNT(u.UserId) as Total
-            FROM Instituto_UnidadDeNegocio un
-            LEFT JOIN dbo.Instituto_Usuario u ON un.IdUnidadDeNegocio = u.IdUnidadDeNegocio
-            GROUP BY un.NombreUnidad
-            ORDER BY Total DESC
-        """
-        return self.db.execute(query)
+        return self._cached('get_users_by_unit_counts', 'users_by_unit_counts',
+                            ['Instituto_UnidadDeNegocio', 'Instituto_Usuario'])
 
     def get_monthly_completion_trend(self, months=6):
         """Obtiene tendencia mensual de completación"""
-        query = """
-            SELECT FORMAT(FechaFinalizacion, 'yyyy-MM') as Mes,
-                   COUNT(*) as Completados
-            FROM Instituto_ProgresoModulo
-            WHERE EstatusModuloUsuario = 'Completado'
-            AND FechaFinalizacion >= DATEADD(month, -?, GETDATE())
-            GROUP BY FORMAT(FechaFinalizacion, 'yyyy-MM')
-            ORDER BY Mes
+        return self.db.query('monthly_completion_trend', (months,))
+
+    def get_dashboard_snapshot(self) -> DashboardSnapshot:
         """
-        return self.db.execute(query, (months,))
+        Todos los agregados del dashboard y de get_system_stats en un solo viaje a la BD
+        (un lote con un conjunto de resultados por consulta en SQL Server)
+        """
+        (usuarios, modulos, inscripciones, en_progreso, tasa,
+         por_unidad, progreso, top, estados) = self.db.query_batch(DASHBOARD_SNAPSHOT)
+        return DashboardSnapshot(
+            total_users=usuarios[0][0],
+            total_modules=modulos[0][0],
+            total_enrollments=inscripciones[0][0],
+            modules_in_progress=en_progreso[0][0],
+            completion_rate=tasa[0][0] or 0.0,
+            users_by_unit=[tuple(row) for row in por_unidad],
+            modules_progress=[tuple(row) for row in progreso],
+            top_units=[tuple(row) for row in top],
+            status_distribution=[tuple(row) for row in estados],
+        )
 
     # ==================== ACTUALIZACIÓN DE DATOS ====================
 
     def update_user(self, user_id, column, new_value):
-        """Actualiza un campo de usuario"""
-        query = f"UPDATE dbo.Instituto_Usuario SET {column} = ? WHERE UserId = ?"
-        cursor = self.db.get_cursor()
-        cursor.execute(query, (new_value, user_id))
-        self.db.commit()
+        """
+        Actualiza un campo de usuario
+        Lanza ValueError si la columna no está en statements.UPDATABLE_COLUMNS['user'].
+        """
+        query = self.db.sql(update_statement('user', column))
+        with self.db.cursor(commit=True) as cursor:
+            cursor.execute(query, (new_value, user_id))
+        self.cache.invalidate(['Instituto_Usuario'])
 
     def update_module_progress(self, inscription_id, column, new_value):
-        """Actualiza progreso de módulo"""
-        query = f"UPDATE Instituto_ProgresoModulo SET {column} = ? WHERE IdInscripcion = ?"
-        cursor = self.db.get_cursor()
-        cursor.execute(query, (new_value, inscription_id))
-        self.db.commit()
+        """
+        Actualiza progreso de módulo
+        Lanza ValueError si la columna no está en statements.UPDATABLE_COLUMNS['progress'].
+        """
+        query = self.db.sql(update_statement('progress', column))
+        with self.db.cursor(commit=True) as cursor:
+            cursor.execute(query, (new_value, inscription_id))
+        self.cache.invalidate(['Instituto_ProgresoModulo'])
 
     # ==================== HISTORIAL ====================
 
@@ -161,13 +149,12 @@ class DatabaseQueries:
         #      ValorAnterior, ValorNuevo, UsuarioSistema)
         #     VALUES (?, ?, 'UPDATE', ?, ?, ?, 'Sistema')
         # """
-        # cursor = self.db.get_cursor()
-        # cursor.execute(query, (
-        #     table_name, entity_id,
-        #     f"Actualización de {column_name}",
-        #     str(old_value), str(new_value)
-        # ))
-        # self.db.commit()
+        # with self.db.cursor(commit=True) as cursor:
+        #     cursor.execute(query, (
+        #         table_name, entity_id,
+        #         f"Actualización de {column_name}",
+        #         str(old_value), str(new_value)
+        #     ))
         pass  # No hacer nada
 
     # ==================== ESTADÍSTICAS ====================
@@ -177,15 +164,15 @@ class DatabaseQueries:
         stats = {}
 
         # Total usuarios
-        result = self.db.execute_one("SELECT COUNT(*) FROM dbo.Instituto_Usuario")
+        result = self.db.query_one('count_users')
         stats['total_users'] = result[0] if result else 0
 
         # Total módulos
-        result = self.db.execute_one("SELECT COUNT(*) FROM Instituto_Modulo WHERE Activo = 1")
+        result = self.db.query_one('count_active_modules')
         stats['total_modules'] = result[0] if result else 0
 
         # Total inscripciones
-        result = self.db.execute_one("SELECT COUNT(*) FROM Instituto_ProgresoModulo")
+        result = self.db.query_one('count_enrollments')
         stats['total_enrollments'] = result[0] if result else 0
 
         return stats
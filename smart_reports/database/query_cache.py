@@ -0,0 +1,119 @@
+"""
+Caché en memoria de resultados de consultas (DatabaseQueries)
+Clave: texto de la query + parámetros. Cada entrada tiene su TTL y las tablas
+que lee; una escritura sobre una tabla descarta las entradas que dependen de
+ella. Tamaño acotado con desalojo LRU. Los resultados se guardan y entregan
+como tuplas de tuplas: quien los recibe no puede alterar la entrada compartida. Es por proceso: una carga hecha desde
+otro proceso (p. ej. la CLI) solo se refleja al vencer el TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from smart_reports.config.settings import CACHE_CONFIG
+
+
+class QueryCache:
+    """Caché LRU con TTL por entrada e invalidación por tabla (segura entre hilos)"""
+
+    def __init__(self, max_entries: int = None, default_ttl: float = None):
+        """
+        Args:
+            max_entries: Entradas como máximo. None usa CACHE_CONFIG['max_entries']
+            default_ttl: Segundos de vigencia si la consulta no define el suyo
+        """
+        self.max_entries = CACHE_CONFIG['max_entries'] if max_entries is None else max_entries
+        self.default_ttl = CACHE_CONFIG['default_ttl'] if default_ttl is None else default_ttl
+        self.enabled = CACHE_CONFIG['enabled']
+
+        self._lock = threading.Lock()
+        # Clave -> (resultado, vence, tablas); el orden es el de uso (LRU al inicio)
+        self._entries: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        # Se incrementa en cada invalidación: un resultado leído antes no se guarda
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(query: str, params=None) -> tuple:
+        return (query, tuple(params) if params else ())
+
+    @staticmethod
+    def freeze(resultado: Any) -> Any:
+        """Copia inmutable de un resultado: filas (listas, tuplas, Row) -> tupla de tuplas"""
+        if not isinstance(resultado, (list, tuple)):
+            return resultado
+        return tuple(fila if isinstance(fila, (str, bytes)) or not hasattr(fila, '__iter__') else tuple(fila)
+                     for fila in resultado)
+
+    def get_or_load(self, query: str, params, loader: Callable[[], Any],
+                    tables: Iterable[str], ttl: Optional[float] = None) -> Any:
+        """
+        Resultado vigente de la consulta, o el de loader() (que se guarda)
+        Siempre inmutable (ver freeze), también sin caché o en un fallo.
+        Args:
+            tables: Tablas que lee la consulta (para la invalidación)
+            ttl: Segundos de vigencia; None usa default_ttl
+        """
+        if not self.enabled:
+            return self.freeze(loader())
+
+        key = self.make_key(query, params)
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entries.get(key)
+            if entrada is not None and entrada[1] > ahora:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entrada[0]
+            if entrada is not None:
+                del self._entries[key]
+            self.misses += 1
+            generacion = self._generation
+
+        # La consulta corre fuera del lock: otras lecturas no esperan a la BD
+        resultado = self.freeze(loader())
+
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            # Si hubo una escritura mientras se consultaba, el resultado puede ser viejo
+            if generacion == self._generation and ttl > 0:
+                self._entries[key] = (resultado, time.monotonic() + ttl, frozenset(tables))
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return resultado
+
+    def invalidate(self, tables: Optional[Iterable[str]] = None) -> int:
+        """
+        Descarta las entradas que leen alguna de las tablas (None = todas)
+        Retorna cuántas se descartaron.
+        """
+        with self._lock:
+            self._generation += 1
+            if tables is None:
+                descartadas = len(self._entries)
+                self._entries.clear()
+                return descartadas
+
+            tablas = set(tables)
+            claves = [key for key, (_, _, leidas) in self._entries.items() if leidas & tablas]
+            for key in claves:
+                del self._entries[key]
+            return len(claves)
+
+    def stats(self) -> Dict[str, Any]:
+        """Aciertos, fallos y tamaño actual"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self._entries),
+            }
+
+
+# Caché compartida del proceso (las escrituras de cualquier módulo la invalidan)
+query_cache = QueryCache()
@@ -0,0 +1,395 @@
+"""
+Catálogo de sentencias SQL del sistema
+Cada consulta tiene un nombre y un texto fijo con marcadores `?`: los valores
+viajan siempre como parámetros. Un texto idéntico en cada ejecución permite a
+SQL Server reutilizar el plan y a SQLite su caché de sentencias por conexión.
+Las sentencias que dependen del motor se generan una vez por backend.
+
+Uso:
+    db.query('user_search', (user_id,))                 # DatabaseConnection
+    cursor.execute(sql('user_exists', backend), (user_id,))
+    sql('progress_by_modules', backend, count=3)        # IN (?, ?, ?)
+    update_statement('user', 'Email')                   # columna en la lista blanca
+    db.query_batch(DASHBOARD_SNAPSHOT)                  # varias lecturas, un viaje
+Los estados de inscripción son los de MODULE_STATUSES (los que escribe la carga).
+"""
+import threading
+from typing import Callable, Dict, Optional, Union
+
+from smart_reports.database.backends.base import StorageBackend
+
+
+# Marcador de una lista IN de longitud variable (ver sql(count=...))
+IN_LIST = '{marcadores}'
+
+STATEMENTS: Dict[str, Union[str, Callable[[StorageBackend], str]]] = {
+    # ==================== CATÁLOGOS ====================
+    'business_units': """
+        SELECT IdUnidadDeNegocio, NombreUnidad
+        FROM Instituto_UnidadDeNegocio
+        ORDER BY NombreUnidad
+    """,
+    'business_unit_names': """
+        SELECT DISTINCT NombreUnidad
+        FROM Instituto_UnidadDeNegocio
+        ORDER BY NombreUnidad
+    """,
+    'modules': """
+        SELECT IdModulo, NombreModulo
+        FROM Instituto_Modulo
+        ORDER BY IdModulo
+    """,
+    'active_modules': """
+        SELECT IdModulo, NombreModulo
+        FROM Instituto_Modulo
+        WHERE Activo = 1
+        ORDER BY NombreModulo
+    """,
+    'modules_detail': """
+        SELECT IdModulo, NombreModulo, FechaDeAsignacion, Activo
+        FROM Instituto_Modulo
+        ORDER BY IdModulo
+    """,
+    'module_exists': "SELECT IdModulo FROM Instituto_Modulo WHERE IdModulo = ?",
+    'module_aliases': "SELECT IdModulo, Alias FROM Instituto_ModuloAlias",
+
+    # ==================== USUARIOS ====================
+    'user_ids': "SELECT UserId FROM Instituto_Usuario",
+    'user_exists': "SELECT UserId FROM Instituto_Usuario WHERE UserId = ?",
+    'user_by_id': """
+        SELECT u.UserId, u.Nombre, u.Email, un.NombreUnidad,
+               u.Nivel, u.Division, u.Activo
+        FROM Instituto_Usuario u
+        LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
+        WHERE u.UserId = ?
+    """,
+    # Usuario con todos sus campos y su progreso en cada módulo
+    'user_search': lambda backend: f"""
+        SELECT
+            u.UserId,
+            u.Nombre,
+            u.Email,
+            un.NombreUnidad,
+            u.Nivel,
+            u.Division,
+            m.NombreModulo,
+            pm.EstatusModuloUsuario,
+            {backend.format_date_dmy('pm.FechaInicio')} as FechaAsignacion,
+            {backend.format_date_dmy('pm.FechaFinalizacion')} as FechaFinalizacion
+        FROM Instituto_Usuario u
+        LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
+        LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
+        LEFT JOIN Instituto_Modulo m ON pm.IdModulo = m.IdModulo
+        WHERE u.UserId = ?
+        ORDER BY m.NombreModulo
+    """,
+    'users_by_business_unit': """
+        SELECT u.UserId, u.Nombre, u.Email, un.NombreUnidad,
+               u.Division, u.Nivel, u.Activo
+        FROM Instituto_Usuario u
+        INNER JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
+        WHERE un.IdUnidadDeNegocio = ?
+        ORDER BY u.Nombre
+    """,
+    # Usuarios de una unidad (por nombre) con sus totales por estado
+    'users_by_unit_name': """
+        SELECT
+            u.UserId,
+            u.Nombre,
+            u.Email,
+            un.NombreUnidad,
+            COUNT(DISTINCT pm.IdModulo) as TotalModulos,
+            SUM(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) as Completados,
+            SUM(CASE WHEN pm.EstatusModuloUsuario = 'En proceso' THEN 1 ELSE 0 END) as EnProceso,
+            SUM(CASE WHEN pm.EstatusModuloUsuario = 'Registrado' THEN 1 ELSE 0 END) as Registrados
+        FROM Instituto_Usuario u
+        LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
+        LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
+        WHERE un.NombreUnidad = ?
+        GROUP BY u.UserId, u.Nombre, u.Email, un.NombreUnidad
+        ORDER BY u.Nombre
+    """,
+    'users_with_progress': """
+        SELECT
+            u.UserId,
+            u.Nombre,
+            u.Email,
+            un.NombreUnidad,
+            COUNT(DISTINCT pm.IdModulo) as TotalModulos,
+            SUM(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) as Completados
+        FROM Instituto_Usuario u
+        LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
+        LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
+        GROUP BY u.UserId, u.Nombre, u.Email, un.NombreUnidad
+        ORDER BY u.UserId
+    """,
+    'users_all': """
+        SELECT u.UserId, u.Nombre, u.Email, un.NombreUnidad,
+               u.Division, u.Activo
+        FROM Instituto_Usuario u
+        LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
+        ORDER BY u.Nombre
+    """,
+    'user_insert': """
+        INSERT INTO Instituto_Usuario (UserId, Nombre, Email, IdUnidadDeNegocio)
+        VALUES (?, ?, ?, ?)
+    """,
+    'user_insert_full': """
+        INSERT INTO Instituto_Usuario
+        (UserId, Nombre, Email, IdUnidadDeNegocio, Nivel, Division, Activo)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """,
+    # Usuario nuevo encontrado en un Transcript Status
+    'user_insert_transcript': """
+        INSERT INTO Instituto_Usuario (UserId, Nombre, Email, TipoDeCorreo)
+        VALUES (?, ?, ?, 'Corporativo')
+    """,
+
+    # ==================== PROGRESO DE MÓDULOS ====================
+    'progress_id': """
+        SELECT IdInscripcion FROM Instituto_ProgresoModulo
+        WHERE UserId = ? AND IdModulo = ?
+    """,
+    'progress_insert': """
+        INSERT INTO Instituto_ProgresoModulo
+        (UserId, IdModulo, EstatusModuloUsuario, FechaInicio, FechaFinalizacion)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    'progress_update_transcript': lambda backend: f"""
+        UPDATE Instituto_ProgresoModulo
+        SET EstatusModuloUsuario = ?,
+            FechaInicio = ?,
+            FechaFinalizacion = ?,
+            FechaUltimaActualizacion = {backend.now()}
+        WHERE UserId = ? AND IdModulo = ?
+    """,
+    'progress_by_modules': f"""
+        SELECT UserId, IdModulo, EstatusModuloUsuario, FechaInicio, FechaFinalizacion
+        FROM Instituto_ProgresoModulo
+        WHERE IdModulo IN ({IN_LIST})
+    """,
+    'progress_by_status': f"""
+        SELECT m.NombreModulo, u.Nombre as Usuario,
+               pm.EstatusModuloUsuario as Estado,
+               pm.CalificacionModuloUsuario as Calificacion,
+               pm.FechaInicio, pm.FechaFinalizacion
+        FROM Instituto_ProgresoModulo pm
+        INNER JOIN Instituto_Modulo m ON pm.IdModulo = m.IdModulo
+        INNER JOIN Instituto_Usuario u ON pm.UserId = u.UserId
+        WHERE pm.EstatusModuloUsuario IN ({IN_LIST})
+        ORDER BY m.NombreModulo, u.Nombre
+    """,
+    'progress_by_status_module': f"""
+        SELECT m.NombreModulo, u.Nombre as Usuario,
+               pm.EstatusModuloUsuario as Estado,
+               pm.CalificacionModuloUsuario as Calificacion,
+               pm.FechaInicio, pm.FechaFinalizacion
+        FROM Instituto_ProgresoModulo pm
+        INNER JOIN Instituto_Modulo m ON pm.IdModulo = m.IdModulo
+        INNER JOIN Instituto_Usuario u ON pm.UserId = u.UserId
+        WHERE pm.EstatusModuloUsuario IN ({IN_LIST}) AND m.IdModulo = ?
+        ORDER BY m.NombreModulo, u.Nombre
+    """,
+
+    # ==================== ESTADÍSTICAS Y DASHBOARDS ====================
+    'count_users': "SELECT COUNT(*) FROM Instituto_Usuario",
+    'count_modules': "SELECT COUNT(*) FROM Instituto_Modulo",
+    'count_active_modules': "SELECT COUNT(*) FROM Instituto_Modulo WHERE Activo = 1",
+    'count_enrollments': "SELECT COUNT(*) FROM Instituto_ProgresoModulo",
+    'count_modules_in_progress': "SELECT COUNT(DISTINCT IdModulo) FROM Instituto_ProgresoModulo",
+    'progress_status_totals': """
+        SELECT
+            COUNT(CASE WHEN EstatusModuloUsuario = 'Completado' THEN 1 END) as Completados,
+            COUNT(CASE WHEN EstatusModuloUsuario = 'En proceso' THEN 1 END) as EnProceso,
+            COUNT(CASE WHEN EstatusModuloUsuario = 'Registrado' THEN 1 END) as Registrados,
+            COUNT(*) as Total
+        FROM Instituto_ProgresoModulo
+    """,
+    'completion_rate': """
+        SELECT
+            CAST(SUM(CASE WHEN EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) AS FLOAT) * 100 /
+            NULLIF(COUNT(*), 0) as rate
+        FROM Instituto_ProgresoModulo
+    """,
+    'module_status_counts': """
+        SELECT EstatusModuloUsuario, COUNT(*) as Total
+        FROM Instituto_ProgresoModulo
+        GROUP BY EstatusModuloUsuario
+        ORDER BY Total DESC
+    """,
+    'users_by_unit_counts': """
+        SELECT un.NombreUnidad, COUNT(u.UserId) as Total
+        FROM Instituto_UnidadDeNegocio un
+        LEFT JOIN Instituto_Usuario u ON un.IdUnidadDeNegocio = u.IdUnidadDeNegocio
+        GROUP BY un.IdUnidadDeNegocio, un.NombreUnidad
+        ORDER BY Total DESC
+    """,
+    'modules_progress': """
+        SELECT
+            m.NombreModulo,
+            SUM(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) as Completados,
+            SUM(CASE WHEN pm.EstatusModuloUsuario = 'En proceso' THEN 1 ELSE 0 END) as EnProceso,
+            SUM(CASE WHEN pm.EstatusModuloUsuario NOT IN ('Completado', 'En proceso') THEN 1 ELSE 0 END) as Registrados
+        FROM Instituto_Modulo m
+        LEFT JOIN Instituto_ProgresoModulo pm ON m.IdModulo = pm.IdModulo
+        GROUP BY m.IdModulo, m.NombreModulo
+        ORDER BY m.IdModulo
+    """,
+    'top_units_by_completion': """
+        SELECT
+            un.NombreUnidad,
+            COUNT(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 END) as Completados
+        FROM Instituto_UnidadDeNegocio un
+        LEFT JOIN Instituto_Usuario u ON un.IdUnidadDeNegocio = u.IdUnidadDeNegocio
+        LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
+        GROUP BY un.IdUnidadDeNegocio, un.NombreUnidad
+        ORDER BY Completados DESC
+    """,
+    # Parámetro: meses hacia atrás
+    'monthly_completion_trend': lambda backend: f"""
+        SELECT {backend.month_key('FechaFinalizacion')} as Mes,
+               COUNT(*) as Completados
+        FROM Instituto_ProgresoModulo
+        WHERE EstatusModuloUsuario = 'Completado'
+        AND FechaFinalizacion >= {backend.ago('month')}
+        GROUP BY {backend.month_key('FechaFinalizacion')}
+        ORDER BY Mes
+    """,
+
+    # ==================== REPORTES ====================
+    'report_user_progress': """
+        SELECT
+            m.NombreModulo,
+            pm.EstatusModuloUsuario,
+            pm.CalificacionModuloUsuario,
+            pm.FechaInicio,
+            pm.FechaFinalizacion
+        FROM Instituto_ProgresoModulo pm
+        JOIN Instituto_Modulo m ON pm.IdModulo = m.IdModulo
+        WHERE pm.UserId = ?
+        ORDER BY pm.FechaInicio DESC
+    """,
+    'report_module_stats': """
+        SELECT
+            m.NombreModulo,
+            COUNT(DISTINCT pm.UserId) as TotalUsuarios,
+            SUM(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) as Completados,
+            SUM(CASE WHEN pm.EstatusModuloUsuario = 'En proceso' THEN 1 ELSE 0 END) as EnProceso,
+            SUM(CASE WHEN pm.EstatusModuloUsuario = 'Registrado' THEN 1 ELSE 0 END) as Registrados,
+            AVG(CASE WHEN pm.CalificacionModuloUsuario IS NOT NULL
+                THEN pm.CalificacionModuloUsuario END) as PromedioCalificacion
+        FROM Instituto_Modulo m
+        LEFT JOIN Instituto_ProgresoModulo pm ON m.IdModulo = pm.IdModulo
+        GROUP BY m.IdModulo, m.NombreModulo
+        ORDER BY TotalUsuarios DESC
+    """,
+    'report_business_units': """
+        SELECT
+            un.NombreUnidad,
+            COUNT(DISTINCT u.UserId) as TotalUsuarios,
+            COUNT(DISTINCT pm.IdModulo) as ModulosActivos,
+            SUM(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) as ModulosCompletados,
+            AVG(CASE WHEN pm.CalificacionModuloUsuario IS NOT NULL
+                THEN pm.CalificacionModuloUsuario END) as PromedioGeneral
+        FROM Instituto_UnidadDeNegocio un
+        LEFT JOIN Instituto_Usuario u ON un.IdUnidadDeNegocio = u.IdUnidadDeNegocio
+        LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
+        GROUP BY un.IdUnidadDeNegocio, un.NombreUnidad
+    """,
+    'report_business_unit': """
+        SELECT
+            un.NombreUnidad,
+            COUNT(DISTINCT u.UserId) as TotalUsuarios,
+            COUNT(DISTINCT pm.IdModulo) as ModulosActivos,
+            SUM(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) as ModulosCompletados,
+            AVG(CASE WHEN pm.CalificacionModuloUsuario IS NOT NULL
+                THEN pm.CalificacionModuloUsuario END) as PromedioGeneral
+        FROM Instituto_UnidadDeNegocio un
+        LEFT JOIN Instituto_Usuario u ON un.IdUnidadDeNegocio = u.IdUnidadDeNegocio
+        LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
+        WHERE un.IdUnidadDeNegocio = ?
+        GROUP BY un.IdUnidadDeNegocio, un.NombreUnidad
+    """,
+    # Parámetro: días hacia atrás
+    'report_completion_trends': lambda backend: f"""
+        SELECT
+            {backend.as_date('FechaFinalizacion')} as Fecha,
+            COUNT(*) as ModulosCompletados,
+            COUNT(DISTINCT UserId) as UsuariosActivos
+        FROM Instituto_ProgresoModulo
+        WHERE EstatusModuloUsuario = 'Completado'
+            AND FechaFinalizacion >= {backend.ago('day')}
+        GROUP BY {backend.as_date('FechaFinalizacion')}
+        ORDER BY Fecha
+    """,
+}
+
+# Lotes: sentencias sin parámetros que se leen juntas (DatabaseConnection.query_batch)
+DASHBOARD_SNAPSHOT = (
+    'count_users',
+    'count_active_modules',
+    'count_enrollments',
+    'count_modules_in_progress',
+    'completion_rate',
+    'users_by_unit_counts',
+    'modules_progress',
+    'top_units_by_completion',
+    'module_status_counts',
+)
+
+# Columnas que se pueden modificar con update_statement: entidad -> (tabla, clave, columnas).
+# Un nombre de columna nunca se toma de la entrada sin pasar por esta lista.
+UPDATABLE_COLUMNS = {
+    'user': ('Instituto_Usuario', 'UserId',
+             ('Nombre', 'Email', 'TipoDeCorreo', 'IdUnidadDeNegocio', 'Nivel', 'Division', 'Activo')),
+    'progress': ('Instituto_ProgresoModulo', 'IdInscripcion',
+                 ('EstatusModuloUsuario', 'CalificacionModuloUsuario', 'FechaInicio', 'FechaFinalizacion')),
+}
+
+for _entidad, (_tabla, _clave, _columnas) in UPDATABLE_COLUMNS.items():
+    for _columna in _columnas:
+        STATEMENTS[f'update_{_entidad}.{_columna}'] = f"UPDATE {_tabla} SET {_columna} = ? WHERE {_clave} = ?"
+
+_resueltas: Dict[tuple, str] = {}
+_lock = threading.Lock()
+
+
+def update_statement(entity: str, column: str) -> str:
+    """
+    Nombre de la sentencia UPDATE de una columna de la lista blanca
+    Lanza ValueError si la entidad o la columna no se pueden modificar.
+    """
+    if entity not in UPDATABLE_COLUMNS:
+        raise ValueError(f"Entidad no actualizable: {entity!r}")
+    columnas = UPDATABLE_COLUMNS[entity][2]
+    if column not in columnas:
+        raise ValueError(f"Columna no actualizable en {entity}: {column!r} (permitidas: {', '.join(columnas)})")
+    return f'update_{entity}.{column}'
+
+
+def sql(name: str, backend: StorageBackend, count: Optional[int] = None) -> str:
+    """
+    Texto de la sentencia `name` para el backend
+    Args:
+        count: Marcadores de la lista IN en las sentencias que la tienen
+    El texto se genera una sola vez por (backend, sentencia, count).
+    """
+    clave = (backend.name, name, count)
+    texto = _resueltas.get(clave)
+    if texto is not None:
+        return texto
+
+    try:
+        plantilla = STATEMENTS[name]
+    except KeyError:
+        raise KeyError(f"Sentencia desconocida en el catálogo: {name!r}") from None
+    texto = plantilla(backend) if callable(plantilla) else plantilla
+
+    if IN_LIST in texto:
+        if not count:
+            raise ValueError(f"La sentencia {name!r} requiere count (marcadores de la lista IN)")
+        texto = texto.replace(IN_LIST, ', '.join('?' * count))
+
+    with _lock:
+        _resueltas[clave] = texto
+    return texto
@@ -0,0 +1,295 @@
+"""
+SMART REPORTS - Instituto Hutchison Ports
+Carga de archivos Transcript Status sin interfaz gráfica (servidor, tarea programada)
+
+Uso:
+    python -m smart_reports.ingest archivo1.xlsx [archivo2.csv ...] [--json stats.json]
+    python -m smart_reports.ingest --watch C:\\exports [--once]
+
+Con archivos: los procesa en orden y escribe sus estadísticas en JSON (stdout
+o --json). Con --watch: toma los exports nuevos de la carpeta (del más antiguo
+al más reciente, cuando ya terminaron de copiarse), los procesa y los mueve a
+<carpeta>/procesados o <carpeta>/fallidos junto con su <archivo>.json de
+estadísticas y el CSV de filas rechazadas, si lo hay.
+
+Los mensajes de la carga van a stderr; stdout queda solo para el JSON.
+Código de salida: 0 = todo cargado, 1 = algún archivo falló, 130 = interrumpido.
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# Agregar el directorio padre al path para imports absolutos
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from smart_reports.config.settings import INGESTION_CONFIG
+from smart_reports.database.connection import DatabaseConnection
+from smart_reports.services.data_processor import (TranscriptProcessor, IngestionCancelled,
+                                                   TRANSCRIPT_EXTENSIONS)
+
+# Subcarpetas de destino en modo --watch
+PROCESSED_DIR = 'procesados'
+FAILED_DIR = 'fallidos'
+
+
+def _json_default(valor):
+    """Tipos de numpy/pandas/fecha presentes en las estadísticas"""
+    if hasattr(valor, 'item'):
+        return valor.item()
+    if isinstance(valor, (set, frozenset)):
+        return sorted(valor)
+    return str(valor)
+
+
+def _progress_printer() -> Callable[[Dict], None]:
+    """Avance en stderr: una línea por fase (en streaming, una por bloque)"""
+    ultima = {'clave': None}
+
+    def imprimir(evento: Dict) -> None:
+        clave = (evento['fase'], evento.get('bloque'))
+        if clave != ultima['clave']:
+            ultima['clave'] = clave
+            bloque = f" [bloque {evento['bloque']}]" if evento.get('bloque') else ''
+            print(f"  ▸ {evento['fase']}{bloque}", file=sys.stderr)
+
+    return imprimir
+
+
+def process_one(db: DatabaseConnection, file_path: str, args,
+                cancel_event: Optional[threading.Event] = None) -> Dict:
+    """
+    Procesa un archivo con su propia conexión
+    Retorna {'archivo', 'estado': ok | error | cancelado, 'inicio', 'segundos', 'stats', 'error'}
+    Si la carga falla, 'stats' trae lo registrado hasta el error (errores por tipo, fases).
+    """
+    resultado = {
+        'archivo': os.path.abspath(file_path),
+        'estado': 'ok',
+        'inicio': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'segundos': None,
+        'stats': None,
+        'error': None,
+    }
+    inicio = time.perf_counter()
+    conn = None
+    processor = None
+    try:
+        # Las impresiones de la carga no deben mezclarse con el JSON de stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            print(f"\n=== {os.path.basename(file_path)} ===")
+            conn = db.create_connection()
+            processor = TranscriptProcessor(
+                conn,
+                reader_engine=args.engine,
+                progress_callback=_progress_printer() if args.verbose else None,
+                cancel_event=cancel_event
+            )
+            processor.process_file(file_path, chunk_size=args.chunk_size,
+                                   dry_run=args.dry_run, resume=not args.no_resume)
+    except IngestionCancelled:
+        resultado['estado'] = 'cancelado'
+    except Exception as e:
+        resultado['estado'] = 'error'
+        resultado['error'] = str(e)
+        print(f"✗ Error procesando {file_path}: {e}", file=sys.stderr)
+    finally:
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+    if processor is not None and processor.stats:
+        resultado['stats'] = processor.stats
+    resultado['segundos'] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+def write_json(datos, destino: Optional[str]) -> None:
+    """JSON a un archivo (escritura atómica) o a stdout si destino es None"""
+    texto = json.dumps(datos, indent=2, ensure_ascii=False, default=_json_default)
+    if destino is None:
+        print(texto)
+        sys.stdout.flush()
+        return
+    temporal = f"{destino}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        f.write(texto)
+    os.replace(temporal, destino)
+
+
+# ==================== MODO WATCH ====================
+
+def is_transcript(nombre: str) -> bool:
+    """Export candidato: extensión válida, no es bloqueo de Office ni archivo de rechazados"""
+    return (nombre.lower().endswith(TRANSCRIPT_EXTENSIONS)
+            and not nombre.startswith('~$')
+            and '_rechazados_' not in nombre)
+
+
+def pending_files(folder: str) -> Dict[str, tuple]:
+    """Exports en la carpeta: ruta -> (tamaño, fecha de modificación)"""
+    pendientes = {}
+    for entrada in os.scandir(folder):
+        if entrada.is_file() and is_transcript(entrada.name):
+            info = entrada.stat()
+            pendientes[entrada.path] = (info.st_size, info.st_mtime_ns)
+    return pendientes
+
+
+def move_to(file_path: str, folder: str) -> str:
+    """Mueve el archivo a la carpeta sin sobrescribir (sufijo con fecha si ya existe)"""
+    os.makedirs(folder, exist_ok=True)
+    destino = os.path.join(folder, os.path.basename(file_path))
+    if os.path.exists(destino):
+        base, extension = os.path.splitext(destino)
+        destino = f"{base}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{extension}"
+    shutil.move(file_path, destino)
+    return destino
+
+
+def finish_file(resultado: Dict, processed_dir: str, failed_dir: str) -> None:
+    """Mueve el archivo (y su CSV de rechazados) a su destino y escribe <archivo>.json al lado"""
+    destino = processed_dir if resultado['estado'] == 'ok' else failed_dir
+    try:
+        resultado['movido_a'] = move_to(resultado['archivo'], destino)
+        rechazados = (resultado['stats'] or {}).get('archivo_rechazados')
+        if rechazados and os.path.exists(rechazados):
+            resultado['stats']['archivo_rechazados'] = move_to(rechazados, destino)
+        write_json(resultado, f"{resultado['movido_a']}.json")
+    except OSError as e:
+        # El archivo queda en la carpeta vigilada: se reintentará en el siguiente ciclo
+        print(f"ADVERTENCIA: No se pudo mover {resultado['archivo']}: {e}", file=sys.stderr)
+
+
+def watch(db: DatabaseConnection, args, cancel_event: threading.Event) -> int:
+    """
+    Vigila la carpeta y procesa cada export nuevo en orden de llegada
+    Un archivo se toma cuando su tamaño y fecha no cambian entre dos revisiones
+    (ya terminó de copiarse). Con --once procesa lo que haya y termina.
+    """
+    folder = args.watch
+    processed_dir = args.processed or os.path.join(folder, PROCESSED_DIR)
+    failed_dir = args.failed or os.path.join(folder, FAILED_DIR)
+    print(f"Vigilando {os.path.abspath(folder)} cada {args.interval}s "
+          f"(procesados: {processed_dir}, fallidos: {failed_dir})", file=sys.stderr)
+
+    fallidos = 0
+    vistos: Dict[str, tuple] = {}
+    # Con --dry-run los archivos no se mueven: se recuerda la huella ya comparada
+    comparados = set()
+    while True:
+        try:
+            actuales = pending_files(folder)
+        except OSError as e:
+            # Unidad de red caída, carpeta renombrada...: se reintenta en la siguiente revisión
+            print(f"ADVERTENCIA: No se pudo leer la carpeta {folder}: {e}", file=sys.stderr)
+            actuales = {}
+        # Estables: misma huella que en la revisión anterior (con --once no se espera)
+        listos = [ruta for ruta, huella in actuales.items()
+                  if (args.once or vistos.get(ruta) == huella) and (ruta, huella) not in comparados]
+        for ruta in sorted(listos, key=lambda r: (actuales[r][1], r)):
+            resultado = process_one(db, ruta, args, cancel_event)
+            print(f"{resultado['estado'].upper()}: {os.path.basename(ruta)} "
+                  f"({resultado['segundos']}s)", file=sys.stderr)
+            if resultado['estado'] == 'cancelado':
+                # Queda en la carpeta: el siguiente arranque la retoma desde su checkpoint
+                return 130
+
+            fallidos += resultado['estado'] != 'ok'
+            if args.dry_run:
+                comparados.add((ruta, actuales[ruta]))
+            else:
+                finish_file(resultado, processed_dir, failed_dir)
+            if args.json:
+                with open(args.json, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(resultado, ensure_ascii=False, default=_json_default) + '\n')
+
+        if args.once:
+            return 1 if fallidos else 0
+        vistos = actuales
+        # wait() en lugar de sleep(): una señal de parada corta la espera
+        if cancel_event.wait(args.interval):
+            return 130
+
+
+# ==================== ENTRADA ====================
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m smart_reports.ingest',
+        description='Carga de archivos Transcript Status sin interfaz gráfica'
+    )
+    parser.add_argument('archivos', nargs='*', help='Archivos .xlsx/.xls/.csv a cargar, en orden')
+    parser.add_argument('--watch', metavar='DIR', help='Vigilar la carpeta y cargar los exports nuevos')
+    parser.add_argument('--once', action='store_true',
+                        help='Con --watch: cargar lo que haya en la carpeta y terminar')
+    parser.add_argument('--interval', type=float, default=INGESTION_CONFIG['watch_interval'],
+                        help='Con --watch: segundos entre revisiones (default: %(default)s)')
+    parser.add_argument('--processed', metavar='DIR', help=f'Destino de los cargados (default: DIR/{PROCESSED_DIR})')
+    parser.add_argument('--failed', metavar='DIR', help=f'Destino de los fallidos (default: DIR/{FAILED_DIR})')
+    parser.add_argument('--json', metavar='RUTA',
+                        help='Estadísticas en este archivo en lugar de stdout '
+                             '(con --watch: una línea JSON por archivo, agregada)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Solo comparar con la BD, sin escribir (con --watch no mueve archivos)')
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Filas por bloque al cargar .csv (default: INGESTION_CONFIG)')
+    parser.add_argument('--engine', default=None, help='Motor de lectura (default: INGESTION_CONFIG)')
+    parser.add_argument('--no-resume', action='store_true', help='Ignorar checkpoints de cargas interrumpidas')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Mostrar cada fase de la carga')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto de entrada; retorna el código de salida"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if bool(args.archivos) == bool(args.watch):
+        parser.error('indique archivos o --watch DIR (no ambos)')
+    if args.watch and not os.path.isdir(args.watch):
+        parser.error(f'no existe la carpeta: {args.watch}')
+    if args.once and not args.watch:
+        parser.error('--once requiere --watch')
+
+    # SIGTERM (parada del servicio / tarea programada): la carga en curso se
+    # cancela en el siguiente punto de control y revierte su lote sin confirmar
+    cancel_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: cancel_event.set())
+
+    db = DatabaseConnection()
+    try:
+        if args.watch:
+            return watch(db, args, cancel_event)
+
+        resultados = []
+        for ruta in args.archivos:
+            resultado = process_one(db, ruta, args, cancel_event)
+            resultados.append(resultado)
+            if resultado['estado'] == 'cancelado':
+                break
+        write_json(resultados, args.json)
+        if resultados[-1]['estado'] == 'cancelado':
+            return 130
+        return 1 if any(r['estado'] != 'ok' for r in resultados) else 0
+    except KeyboardInterrupt:
+        # La transacción en curso se revierte al cerrar la conexión; el checkpoint
+        # del último lote confirmado permite retomar la carga
+        print("\nInterrumpido por el usuario", file=sys.stderr)
+        return 130
+
+
+if __name__ == "__main__":
+    # Necesario para la importación en paralelo desde el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
+    sys.exit(main())
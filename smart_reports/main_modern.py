@@ -6,6 +6,7 @@ Versión 2.0
 
 import sys
 import os
+import multiprocessing
 
 # Agregar el directorio padre al path para imports absolutos
 if __name__ == "__main__":
@@ -28,4 +29,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Necesario para la importación en paralelo desde el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
     main()
@@ -6,122 +6,383 @@ Este módulo maneja la carga, procesamiento y análisis de los archivos Transcri
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import pyodbc
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
+import csv
 import os
 import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import openpyxl
+
+from smart_reports.config.settings import (INGESTION_CONFIG, HEADER_KEYWORDS, COLUMN_MAPPINGS, MODULE_STATUSES,
+                                           MODULE_CATALOG)
+from smart_reports.services.ingestion_manifest import IngestionManifest, file_sha256
+from smart_reports.services.parse_cache import ParseCache
+from smart_reports.services.file_readers import read_table
+from smart_reports.services.header_profiles import HeaderProfileStore, mappings_signature
+from smart_reports.services.ingestion_errors import IngestionErrors
+from smart_reports.services.ingestion_checkpoint import IngestionCheckpoint
+from smart_reports.services.module_catalog import ModuleIndex
+from smart_reports.database.query_cache import query_cache
+from smart_reports.database.backends.base import StorageBackend, get_backend
+from smart_reports.database import statements
+
+
+# Palabras clave de la fila de headers (español e inglés, ver settings) en un solo patrón
+HEADER_PATTERN = re.compile('|'.join(re.escape(keyword) for keyword in HEADER_KEYWORDS))
+
+# Reglas de COLUMN_MAPPINGS en orden: (columna estándar, [(tipo, valor), ...])
+COLUMN_RULES = [
+    (destino, [('igual', regla['igual']) if 'igual' in regla else ('contiene', tuple(regla['contiene']))
+               for regla in reglas])
+    for destino, reglas in COLUMN_MAPPINGS.items()
+]
+
+# Columnas mínimas que debe tener el archivo después del mapeo
+REQUIRED_COLUMNS = ['id_usuario', 'titulo_modulo', 'estado']
+
+# Extensiones aceptadas como archivo Transcript Status
+TRANSCRIPT_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+
+# Filas iniciales donde se busca la fila de headers
+HEADER_SCAN_ROWS = 20
+
+# Título de Cornerstone -> (IdModulo, NombreCorto) del catálogo base (settings)
+# La resolución de títulos usa ModuleIndex (services/module_catalog), que además
+# incorpora Instituto_Modulo y sus alias
+MODULOS_MAPPING = {titulo: (module_id, nombre) for module_id, (titulo, nombre) in MODULE_CATALOG.items()}
+
+# Estados del Excel con mapeo exacto
+STATUS_EXACT_MAP = {
+    'Terminado': 'Completado',
+    'En Progreso': 'En proceso',
+    'Registrado': 'Registrado',
+}
+
+# Palabras clave (case-insensitive) evaluadas EN ORDEN: la primera que aparezca gana
+STATUS_KEYWORD_MAP = {
+    'terminado': 'Completado',
+    'completed': 'Completado',
+    'completado': 'Completado',
+    'complete': 'Completado',
+    'finalizado': 'Completado',
+    'aprobado': 'Completado',
+    'passed': 'Completado',
+
+    'en progreso': 'En proceso',
+    'en proceso': 'En proceso',
+    'in progress': 'En proceso',
+    'iniciado': 'En proceso',
+    'started': 'En proceso',
+
+    'registrado': 'Registrado',
+    'registered': 'Registrado',
+    'inscrito': 'Registrado',
+    'enrolled': 'Registrado',
+
+    'no iniciado': 'No iniciado',
+    'not started': 'No iniciado',
+    'pendiente': 'No iniciado',
+    'pending': 'No iniciado'
+}
+
+# Avance de cada estado normalizado: entre filas repetidas gana el más avanzado
+STATUS_RANK = {estado: len(MODULE_STATUSES) - posicion for posicion, estado in enumerate(MODULE_STATUSES)}
+
+# Formatos de fecha en texto, en orden de prioridad
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d']
+
+# Origen de las fechas seriales de Excel
+EXCEL_EPOCH = datetime(1899, 12, 30)
+# Seriales válidos (1900-01-01 a 9999-12-31): un texto numérico en este rango es una fecha serial
+EXCEL_SERIAL_RANGE = (1, 2958465)
+
+# Versión de la lectura/normalización: incrementarla invalida la caché de archivos parseados
+PROCESSOR_VERSION = 2
+
+# Fases instrumentadas de la carga: clave en stats['timings'] -> etiqueta
+INGESTION_PHASES = {
+    'catalogos': 'Carga de catálogos',
+    'headers': 'Detección de headers',
+    'lectura': 'Lectura del archivo',
+    'columnas': 'Normalización de columnas',
+    'filtrado': 'Filtrado',
+    'validacion': 'Validación y duplicados',
+    'consolidacion': 'Consolidación',
+    'usuarios': 'Usuarios',
+    'modulos': 'Módulos',
+    'inscripciones': 'Inscripciones',
+    'diferencias': 'Comparación con la BD',
+    'commit': 'Commit',
+}
+
+
+class _RoundTripCursor:
+    """
+    Envoltorio del cursor que cuenta los viajes a la BD
+    execute = 1 viaje; executemany = según el backend (pyodbc: 1 por lote con
+    fast_executemany o 1 por fila sin él)
+    """
+
+    def __init__(self, cursor, backend: StorageBackend):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_backend', backend)
+        object.__setattr__(self, 'round_trips', 0)
+
+    def execute(self, sql, *params):
+        self.add_round_trips(1)
+        return self._cursor.execute(sql, *params)
+
+    def executemany(self, sql, seq):
+        seq = seq if isinstance(seq, list) else list(seq)
+        self.add_round_trips(self._backend.executemany_round_trips(self._cursor, len(seq)))
+        return self._cursor.executemany(sql, seq)
+
+    def add_round_trips(self, n: int) -> None:
+        object.__setattr__(self, 'round_trips', self.round_trips + n)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+
+class IngestionCancelled(Exception):
+    """La carga fue cancelada por el usuario (la transacción en curso se revierte)"""
+
 
 class TranscriptProcessor:
     """Procesador especializado para archivos Transcript Status de Cornerstone"""
 
-    def __init__(self, db_connection: pyodbc.Connection):
+    def __init__(self, db_connection, bulk_mode: Optional[bool] = None,
+                 delta_mode: Optional[bool] = None,
+                 parse_cache: Optional[bool] = None,
+                 reader_engine: Optional[str] = None,
+                 header_profiles: Optional[bool] = None,
+                 checkpoint_rows: Optional[int] = None,
+                 progress_callback: Optional[Callable[[Dict], None]] = None,
+                 cancel_event: Optional[threading.Event] = None,
+                 backend: Optional[StorageBackend] = None):
+        """
+        Args:
+            db_connection: Conexión DB-API a la base de datos (None para solo
+                           leer/normalizar archivos sin acceso a BD)
+            bulk_mode: True para aplicar las inscripciones con un MERGE set-based,
+                       False para el UPSERT fila por fila. None usa INGESTION_CONFIG.
+            delta_mode: True para escribir solo las inscripciones nuevas o
+                        modificadas desde la última carga (requiere bulk_mode).
+                        El manifiesto es uno por BD destino y no ve las ediciones
+                        hechas fuera de la ingesta (p. ej. desde la UI): tras ellas
+                        usar False. None usa INGESTION_CONFIG.
+            parse_cache: True para reutilizar archivos ya parseados (caché local por
+                         hash del contenido). None usa INGESTION_CONFIG.
+            reader_engine: Motor para parsear el archivo ('auto', 'calamine', ...;
+                           ver services/file_readers). None usa INGESTION_CONFIG.
+            header_profiles: True para recordar la fila de headers y el mapeo de
+                             columnas de cada plantilla de export (ver
+                             services/header_profiles). None usa INGESTION_CONFIG.
+            checkpoint_rows: Filas por lote con commit y checkpoint al cargar
+                             .xlsx/.xls (0 = un solo commit al final). None usa
+                             INGESTION_CONFIG.
+            progress_callback: Función que recibe los eventos de avance
+                               {'fase', 'clave', 'bloque', 'filas', 'total',
+                                'filas_por_seg', 'eta_seg'}.
+                               Se invoca desde el hilo que procesa el archivo.
+            cancel_event: Evento que, al activarse, cancela la carga en el siguiente
+                          punto de control y revierte la transacción en curso.
+            backend: Motor de db_connection (ver database/backends). None usa el
+                     configurado en STORAGE_CONFIG.
+        """
         self.conn = db_connection
-        self.cursor = db_connection.cursor()
+        self.backend = backend or (get_backend() if db_connection else None)
+        self.cursor = _RoundTripCursor(db_connection.cursor(), self.backend) if db_connection else None
+        self.bulk_mode = INGESTION_CONFIG['bulk_mode'] if bulk_mode is None else bulk_mode
+        if delta_mode is None:
+            delta_mode = INGESTION_CONFIG['delta_mode']
+        self.manifest = IngestionManifest(backend=self.backend) \
+            if (db_connection and self.bulk_mode and delta_mode) else None
+        if parse_cache is None:
+            parse_cache = INGESTION_CONFIG['parse_cache']
+        self.parse_cache = ParseCache() if parse_cache else None
+        self.reader_engine = reader_engine or INGESTION_CONFIG['reader_engine']
+        if header_profiles is None:
+            header_profiles = INGESTION_CONFIG['header_profiles']
+        self.header_profiles = HeaderProfileStore() if header_profiles else None
+        # Perfil de la plantilla del archivo actual y headers aún sin perfil (fila, celdas)
+        self._perfil: Optional[Dict] = None
+        self._headers_sin_perfil: Optional[tuple] = None
+        if checkpoint_rows is None:
+            checkpoint_rows = INGESTION_CONFIG['checkpoint_rows']
+        self.checkpoint_rows = checkpoint_rows
+        self.checkpoints = IngestionCheckpoint() if db_connection else None
+        # Índice título -> IdModulo; load_existing_keys lo reconstruye con la BD
+        self.module_index = ModuleIndex.build()
+        self._file_hashes: Dict[tuple, str] = {}
         self.stats = {}
+        # Errores de la carga en curso (se crea en _init_stats)
+        self.errors: Optional[IngestionErrors] = None
+        # Detalle de la última vista previa (ver diff_file)
+        self.diff: Optional[pd.DataFrame] = None
+
+        # Avance y cancelación (ver _start_phase / _report_progress)
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+        self._fase: Optional[Dict] = None
+        self._bloque: Optional[int] = None
+
+        # Caches de existencia (se cargan al inicio de process_file)
+        self._usuarios_existentes: Optional[set] = None
+        self._modulos_existentes: Optional[Dict[int, str]] = None
 
     def detect_file_structure(self, file_path: str) -> pd.DataFrame:
         """
         Detecta la estructura del archivo y devuelve un DataFrame limpio
+        El archivo se parsea UNA sola vez, desde la fila de headers detectada
         """
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path, nrows=20)
-        else:
-            df = pd.read_excel(file_path, nrows=20)
+        header_row = self._find_header_row(file_path)
+        return self.normalize_columns(self._read_file(file_path, header_row))
+
+    def _read_file(self, file_path: str, header_row: int) -> pd.DataFrame:
+        """Parsea el archivo completo desde la fila de headers con el motor configurado"""
+        df, motor = read_table(file_path, header_row, self.reader_engine)
+        self.stats['motor_lectura'] = motor
+        return df
+
+    def load_file(self, file_path: str) -> pd.DataFrame:
+        """
+        Lectura + filtro + normalización de un archivo, sin acceso a BD
+        Cada paso es una fase instrumentada (ver stats['timings']).
+        Con caché activa, un archivo ya visto (mismo contenido, PROCESSOR_VERSION y
+        configuración de mapeo) se toma de la caché sin volver a parsearlo.
+        """
+        cache_key = None
+        if self.parse_cache is not None:
+            self._start_phase('lectura', detalle='caché')
+            cache_key = f"{self._file_hash(file_path)}_{self._normalization_version()}"
+            df = self.parse_cache.get(cache_key)
+            if df is not None:
+                self._report_progress(len(df))
+                self._end_phase()
+                self.stats['lectura_desde_cache'] = True
+                print(f"✓ Archivo tomado de la caché ({len(df):,} registros, sin re-parsear)")
+                return df
+
+        self._start_phase('headers')
+        header_row = self._find_header_row(file_path)
+        if self.errors is not None:
+            self.errors.header_row = header_row
+
+        self._start_phase('lectura')
+        df = self._read_file(file_path, header_row)
+        self._report_progress(len(df))
+
+        self._start_phase('columnas', total=len(df))
+        df = self.normalize_columns(df)
+
+        self._start_phase('filtrado', total=len(df))
+        df = self._filter_rows(df)
+
+        # Normalización columnar (IdModulo, estado, fechas) antes de tocar la BD
+        self._start_phase('columnas', total=len(df))
+        df = self.normalize_dataframe(df)
+        self._end_phase()
+
+        if cache_key is not None:
+            self.parse_cache.put(cache_key, df)
+        return df
+
+    def _normalization_version(self) -> str:
+        """Versión de lectura + normalización (PROCESSOR_VERSION, mapeo de columnas y catálogo de módulos)"""
+        return f"v{PROCESSOR_VERSION}_{mappings_signature()}_{self.module_index.signature}"
+
+    def _file_hash(self, file_path: str) -> str:
+        """SHA-256 del archivo, calculado una vez por versión (tamaño + fecha) del archivo"""
+        info = os.stat(file_path)
+        clave = (os.path.abspath(file_path), info.st_size, info.st_mtime_ns)
+        if clave not in self._file_hashes:
+            self._file_hashes[clave] = file_sha256(file_path)
+        return self._file_hashes[clave]
+
+    def _find_header_row(self, file_path: str) -> int:
+        """
+        Busca la fila donde empiezan los headers reales
+        Si la fila de headers coincide con un perfil de plantilla conocido se usa
+        el perfil (sin buscar palabras clave); normalize_columns aplica su mapeo.
+        Retorna el índice (0-based) de la fila dentro del archivo
+        """
+        self._perfil = None
+        self._headers_sin_perfil = None
+        rows = self._sniff_rows(file_path, HEADER_SCAN_ROWS)
+
+        if self.header_profiles is not None:
+            self._perfil = self.header_profiles.match(rows)
+            if self._perfil is not None:
+                self.stats['perfil_plantilla'] = 'conocida'
+                return self._perfil['header_row']
 
-        # Buscar la fila donde empiezan los headers reales
         header_row = 0
-        for i in range(len(df)):
-            # Buscar patrones comunes de headers (español e inglés)
-            row_values = df.iloc[i].astype(str).values
-            # Buscar palabras clave en español e inglés
-            header_keywords = [
-                'Nombre completo', 'User Name', 'Usuario',
-                'Identificación', 'User ID',
-                'Título', 'Training Title',
-                'Estado', 'Transcript Status',
-                'Capacitación', 'Training'
-            ]
-            if any(keyword in v for v in row_values for keyword in header_keywords):
+        for i, row in enumerate(rows):
+            if any(HEADER_PATTERN.search(str(v)) for v in row if v is not None):
                 header_row = i
                 break
 
-        # Re-leer el archivo con los headers correctos
-        if header_row > 0:
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path, skiprows=header_row)
-            else:
-                df = pd.read_excel(file_path, skiprows=header_row)
-        else:
-            # Leer normalmente
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
+        if self.header_profiles is not None and header_row < len(rows):
+            self._headers_sin_perfil = (header_row, rows[header_row])
+        return header_row
+
+    @staticmethod
+    def _sniff_rows(file_path: str, max_rows: int) -> List[tuple]:
+        """
+        Lee solo las primeras filas crudas del archivo, sin parsear el resto
+        - .csv: módulo csv sobre las primeras líneas
+        - .xlsx: openpyxl en modo read-only (streaming)
+        - .xls: pandas con nrows (formato binario, sin lector streaming)
+        """
+        if file_path.endswith('.csv'):
+            with open(file_path, newline='', encoding='utf-8', errors='replace') as f:
+                return [tuple(row) for _, row in zip(range(max_rows), csv.reader(f))]
 
-        return self.normalize_columns(df)
+        if file_path.endswith('.xls'):
+            df = pd.read_excel(file_path, header=None, nrows=max_rows)
+            return list(df.itertuples(index=False, name=None))
+
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            return list(sheet.iter_rows(min_row=1, max_row=max_rows, values_only=True))
+        finally:
+            workbook.close()
 
     def normalize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Normaliza los nombres de columnas a un formato estándar
-        Busca flexiblemente las columnas en el Excel
+        Con un perfil de plantilla se aplica su mapeo guardado; si no, las reglas
+        de COLUMN_MAPPINGS (settings) y el resultado se guarda como perfil nuevo.
         Solo mapea las columnas que realmente se usan
         """
-        # Crear un mapeo flexible - buscar columnas que contengan estas palabras clave
-        normalized_df = df.copy()
-        column_map = {}
-
-        for col in df.columns:
-            col_lower = str(col).lower().strip()
-
-            # Identificación de usuario / User ID
-            if ('identificación' in col_lower and 'usuario' in col_lower) or \
-               'user id' in col_lower or \
-               col_lower == 'userid' or \
-               col_lower == 'id usuario':
-                column_map[col] = 'id_usuario'
-
-            # Nombre completo del usuario / User Name
-            elif 'nombre completo' in col_lower or \
-                 'user name' in col_lower or \
-                 col_lower == 'username' or \
-                 col_lower == 'nombre usuario':
-                column_map[col] = 'nombre_usuario'
-
-            # Título de la capacitación / Training Title
-            elif ('título' in col_lower and 'capacitación' in col_lower) or \
-                 'training title' in col_lower or \
-                 'titulo capacitacion' in col_lower or \
-                 'course title' in col_lower:
-                column_map[col] = 'titulo_modulo'
-
-            # Estado del expediente / Transcript Status
-            elif ('estado' in col_lower and 'expediente' in col_lower) or \
-                 'transcript status' in col_lower or \
-                 col_lower == 'status' or \
-                 col_lower == 'estado':
-                column_map[col] = 'estado'
-
-            # Fecha asignada del expediente -> FechaInicio en BD
-            elif ('fecha asignada' in col_lower and 'expediente' in col_lower) or \
-                 'transcript assigned date' in col_lower or \
-                 'assigned date' in col_lower or \
-                 'fecha asignada' in col_lower:
-                column_map[col] = 'fecha_inicio'
-
-            # Fecha de finalización de expediente -> FechaFinalizacion en BD
-            elif ('fecha' in col_lower and 'finalización' in col_lower and 'expediente' in col_lower) or \
-                 'transcript completed date' in col_lower or \
-                 'completed date' in col_lower or \
-                 'fecha finalizacion' in col_lower or \
-                 ('fecha' in col_lower and 'completado' in col_lower):
-                column_map[col] = 'fecha_fin'
+        column_map = None
+        if self._perfil is not None:
+            guardado = self._perfil['column_map']
+            column_map = {col: guardado[str(col)] for col in df.columns if str(col) in guardado}
+            if any(col not in column_map.values() for col in REQUIRED_COLUMNS):
+                # La plantilla cambió respecto al perfil: se vuelve a detectar y aprender
+                self.header_profiles.forget(self._perfil)
+                self._headers_sin_perfil = (self._perfil['header_row'], tuple(df.columns))
+                self._perfil = None
+                column_map = None
+
+        if column_map is None:
+            column_map = self.map_columns(df.columns)
 
         # Aplicar el mapeo
-        normalized_df.rename(columns=column_map, inplace=True)
+        normalized_df = df.rename(columns=column_map)
 
         # Verificar que tenemos las columnas mínimas requeridas
-        required = ['id_usuario', 'titulo_modulo', 'estado']
-        missing = [col for col in required if col not in normalized_df.columns]
+        missing = [col for col in REQUIRED_COLUMNS if col not in normalized_df.columns]
 
         if missing:
             # Mostrar columnas disponibles para debugging
@@ -131,48 +392,38 @@ class TranscriptProcessor:
             print(f"Columnas faltantes: {missing}")
             raise ValueError(f"Columnas requeridas no encontradas: {missing}")
 
+        # Plantilla nueva: se recuerda para los próximos archivos (y bloques)
+        if self._headers_sin_perfil is not None:
+            header_row, header = self._headers_sin_perfil
+            self._perfil = self.header_profiles.learn(
+                header_row, header, {str(col): destino for col, destino in column_map.items()})
+            self._headers_sin_perfil = None
+            self.stats['perfil_plantilla'] = 'nueva'
+
         return normalized_df
 
-    def extract_module_info(self, titulo: str) -> tuple:
+    @staticmethod
+    def map_columns(columns) -> Dict:
         """
-        Extrae el número del módulo del título exacto de los 14 módulos
-        Retorna: (IdModulo, NombreCorto)
-        """
-        if pd.isna(titulo):
-            return (None, None)
-
-        titulo_upper = str(titulo).strip().upper()
-
-        # Diccionario de mapeo EXACTO de los 14 módulos
-        modulos_mapping = {
-            'MÓDULO 1. INTRODUCCIÓN A LA FILOSOFÍA HUTCHISON PORTS': (1, 'Filosofía HP'),
-            'MÓDULO 2. SOSTENIBILIDAD, NUESTRO COMPROMISO CON EL FUTURO': (2, 'Sostenibilidad'),
-            'MÓDULO 3. INTRODUCCIÓN A LAS OPERACIONES': (3, 'Operaciones'),
-            'MÓDULO 4. RELACIONES LABORALES': (4, 'Relaciones Laborales'),
-            'MÓDULO 5. SEGURIDAD EN LAS OPERACIONES': (5, 'Seguridad'),
-            'MÓDULO 6. CIBERSEGURIDAD': (6, 'Ciberseguridad'),
-            'MÓDULO 7. ENTORNO LABORAL SALUDABLE': (7, 'Entorno Laboral'),
-            'MÓDULO 8. PROCESOS DE RECURSOS HUMANOS': (8, 'RRHH'),
-            'MÓDULO 9. PROGRAMAS DE BIENESTAR INTEGRAL': (9, 'Bienestar'),
-            'MÓDULO 10. DESARROLLO DE NUEVOS PRODUCTOS': (10, 'Nuevos Productos'),
-            'MÓDULO 11. PRODUCTOS DIGITALES DE HP': (11, 'Productos Digitales'),
-            'MÓDULO 12. TECNOLOGÍA: IMPULSO PARA LA EFICIENCIA Y PRODUCTIVIDAD': (12, 'Tecnología'),
-            'MÓDULO 13. ACTIVACIÓN DE PROTOCOLOS Y BRIGADAS DE CONTINGENCIA': (13, 'Contingencia'),
-            'MÓDULO 14. SISTEMA INTEGRADO DE GESTIÓN DE CALIDAD Y MEJORA CONTINUA': (14, 'Calidad'),
-        }
-
-        # Buscar coincidencia exacta primero
-        if titulo_upper in modulos_mapping:
-            return modulos_mapping[titulo_upper]
-
-        # Si no hay coincidencia exacta, buscar por patrón MÓDULO X.
-        match = re.search(r'MÓDULO\s+(\d+)\.', titulo_upper)
-        if match:
-            num = int(match.group(1))
-            if 1 <= num <= 14:
-                return (num, f'Módulo {num}')
+        Mapeo columna del archivo -> columna estándar según COLUMN_RULES
+        Cada columna toma la primera columna estándar con una regla que cumpla
+        """
+        column_map = {}
+        for col in columns:
+            col_lower = str(col).lower().strip()
+            for destino, reglas in COLUMN_RULES:
+                if any(col_lower == valor if tipo == 'igual' else all(p in col_lower for p in valor)
+                       for tipo, valor in reglas):
+                    column_map[col] = destino
+                    break
+        return column_map
 
-        return (None, None)
+    def extract_module_info(self, titulo: str) -> tuple:
+        """
+        Resuelve el título con el catálogo de módulos (ver ModuleIndex)
+        Retorna: (IdModulo, NombreCorto) o (None, None)
+        """
+        return self.module_index.info(titulo)
 
     def convert_excel_date(self, excel_date) -> Optional[str]:
         """
@@ -184,17 +435,28 @@ class TranscriptProcessor:
         try:
             if isinstance(excel_date, (int, float)):
                 # Fecha numérica de Excel
-                dt = datetime(1899, 12, 30) + timedelta(days=excel_date)
+                dt = EXCEL_EPOCH + timedelta(days=excel_date)
                 return dt.strftime('%Y-%m-%d')
             elif isinstance(excel_date, str):
+                # Serial de Excel como texto ('44642.0'): CSV o columna de tipos mezclados
+                try:
+                    serial = float(excel_date)
+                except ValueError:
+                    serial = None
+                if serial is not None and EXCEL_SERIAL_RANGE[0] <= serial <= EXCEL_SERIAL_RANGE[1]:
+                    return (EXCEL_EPOCH + timedelta(days=serial)).strftime('%Y-%m-%d')
+
                 # Intentar parsear diferentes formatos
-                for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d']:
+                for fmt in DATE_FORMATS:
                     try:
                         dt = datetime.strptime(excel_date.split(' ')[0], fmt)
                         return dt.strftime('%Y-%m-%d')
                     except:
                         continue
                 return excel_date  # Devolver como está si no se puede convertir
+            elif isinstance(excel_date, datetime):
+                # Celdas de fecha leídas por pandas (Timestamp)
+                return excel_date.strftime('%Y-%m-%d')
             else:
                 return str(excel_date)
         except:
@@ -220,47 +482,14 @@ class TranscriptProcessor:
 
         status = str(status).strip()
 
-        # Mapeo exacto primero
-        exact_map = {
-            'Terminado': 'Completado',
-            'En Progreso': 'En proceso',
-            'Registrado': 'Registrado',
-        }
-
         # Buscar coincidencia exacta primero
-        if status in exact_map:
-            return exact_map[status]
+        if status in STATUS_EXACT_MAP:
+            return STATUS_EXACT_MAP[status]
 
         # Si no, buscar case-insensitive
         status_lower = status.lower()
 
-        status_map = {
-            'terminado': 'Completado',
-            'completed': 'Completado',
-            'completado': 'Completado',
-            'complete': 'Completado',
-            'finalizado': 'Completado',
-            'aprobado': 'Completado',
-            'passed': 'Completado',
-
-            'en progreso': 'En proceso',
-            'en proceso': 'En proceso',
-            'in progress': 'En proceso',
-            'iniciado': 'En proceso',
-            'started': 'En proceso',
-
-            'registrado': 'Registrado',
-            'registered': 'Registrado',
-            'inscrito': 'Registrado',
-            'enrolled': 'Registrado',
-
-            'no iniciado': 'No iniciado',
-            'not started': 'No iniciado',
-            'pendiente': 'No iniciado',
-            'pending': 'No iniciado'
-        }
-
-        for key, value in status_map.items():
+        for key, value in STATUS_KEYWORD_MAP.items():
             if key in status_lower:
                 return value
 
@@ -268,91 +497,856 @@ class TranscriptProcessor:
         print(f"ADVERTENCIA: Estado no reconocido: '{status}'")
         return 'No iniciado'  # Default
 
+    # ==================== NORMALIZACIÓN COLUMNAR ====================
+
+    def normalize_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Normaliza el DataFrame completo columna por columna, antes de tocar la BD
+        Agrega las columnas:
+        - IdModulo: ID del módulo (Int64, <NA> si el título no se reconoce)
+        - estado_normalizado: Completado / En proceso / Registrado / No iniciado
+        - fecha_inicio_iso, fecha_fin_iso: fechas YYYY-MM-DD
+        Cada columna se resuelve solo sobre sus valores únicos (pd.factorize),
+        que en un export típico son 14 títulos y unos cientos de fechas.
+        """
+        sin_fecha = pd.Series(None, index=df.index, dtype=object)
+
+        return df.assign(
+            IdModulo=self._map_unique(df['titulo_modulo'], self._resolve_module_ids).astype('Int64'),
+            estado_normalizado=self._map_unique(df['estado'], self._resolve_statuses, 'No iniciado'),
+            fecha_inicio_iso=self._map_unique(df.get('fecha_inicio', sin_fecha), self._resolve_dates),
+            fecha_fin_iso=self._map_unique(df.get('fecha_fin', sin_fecha), self._resolve_dates)
+        )
 
-    def process_file(self, file_path: str) -> Dict:
+    @staticmethod
+    def _map_unique(values: pd.Series, resolver, missing=None) -> pd.Series:
+        """
+        Aplica `resolver` a los valores únicos de la columna y expande el
+        resultado a todas las filas. Los nulos reciben `missing`.
+        """
+        codes, uniques = pd.factorize(values)
+        resolved = resolver(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+        # El código -1 (nulo) apunta al último elemento: el valor para faltantes
+        resolved = np.append(resolved, np.array([missing], dtype=object))
+        return pd.Series(resolved[codes], index=values.index)
+
+    def _resolve_module_ids(self, titulos: pd.Series) -> pd.Series:
+        """Versión columnar de extract_module_info (solo IdModulo)"""
+        return self.module_index.resolve_ids(titulos)
+
+    @staticmethod
+    def _resolve_statuses(estados: pd.Series) -> pd.Series:
+        """Versión columnar de normalize_status"""
+        estados = estados.astype(str).str.strip()
+        estados_lower = estados.str.lower()
+
+        # Primera palabra clave que aparezca (mismo orden que STATUS_KEYWORD_MAP)
+        por_clave = np.select(
+            [estados_lower.str.contains(key, regex=False) for key in STATUS_KEYWORD_MAP],
+            list(STATUS_KEYWORD_MAP.values()),
+            default=None
+        )
+        resultado = estados.map(STATUS_EXACT_MAP).fillna(pd.Series(por_clave, index=estados.index))
+
+        for status in estados[resultado.isna()]:
+            print(f"ADVERTENCIA: Estado no reconocido: '{status}'")
+
+        return resultado.fillna('No iniciado')
+
+    @staticmethod
+    def _resolve_dates(valores: pd.Series) -> pd.Series:
+        """
+        Versión columnar de convert_excel_date
+        - Numéricos: fecha serial de Excel
+        - Texto numérico dentro de EXCEL_SERIAL_RANGE ('44642', '44642.0'): fecha serial
+          (así llegan desde un CSV o una columna con tipos mezclados)
+        - Otro texto: DATE_FORMATS en orden; si ninguno aplica se conserva el texto
+        - Fechas (Timestamp/datetime): formato ISO
+        """
+        resultado = pd.Series(None, index=valores.index, dtype=object)
+        if valores.empty:
+            return resultado
+
+        tipos = valores.map(type)
+        numericos = tipos.map(lambda t: issubclass(t, (int, float, np.number)))
+        textos = tipos.map(lambda t: issubclass(t, str))
+        fechas = tipos.map(lambda t: issubclass(t, datetime))
+        otros = ~(numericos | textos | fechas)
+
+        seriales = pd.Series(False, index=valores.index)
+        if textos.any():
+            como_numero = pd.to_numeric(valores.where(textos).str.strip(), errors='coerce')
+            seriales = textos & como_numero.between(*EXCEL_SERIAL_RANGE)
+            textos &= ~seriales
+
+        if seriales.any():
+            serial = pd.to_datetime(como_numero[seriales], unit='D', origin=EXCEL_EPOCH)
+            resultado[seriales] = serial.dt.strftime('%Y-%m-%d')
+
+        if numericos.any():
+            serial = pd.to_datetime(pd.to_numeric(valores[numericos]), unit='D',
+                                    origin=EXCEL_EPOCH, errors='coerce')
+            resultado[numericos] = serial.dt.strftime('%Y-%m-%d')
+
+        if textos.any():
+            texto = valores[textos]
+            base = texto.str.split(' ').str[0]
+            parsed = pd.Series(pd.NaT, index=base.index, dtype='datetime64[ns]')
+            for fmt in DATE_FORMATS:
+                pendientes = parsed.isna()
+                if not pendientes.any():
+                    break
+                parsed[pendientes] = pd.to_datetime(base[pendientes], format=fmt, errors='coerce')
+            resultado[textos] = parsed.dt.strftime('%Y-%m-%d').where(parsed.notna(), texto)
+
+        if fechas.any():
+            resultado[fechas] = pd.to_datetime(valores[fechas]).dt.strftime('%Y-%m-%d')
+
+        if otros.any():
+            resultado[otros] = valores[otros].astype(str)
+
+        return resultado.where(resultado.notna(), None)
+
+    def process_file(self, file_path: str, chunk_size: Optional[int] = None,
+                     dry_run: bool = False, resume: bool = True) -> Dict:
         """
         Procesa el archivo completo y retorna estadísticas
-        IMPORTANTE: Ahora procesa TODOS los 14 módulos (MÓDULO 1. hasta MÓDULO 14.)
+        IMPORTANTE: Procesa todos los módulos del catálogo (settings + Instituto_Modulo)
+
+        Args:
+            file_path: Ruta del archivo Transcript Status (.xlsx, .xls o .csv)
+            chunk_size: Filas por bloque para archivos .csv (streaming con commit
+                        por bloque). None usa INGESTION_CONFIG['csv_chunk_size'];
+                        0 procesa el archivo completo en memoria.
+            dry_run: True para solo comparar el archivo con la BD (ver diff_file),
+                     sin escribir nada. El resultado queda en stats['diferencias'].
+            resume: True para retomar una carga interrumpida del mismo archivo
+                    desde su último checkpoint; False la repite completa.
         """
-        # Leer y normalizar el archivo
-        df = self.detect_file_structure(file_path)
+        if chunk_size is None:
+            chunk_size = INGESTION_CONFIG['csv_chunk_size']
 
-        # CRITICAL: Filtrar solo filas con MÓDULO X. (1-14) en el título
-        print(f"\nTotal de registros antes del filtro: {len(df)}")
-        df = df[df['titulo_modulo'].str.contains(r'MÓDULO\s+\d+\.', case=False, na=False, regex=True)]
-        print(f"Registros después de filtrar MÓDULO 1-14: {len(df)}")
+        # La vista previa no escribe nada: tampoco el CSV de rechazados
+        self._init_stats(file_path, write_rejected=False if dry_run else None)
+        self._start_phase('catalogos')
+        self.load_existing_keys()
 
-        # CRITICAL: Filtrar solo estados válidos
-        valid_states = ['Terminado', 'En Progreso', 'Registrado', 'En progreso']
-        df = df[df['estado'].isin(valid_states)]
-        print(f"Registros después de filtrar estados válidos: {len(df)}")
+        if dry_run:
+            return self.diff_file(file_path)
+
+        if chunk_size and file_path.endswith('.csv'):
+            return self._process_csv_streaming(file_path, chunk_size, resume)
+
+        # Leer, normalizar y validar el archivo (una fila por inscripción)
+        df = self.validate_dataframe(self.load_file(file_path))
+
+        desde = self._resume_offset(file_path, 'archivo', resume)
+        lote = self.checkpoint_rows or max(len(df), 1)
+
+        try:
+            for inicio in range(desde, len(df), lote):
+                fin = min(inicio + lote, len(df))
+                if self.checkpoint_rows:
+                    self._bloque = inicio // lote + 1
+                    print(f"\n--- Lote {self._bloque} (filas {inicio + 1:,}-{fin:,} de {len(df):,}) ---")
+
+                self._apply_dataframe(df.iloc[inicio:fin])
+
+                self._start_phase('commit')
+                self._commit(file_path if fin == len(df) else None)
+                if self.checkpoint_rows:
+                    self.stats['bloques_confirmados'] += 1
+                    if fin < len(df):
+                        self._save_checkpoint(file_path, 'archivo', fin, len(df))
+
+            if desde >= len(df):
+                # Todo confirmado en la carga anterior: solo falta registrar el archivo
+                self._start_phase('commit')
+                self._commit(file_path)
+            self._end_phase()
+            self._bloque = None
+            self._clear_checkpoint(file_path)
+            self._save_header_profiles()
+            print(f"✓ Procesamiento completado exitosamente!")
+
+        except IngestionCancelled:
+            self._rollback()
+            if self.stats['bloques_confirmados']:
+                print(f"✗ Carga cancelada: lote en curso revertido ({self.stats['bloques_confirmados']} "
+                      f"lotes ya confirmados; se reanuda al volver a cargar el archivo)")
+            else:
+                print("✗ Carga cancelada: transacción revertida")
+            raise
+
+        except Exception as e:
+            self._rollback()
+            self.errors.add('CARGA_FALLIDA', str(e))
+            print(f"✗ Error durante el procesamiento: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            raise e
+
+        return self.stats
 
-        # Estadísticas iniciales
+    def _resume_offset(self, file_path: str, modo: str, resume: bool) -> int:
+        """Filas ya confirmadas por una carga anterior interrumpida (0 si no hay checkpoint)"""
+        if self.checkpoints is None:
+            return 0
+        if modo == 'archivo' and not self.checkpoint_rows:
+            return 0
+
+        sha = self._file_hash(file_path)
+        checkpoint = self.checkpoints.load(sha, modo, self._normalization_version())
+        if checkpoint is None:
+            return 0
+        if not resume:
+            self.checkpoints.clear(sha)
+            return 0
+
+        desde = checkpoint['filas_confirmadas']
+        self.stats['filas_reanudadas'] = desde
+        print(f"↩ Reanudando carga interrumpida ({checkpoint['fecha']}): "
+              f"{desde:,} filas ya confirmadas se omiten")
+        return desde
+
+    def _save_checkpoint(self, file_path: str, modo: str, filas: int, total: Optional[int]) -> None:
+        """
+        Registra las filas confirmadas hasta ahora (después del commit)
+        Si el proceso muere entre el commit y este guardado, el lote se reaplica al
+        reanudar, sin efecto: el upsert es por (UserId, IdModulo).
+        """
+        self.checkpoints.save(self._file_hash(file_path), os.path.basename(file_path), modo,
+                              self._normalization_version(), filas, total)
+
+    def _clear_checkpoint(self, file_path: str) -> None:
+        if self.checkpoints is not None:
+            self.checkpoints.clear(self._file_hash(file_path))
+
+    def _save_header_profiles(self) -> None:
+        """Guarda los usos de perfiles de la carga (match solo los cuenta en memoria)"""
+        if self.header_profiles is not None:
+            self.header_profiles.flush()
+
+    def diff_file(self, file_path: str) -> Dict:
+        """
+        Vista previa (dry run): qué cambiaría el archivo en la BD, sin escribir nada
+        Lee Instituto_ProgresoModulo en una sola consulta y la compara con el
+        archivo normalizado mediante un merge vectorizado por (UserId, IdModulo).
+        Requiere load_existing_keys (lo llama process_file(dry_run=True)).
+
+        Tampoco guarda perfiles de plantilla ni checkpoints (sí puede llenar la
+        caché de lectura, que no cambia el resultado de ninguna carga).
+
+        Resultado en stats['diferencias']:
+        - usuarios_nuevos, modulos_nuevos, inscripciones_nuevas, sin_cambios (cantidades)
+        - modulos_nuevos_ids: IdModulo que se crearían
+        - transiciones: {'Registrado → Completado': n, ...}
+        - cambios_fecha_inicio, cambios_fecha_fin
+        El detalle por inscripción (solo las que cambian) queda en self.diff.
+        """
+        # Un perfil aprendido o usado aquí queda solo en memoria
+        autosave = self.header_profiles is not None and self.header_profiles.autosave
+        if autosave:
+            self.header_profiles.autosave = False
+        try:
+            df = self.validate_dataframe(self.load_file(file_path))
+        finally:
+            if autosave:
+                self.header_profiles.autosave = True
+        self.stats['total_registros'] = len(df)
+
+        self._start_phase('diferencias', total=len(df))
+        user_ids = df.loc[df['id_usuario'].notna(), 'id_usuario'].astype(str).unique()
+        usuarios_nuevos = int((~pd.Series(user_ids).isin(self._usuarios_existentes)).sum())
+        self.stats['usuarios_unicos'] = len(user_ids)
+        self.stats['modulos_unicos'] = df['titulo_modulo'].nunique()
+
+        # process_module acepta todo título con IdModulo reconocido (crea el módulo si falta)
+        modulos_validos = set(df['IdModulo'].dropna().astype(int))
+        modulos_nuevos = sorted(modulos_validos - set(self._modulos_existentes))
+        archivo = self._staging_frame(df, modulos_validos)
+
+        actual = self._read_current_progress(modulos_validos)
+        comparacion = archivo.astype({'IdModulo': int}).merge(
+            actual, on=['UserId', 'IdModulo'], how='left', suffixes=('', '_bd'), indicator=True)
+
+        existente = comparacion['_merge'] == 'both'
+        cambia_estado = existente & ~self._same_values(
+            comparacion['EstatusModuloUsuario'], comparacion['EstatusModuloUsuario_bd'])
+        cambia_inicio = existente & ~self._same_values(
+            pd.to_datetime(comparacion['FechaInicio']), pd.to_datetime(comparacion['FechaInicio_bd']))
+        cambia_fin = existente & ~self._same_values(
+            pd.to_datetime(comparacion['FechaFinalizacion']),
+            pd.to_datetime(comparacion['FechaFinalizacion_bd']))
+        nueva = comparacion['_merge'] == 'left_only'
+
+        transiciones = comparacion.loc[cambia_estado, ['EstatusModuloUsuario_bd', 'EstatusModuloUsuario']] \
+            .fillna('(sin estado)') \
+            .groupby(['EstatusModuloUsuario_bd', 'EstatusModuloUsuario']).size() \
+            .sort_values(ascending=False)
+
+        self.stats['diferencias'] = {
+            'usuarios_nuevos': usuarios_nuevos,
+            'modulos_nuevos': len(modulos_nuevos),
+            'modulos_nuevos_ids': modulos_nuevos,
+            'inscripciones_nuevas': int(nueva.sum()),
+            'transiciones': {f"{antes} → {despues}": int(n) for (antes, despues), n in transiciones.items()},
+            'cambios_fecha_inicio': int(cambia_inicio.sum()),
+            'cambios_fecha_fin': int(cambia_fin.sum()),
+            'sin_cambios': int((existente & ~(cambia_estado | cambia_inicio | cambia_fin)).sum()),
+        }
+
+        cambio = pd.Series(None, index=comparacion.index, dtype=object)
+        cambio[cambia_fin] = 'fecha_fin'
+        cambio[cambia_inicio] = 'fecha_inicio'
+        cambio[cambia_estado] = 'estado'
+        cambio[nueva] = 'nueva'
+        self.diff = comparacion.assign(Cambio=cambio).loc[cambio.notna()].drop(columns='_merge')
+
+        self._report_progress(len(df))
+        self._end_phase()
+        print(f"✓ Vista previa: {self.stats['diferencias']['inscripciones_nuevas']:,} inscripciones nuevas, "
+              f"{int(cambia_estado.sum()):,} cambios de estado (sin escribir en la BD)")
+        return self.stats
+
+    def _read_current_progress(self, modulos: set) -> pd.DataFrame:
+        """Estado actual de Instituto_ProgresoModulo para los módulos dados (una consulta)"""
+        columnas = ['UserId', 'IdModulo', 'EstatusModuloUsuario', 'FechaInicio', 'FechaFinalizacion']
+        if not modulos:
+            return pd.DataFrame(columns=columnas)
+
+        self.cursor.execute(statements.sql('progress_by_modules', self.backend, len(modulos)),
+                            tuple(sorted(modulos)))
+        actual = pd.DataFrame.from_records([tuple(row) for row in self.cursor.fetchall()], columns=columnas)
+        return actual.astype({'UserId': str, 'IdModulo': int})
+
+    @staticmethod
+    def _same_values(a: pd.Series, b: pd.Series) -> pd.Series:
+        """Igualdad fila a fila donde dos nulos cuentan como iguales"""
+        return (a == b) | (a.isna() & b.isna())
+
+    def process_folder(self, folder: str, max_workers: Optional[int] = None) -> Dict:
+        """Procesa todos los archivos Transcript Status de una carpeta (ver process_files)"""
+        file_paths = sorted(
+            os.path.join(folder, name) for name in os.listdir(folder)
+            if name.endswith(TRANSCRIPT_EXTENSIONS) and not name.startswith('~$')
+        )
+        if not file_paths:
+            raise ValueError(f"No se encontraron archivos .xlsx/.xls/.csv en {folder}")
+
+        return self.process_files(file_paths, max_workers=max_workers)
+
+    def process_files(self, file_paths: List[str], max_workers: Optional[int] = None) -> Dict:
+        """
+        Importa varios archivos (p. ej. un export por unidad de negocio) en una sola carga
+        1. Lectura + normalización en paralelo, un proceso por archivo (ProcessPoolExecutor)
+        2. Consolidación: por (UserId, IdModulo) gana la fila con la fecha más reciente
+        3. Un único escritor aplica el resultado a la BD con un solo commit
+        Un archivo ilegible se reporta en errores y no detiene a los demás.
+        """
+        if max_workers is None:
+            max_workers = INGESTION_CONFIG['max_workers']
+
+        # Rechazados de la carga consolidada: junto a los archivos, sin número de fila
+        self._init_stats(file_paths[0], os.path.join(os.path.dirname(file_paths[0]), 'importacion'))
+        self.stats['archivo'] = f"{len(file_paths)} archivos"
+        self.stats['archivos'] = []
+
+        # Catálogos antes de leer: los procesos de lectura reciben el índice de módulos de la BD
+        self._start_phase('catalogos')
+        self.load_existing_keys()
+
+        print(f"\nLeyendo {len(file_paths)} archivos en paralelo...")
+        self._start_phase('lectura')
+        frames = []
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            resultados = executor.map(_load_normalized_file, file_paths, repeat(self.module_index))
+            for file_path, (df, error, perfiles) in zip(file_paths, resultados):
+                try:
+                    self._report_progress(sum(len(frame) for frame in frames))
+                except IngestionCancelled:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+                nombre = os.path.basename(file_path)
+                if self.header_profiles is not None and perfiles is not None:
+                    self.header_profiles.merge(perfiles)
+                if error:
+                    self.errors.add('ARCHIVO_ILEGIBLE', f"Error leyendo {nombre}: {error}")
+                    self.stats['archivos'].append({'archivo': nombre, 'registros': 0, 'error': error})
+                    continue
+                print(f"  ✓ {nombre}: {len(df):,} registros")
+                self.stats['archivos'].append({'archivo': nombre, 'registros': len(df), 'error': None})
+                frames.append(df)
+
+        # Un solo escritor del JSON de perfiles: los procesos de lectura no lo guardan
+        self._save_header_profiles()
+
+        if not frames:
+            raise ValueError("Ningún archivo pudo leerse correctamente")
+
+        leidas = sum(len(frame) for frame in frames)
+        self._report_progress(leidas)
+        self._start_phase('consolidacion', total=leidas)
+        df = self.validate_dataframe(self._consolidate_files(frames))
+
+        try:
+            self._apply_dataframe(df)
+
+            self._start_phase('commit')
+            self._commit()
+            self._end_phase()
+            if self.manifest is not None:
+                for file_path, resumen in zip(file_paths, self.stats['archivos']):
+                    if not resumen['error']:
+                        self.manifest.commit({'archivo': resumen['archivo'], 'sha256': self._file_hash(file_path),
+                                              'registros': resumen['registros']})
+            print(f"✓ Procesamiento completado exitosamente!")
+
+        except IngestionCancelled:
+            self._rollback()
+            print("✗ Carga cancelada: transacción revertida")
+            raise
+
+        except Exception as e:
+            self._rollback()
+            self.errors.add('CARGA_FALLIDA', str(e))
+            print(f"✗ Error durante el procesamiento: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            raise e
+
+        return self.stats
+
+    def _consolidate_files(self, frames: List[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Une los DataFrames normalizados y deja una fila por (UserId, IdModulo):
+        la de fecha más reciente (finalización o, si no hay, asignación).
+        A igual fecha gana el archivo posterior en la lista.
+        """
+        df = pd.concat(frames, ignore_index=True)
+
+        fecha = pd.to_datetime(df['fecha_fin_iso'], format='%Y-%m-%d', errors='coerce') \
+            .fillna(pd.to_datetime(df['fecha_inicio_iso'], format='%Y-%m-%d', errors='coerce'))
+        con_clave = df['id_usuario'].notna() & df['IdModulo'].notna()
+
+        claves = df.loc[con_clave].assign(
+            _user=df.loc[con_clave, 'id_usuario'].astype(str),
+            _fecha=fecha[con_clave]
+        ).sort_values('_fecha', kind='stable', na_position='first')
+        ganadores = claves.drop_duplicates(subset=['_user', 'IdModulo'], keep='last') \
+            .drop(columns=['_user', '_fecha'])
+
+        duplicados = len(claves) - len(ganadores)
+        self.stats['duplicados_entre_archivos'] = duplicados
+        if duplicados:
+            print(f"Consolidación: {duplicados:,} filas repetidas entre archivos descartadas")
+
+        return pd.concat([ganadores.sort_index(), df.loc[~con_clave]]).sort_index()
+
+    def _process_csv_streaming(self, file_path: str, chunk_size: int, resume: bool = True) -> Dict:
+        """
+        Procesa un .csv en bloques de `chunk_size` filas: cada bloque pasa por
+        filtro -> normalización -> upsert y se confirma con su propio commit,
+        así la memoria no depende del tamaño del archivo.
+        Un error o una cancelación solo revierte el bloque en curso; los anteriores
+        ya quedaron confirmados (checkpoint) y volver a cargar el archivo retoma
+        desde ahí. El UPSERT por (UserId, IdModulo) permite re-procesar.
+        Las filas repetidas del archivo se consolidan también entre bloques (ver
+        validate_dataframe): el estado final es el mismo que con el archivo completo
+        en memoria (chunk_size=0), sin importar dónde caen los límites de bloque.
+        """
+        self._start_phase('headers')
+        header_row = self._find_header_row(file_path)
+        self.errors.header_row = header_row
+        desde = self._resume_offset(file_path, 'csv', resume)
+
+        # Streaming por bloques: solo el motor C de pandas admite chunksize.
+        # Al reanudar, las filas de datos ya confirmadas se saltan sin parsearlas.
+        reader = pd.read_csv(file_path, chunksize=chunk_size,
+                             skiprows=lambda i: i < header_row or header_row < i <= header_row + desde)
+        self.stats['motor_lectura'] = 'pandas'
+        leidas = desde
+
+        try:
+            # La lectura de cada bloque ocurre al avanzar el iterador
+            self._bloque = 1
+            self._start_phase('lectura')
+            for numero, chunk in enumerate(reader, start=1):
+                print(f"\n--- Bloque {numero} ({len(chunk)} filas) ---")
+                self._report_progress(len(chunk))
+                # Índice = posición de la fila de datos en el archivo (rechazados, checkpoint)
+                chunk.index += desde
+                leidas += len(chunk)
+
+                self._start_phase('columnas', total=len(chunk))
+                chunk = self.normalize_columns(chunk)
+                self._start_phase('filtrado', total=len(chunk))
+                chunk = self._filter_rows(chunk)
+                self._start_phase('columnas', total=len(chunk))
+                chunk = self.normalize_dataframe(chunk)
+                chunk = self.validate_dataframe(chunk)
+
+                self._apply_dataframe(chunk)
+
+                self._start_phase('commit')
+                self._commit()
+                self.stats['bloques_confirmados'] += 1
+                self._save_checkpoint(file_path, 'csv', leidas, None)
+
+                self._bloque = numero + 1
+                self._start_phase('lectura')
+
+            self._end_phase()
+            self._bloque = None
+            if self.manifest is not None:
+                self.manifest.commit(self._file_entry(file_path))
+            self._clear_checkpoint(file_path)
+            self._save_header_profiles()
+            print(f"✓ Procesamiento completado exitosamente! ({self.stats['bloques_confirmados']} bloques)")
+
+        except IngestionCancelled:
+            self._rollback()
+            print(f"✗ Carga cancelada: bloque en curso revertido "
+                  f"({self.stats['bloques_confirmados']} bloques ya confirmados; "
+                  f"se reanuda al volver a cargar el archivo)")
+            raise
+
+        except Exception as e:
+            self._rollback()
+            self.errors.add('CARGA_FALLIDA',
+                            f"{str(e)} (bloques confirmados antes del error: {self.stats['bloques_confirmados']})")
+            print(f"✗ Error durante el procesamiento: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            raise e
+
+        return self.stats
+
+    def _init_stats(self, file_path: str, errors_path: Optional[str] = None,
+                    write_rejected: Optional[bool] = None) -> None:
+        """
+        Inicializa las estadísticas y los acumuladores de un procesamiento
+        errors_path: Ruta junto a la que se escribe el CSV de rechazados (None = file_path)
+        write_rejected: Escribir ese CSV (ver IngestionErrors). None usa INGESTION_CONFIG.
+        """
         self.stats = {
             'archivo': os.path.basename(file_path),
             'fecha_procesamiento': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'total_registros': len(df),
+            'total_registros': 0,
             'usuarios_unicos': 0,
             'modulos_unicos': 0,
             'usuarios_nuevos': 0,
             'modulos_nuevos': 0,
             'inscripciones_actualizadas': 0,
-            'errores': []
+            'inscripciones_nuevas': 0,
+            'inscripciones_modificadas': 0,
+            'inscripciones_sin_cambios': 0,
+            'bloques_confirmados': 0,
+            'lectura_desde_cache': False,
+            'motor_lectura': None,
+            'perfil_plantilla': None,
+            'filas_reanudadas': 0,
+            'duplicados_en_archivo': 0,
+            'timings': {}
         }
+        self.errors = IngestionErrors(self.stats, errors_path or file_path, write_rejected=write_rejected)
+        self._fase = None
+        self._bloque = None
+        # Usuarios y títulos ya vistos (persisten entre bloques del streaming)
+        self._usuarios_vistos = set()
+        # (UserId, IdModulo) -> prioridad de la fila escrita en esta carga (ver validate_dataframe)
+        self._claves_cargadas: Dict[tuple, tuple] = {}
+        self._titulos_vistos = set()
+
+    def load_existing_keys(self) -> None:
+        """
+        Carga en memoria los UserId existentes y el catálogo de módulos
+        Una consulta por tabla en lugar de una por usuario/fila
+        """
+        self.cursor.execute(statements.sql('user_ids', self.backend))
+        self._usuarios_existentes = {str(row[0]) for row in self.cursor.fetchall()}
 
-        try:
-            # Verificar que tenemos las columnas necesarias
-            required_cols = ['id_usuario', 'titulo_modulo', 'estado']
-            missing_cols = [col for col in required_cols if col not in df.columns]
-            if missing_cols:
-                raise ValueError(f"Faltan columnas requeridas: {missing_cols}")
-
-            # Procesar usuarios únicos
-            # Usar nombre_usuario si existe, si no usar id_usuario como nombre
-            if 'nombre_usuario' not in df.columns:
-                df['nombre_usuario'] = df['id_usuario']
-
-            usuarios_df = df[['id_usuario', 'nombre_usuario']].drop_duplicates()
-            self.stats['usuarios_unicos'] = len(usuarios_df)
-
-            for _, user in usuarios_df.iterrows():
-                if pd.notna(user['id_usuario']):
-                    nombre = user.get('nombre_usuario', user['id_usuario'])
-                    if pd.isna(nombre):
-                        nombre = str(user['id_usuario'])
-                    self.process_user(
-                        user_id=str(user['id_usuario']),
-                        nombre=str(nombre)
-                    )
-
-            # Procesar módulos únicos
-            modulos_df = df[['titulo_modulo']].drop_duplicates()
-            self.stats['modulos_unicos'] = len(modulos_df)
-
-            for _, modulo in modulos_df.iterrows():
-                if pd.notna(modulo['titulo_modulo']):
-                    self.process_module(titulo=modulo['titulo_modulo'])
-
-            # Procesar inscripciones (progreso de módulos)
-            print(f"\nProcesando {len(df)} inscripciones...")
-            for idx, row in df.iterrows():
+        self.cursor.execute(statements.sql('modules', self.backend))
+        self._modulos_existentes = {row[0]: row[1] for row in self.cursor.fetchall()}
+
+        self.module_index = ModuleIndex.build(self._modulos_existentes, self._load_module_aliases())
+
+        print(f"Usuarios existentes: {len(self._usuarios_existentes):,} | "
+              f"Módulos existentes: {len(self._modulos_existentes)}")
+
+    def _load_module_aliases(self) -> List[tuple]:
+        """(IdModulo, Alias) de Instituto_ModuloAlias; tabla opcional"""
+        if not self.backend.table_exists(self.cursor, 'Instituto_ModuloAlias'):
+            return []
+        self.cursor.execute(statements.sql('module_aliases', self.backend))
+        return [(row[0], row[1]) for row in self.cursor.fetchall()]
+
+    def _commit(self, file_path: Optional[str] = None) -> None:
+        """
+        Commit en la BD y, solo después, registro de huellas en el manifiesto
+        Con file_path se registra además el archivo en el historial
+        """
+        self.conn.commit()
+        self.cursor.add_round_trips(1)
+        # La carga escribe usuarios, unidades, módulos e inscripciones
+        query_cache.invalidate()
+        if self.manifest is not None:
+            self.manifest.commit(self._file_entry(file_path) if file_path else None)
+
+    def _rollback(self) -> None:
+        """Rollback en la BD descartando las huellas no confirmadas"""
+        self._end_phase()
+        self._bloque = None
+        self.conn.rollback()
+        self.cursor.add_round_trips(1)
+        if self.manifest is not None:
+            self.manifest.discard()
+
+    def _file_entry(self, file_path: str) -> Dict:
+        """Entrada del historial de archivos del manifiesto"""
+        return {
+            'archivo': os.path.basename(file_path),
+            'sha256': self._file_hash(file_path),
+            'registros': self.stats['total_registros'],
+            'escritas': self.stats['inscripciones_actualizadas'],
+            'sin_cambios': self.stats['inscripciones_sin_cambios']
+        }
+
+    def _start_phase(self, clave: str, total: Optional[int] = None, detalle: Optional[str] = None) -> None:
+        """
+        Cierra la fase en curso e inicia otra (clave de INGESTION_PHASES)
+        Una fase con la misma clave que la anterior (p. ej. staging -> MERGE)
+        acumula tiempo y viajes a la BD pero no vuelve a contar sus filas.
+        """
+        continua = self._fase is not None and self._fase['clave'] == clave
+        self._end_phase()
+
+        etiqueta = INGESTION_PHASES[clave] + (f" ({detalle})" if detalle else "")
+        self._fase = {
+            'clave': clave, 'fase': etiqueta, 'total': total,
+            'filas': total or 0, 'cuenta_filas': not continua,
+            'inicio': time.perf_counter(), 'round_trips': self._round_trips()
+        }
+        self._report_progress(0)
+
+    def _end_phase(self) -> None:
+        """Acumula en stats['timings'] el tiempo, filas, filas/s y viajes a la BD de la fase en curso"""
+        fase, self._fase = self._fase, None
+        if fase is None:
+            return
+
+        timing = self.stats.setdefault('timings', {}).setdefault(
+            fase['clave'], {'segundos': 0.0, 'filas': 0, 'filas_por_seg': None, 'round_trips': 0})
+        timing['segundos'] += time.perf_counter() - fase['inicio']
+        timing['round_trips'] += self._round_trips() - fase['round_trips']
+        if fase['cuenta_filas']:
+            timing['filas'] += fase['filas']
+        if timing['filas'] and timing['segundos'] > 0:
+            timing['filas_por_seg'] = timing['filas'] / timing['segundos']
+
+    def _round_trips(self) -> int:
+        """Viajes a la BD acumulados por el cursor de este procesador"""
+        return self.cursor.round_trips if self.cursor is not None else 0
+
+    def _report_progress(self, filas: int) -> None:
+        """
+        Punto de control: cancela si se pidió y notifica el avance de la fase
+        actual con su velocidad (filas/s) y el tiempo restante estimado
+        """
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise IngestionCancelled("Carga cancelada por el usuario")
+
+        if self._fase is None:
+            return
+        self._fase['filas'] = max(self._fase['filas'], filas)
+
+        if self.progress_callback is None:
+            return
+
+        transcurrido = time.perf_counter() - self._fase['inicio']
+        velocidad = filas / transcurrido if transcurrido > 0 else 0.0
+        total = self._fase['total']
+        eta = (total - filas) / velocidad if total and velocidad > 0 else None
+
+        self.progress_callback({
+            'fase': self._fase['fase'],
+            'clave': self._fase['clave'],
+            'bloque': self._bloque,
+            'filas': filas,
+            'total': total,
+            'filas_por_seg': velocidad,
+            'eta_seg': eta
+        })
+
+    def validate_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Validación de todo el DataFrame normalizado, antes de tocar la BD
+        Rechaza (a stats y al CSV de rechazados) las filas:
+        - sin UserId
+        - sin IdModulo reconocible
+        - con fechas no reconocidas
+        - con FechaFinalizacion anterior a FechaInicio
+        Después deja una sola fila por (UserId, IdModulo) con una regla fija:
+        el estado más avanzado (STATUS_RANK), luego la fecha de finalización y
+        de asignación más recientes; a igualdad, la última fila del archivo.
+        Así a la BD llega una sola escritura por inscripción. En streaming la regla
+        también rige entre bloques, solo para las claves que ya escribió un bloque
+        anterior de la misma carga: lo guardado por cargas previas se reemplaza
+        siempre (el export más reciente manda, incluidas las correcciones). Al
+        reanudar una carga interrumpida se conocen solo las claves de esta sesión.
+        """
+        self._start_phase('validacion', total=len(df))
+        inicio = pd.to_datetime(df['fecha_inicio_iso'], format='%Y-%m-%d', errors='coerce')
+        fin = pd.to_datetime(df['fecha_fin_iso'], format='%Y-%m-%d', errors='coerce')
+        user_ids = df['id_usuario'].astype(str).str.strip()
+
+        # Cada fila se rechaza por el primer problema que tenga
+        sin_id = df['id_usuario'].isna() | (user_ids == '')
+        sin_modulo = ~sin_id & df['IdModulo'].isna()
+        inicio_invalida = df['fecha_inicio_iso'].notna() & inicio.isna()
+        fecha_invalida = ~(sin_id | sin_modulo) & (inicio_invalida | (df['fecha_fin_iso'].notna() & fin.isna()))
+        fin_antes = ~(sin_id | sin_modulo | fecha_invalida) & (fin < inicio)
+
+        self.errors.add_rows('ID_FALTANTE', df.loc[sin_id],
+                             "Fila sin Identificación de usuario: " + df.loc[sin_id, 'titulo_modulo'].astype(str))
+        self.errors.add_rows('MODULO_NO_RECONOCIDO', df.loc[sin_modulo],
+                             "No se pudo extraer IdModulo de: " + df.loc[sin_modulo, 'titulo_modulo'].astype(str))
+        fecha_erronea = df['fecha_inicio_iso'].where(inicio_invalida, df['fecha_fin_iso'])
+        self.errors.add_rows('FECHA_NO_RECONOCIDA', df.loc[fecha_invalida],
+                             "Error procesando inscripción de " + user_ids[fecha_invalida] +
+                             ": Fecha no reconocida: '" + fecha_erronea[fecha_invalida].astype(str) + "'")
+        self.errors.add_rows('FECHAS_INCONSISTENTES', df.loc[fin_antes],
+                             "Inscripción de " + user_ids[fin_antes] + ": finalización " +
+                             df.loc[fin_antes, 'fecha_fin_iso'] + " anterior a la asignación " +
+                             df.loc[fin_antes, 'fecha_inicio_iso'])
+
+        validas = ~(sin_id | sin_modulo | fecha_invalida | fin_antes)
+        candidatas = df.loc[validas].assign(
+            _user=user_ids[validas],
+            _rango=df.loc[validas, 'estado_normalizado'].map(STATUS_RANK).fillna(0),
+            _fin=fin[validas],
+            _inicio=inicio[validas]
+        ).sort_values(['_rango', '_fin', '_inicio'], kind='stable', na_position='first')
+        ganadoras = candidatas.drop_duplicates(subset=['_user', 'IdModulo'], keep='last')
+
+        # Claves escritas por bloques anteriores de esta carga: gana la fila con mayor
+        # prioridad (a igualdad, la posterior); las que pierden no se vuelven a escribir
+        claves = list(zip(ganadoras['_user'], ganadoras['IdModulo'].astype(int)))
+        prioridades = list(zip(ganadoras['_rango'],
+                               ganadoras['_fin'].dt.strftime('%Y-%m-%d').fillna(''),
+                               ganadoras['_inicio'].dt.strftime('%Y-%m-%d').fillna('')))
+        if self._claves_cargadas:
+            gana = [prioridad >= self._claves_cargadas.get(clave, prioridad)
+                    for clave, prioridad in zip(claves, prioridades)]
+            claves = [clave for clave, ok in zip(claves, gana) if ok]
+            prioridades = [prioridad for prioridad, ok in zip(prioridades, gana) if ok]
+            ganadoras = ganadoras.loc[gana]
+        self._claves_cargadas.update(zip(claves, prioridades))
+        ganadoras = ganadoras.drop(columns=['_user', '_rango', '_fin', '_inicio']).sort_index()
+
+        duplicados = len(candidatas) - len(ganadoras)
+        self.stats['duplicados_en_archivo'] = self.stats.get('duplicados_en_archivo', 0) + duplicados
+        if duplicados:
+            print(f"Validación: {duplicados:,} filas repetidas por (UserId, IdModulo) consolidadas")
+
+        self._report_progress(len(df))
+        return ganadoras
+
+    def _filter_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Filtra las filas de módulos (título "MÓDULO X." o del catálogo) con estados válidos"""
+        # CRITICAL: Filtrar solo filas con MÓDULO X. en el título o un título/alias del catálogo
+        print(f"\nTotal de registros antes del filtro: {len(df)}")
+        es_modulo = df['titulo_modulo'].str.contains(r'MÓDULO\s+\d+\.', case=False, na=False, regex=True)
+        es_modulo |= self._map_unique(df['titulo_modulo'], self._resolve_module_ids).notna()
+        df = df[es_modulo]
+        print(f"Registros después de filtrar módulos: {len(df)}")
+
+        # CRITICAL: Filtrar solo estados válidos
+        valid_states = ['Terminado', 'En Progreso', 'Registrado', 'En progreso']
+        df = df[df['estado'].isin(valid_states)]
+        print(f"Registros después de filtrar estados válidos: {len(df)}")
+
+        return df
+
+    def _apply_dataframe(self, df: pd.DataFrame) -> None:
+        """
+        Aplica usuarios, módulos e inscripciones de un DataFrame normalizado
+        NO hace commit: lo decide el llamador (archivo completo o por bloque)
+        """
+        # Verificar que tenemos las columnas necesarias
+        required_cols = ['id_usuario', 'titulo_modulo', 'estado']
+        missing_cols = [col for col in required_cols if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Faltan columnas requeridas: {missing_cols}")
+
+        self.stats['total_registros'] += len(df)
+
+        # Procesar usuarios únicos
+        # Usar nombre_usuario si existe, si no usar id_usuario como nombre
+        if 'nombre_usuario' not in df.columns:
+            df = df.assign(nombre_usuario=df['id_usuario'])
+
+        usuarios_df = df.loc[df['id_usuario'].notna(), ['id_usuario', 'nombre_usuario']] \
+            .drop_duplicates(subset='id_usuario')
+        user_ids = usuarios_df['id_usuario'].astype(str)
+        nombres = usuarios_df['nombre_usuario'].where(usuarios_df['nombre_usuario'].notna(), user_ids).astype(str)
+
+        self._start_phase('usuarios', total=len(usuarios_df))
+        nuevos = ~user_ids.isin(self._usuarios_existentes)
+        self.insert_users(list(zip(user_ids[nuevos], nombres[nuevos])))
+
+        self._usuarios_vistos.update(user_ids)
+        self.stats['usuarios_unicos'] = len(self._usuarios_vistos)
+        self._report_progress(len(usuarios_df))
+
+        # Procesar módulos únicos
+        modulos_df = df[['titulo_modulo']].drop_duplicates()
+        self._titulos_vistos.update(modulos_df['titulo_modulo'].dropna())
+        self.stats['modulos_unicos'] = len(self._titulos_vistos)
+
+        self._start_phase('modulos', total=len(modulos_df))
+        modulos_validos = set()
+        for _, modulo in modulos_df.iterrows():
+            if pd.notna(modulo['titulo_modulo']):
+                module_id = self.process_module(titulo=modulo['titulo_modulo'])
+                if module_id > 0:
+                    modulos_validos.add(module_id)
+
+        # Procesar inscripciones (progreso de módulos)
+        print(f"\nProcesando {len(df)} inscripciones...")
+        self._start_phase('inscripciones', total=len(df))
+        if self.bulk_mode:
+            self.bulk_upsert_inscriptions(df, modulos_validos)
+        else:
+            for posicion, (_, row) in enumerate(df.iterrows(), start=1):
                 if pd.notna(row['id_usuario']) and pd.notna(row['titulo_modulo']):
                     self.process_inscription(row)
-                    if (idx + 1) % 100 == 0:
-                        print(f"  Procesadas {idx + 1}/{len(df)} inscripciones...")
+                if posicion % 100 == 0:
+                    print(f"  Procesadas {posicion}/{len(df)} inscripciones...")
+                    self._report_progress(posicion)
 
-            self.conn.commit()
-            print(f"✓ Procesamiento completado exitosamente!")
+    def insert_users(self, usuarios: List[Tuple[str, str]]) -> None:
+        """
+        Inserta en un solo executemany todos los usuarios nuevos (user_id, nombre)
+        Si el lote falla se reintenta usuario por usuario para aislar el error
+        """
+        if not usuarios:
+            return
 
+        registros = [(user_id, nombre, f"{user_id}@hutchison.mx") for user_id, nombre in usuarios]
+
+        try:
+            with self.backend.fast_executemany(self.cursor):
+                self.cursor.executemany(statements.sql('user_insert_transcript', self.backend), registros)
         except Exception as e:
-            self.conn.rollback()
-            self.stats['errores'].append(str(e))
-            print(f"✗ Error durante el procesamiento: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            raise e
+            print(f"ADVERTENCIA: Falló la inserción en lote de usuarios ({str(e)}), reintentando uno por uno")
+            for user_id, nombre in usuarios:
+                self.process_user(user_id, nombre)
+            return
 
-        return self.stats
+        self._usuarios_existentes.update(user_id for user_id, _ in usuarios)
+        self.stats['usuarios_nuevos'] += len(usuarios)
+        print(f"  ✓ {len(usuarios)} usuarios nuevos insertados")
 
     def process_user(self, user_id: str, nombre: str) -> bool:
         """
@@ -360,31 +1354,34 @@ class TranscriptProcessor:
         Tabla: Instituto_Usuario
         """
         try:
+            if self._usuarios_existentes is not None and user_id in self._usuarios_existentes:
+                return False
+
             # Verificar si el usuario existe
-            self.cursor.execute("SELECT UserId FROM Instituto_Usuario WHERE UserId = ?", (user_id,))
+            self.cursor.execute(statements.sql('user_exists', self.backend), (user_id,))
 
             if not self.cursor.fetchone():
                 # Extraer información adicional del nombre si es posible
                 email = f"{user_id}@hutchison.mx"  # Email por defecto
 
                 # Insertar nuevo usuario
-                self.cursor.execute("""
-                    INSERT INTO Instituto_Usuario (UserId, Nombre, Email, TipoDeCorreo)
-                    VALUES (?, ?, ?, 'Corporativo')
-                """, (user_id, nombre, email))
+                self.cursor.execute(statements.sql('user_insert_transcript', self.backend),
+                                    (user_id, nombre, email))
 
                 self.stats['usuarios_nuevos'] += 1
+                if self._usuarios_existentes is not None:
+                    self._usuarios_existentes.add(user_id)
                 return True
 
         except Exception as e:
-            self.stats['errores'].append(f"Error procesando usuario {user_id}: {str(e)}")
+            self.errors.add('USUARIO_FALLIDO', f"Error procesando usuario {user_id}: {str(e)}")
 
         return False
 
     def process_module(self, titulo: str) -> int:
         """
         Procesa un módulo y retorna su ID
-        CRÍTICO: Extrae el ID del módulo usando mapeo de 14 módulos exactos
+        CRÍTICO: Extrae el ID del módulo con el catálogo de módulos (ModuleIndex)
         Tabla: Instituto_Modulo
         """
         try:
@@ -392,33 +1389,35 @@ class TranscriptProcessor:
             module_id, nombre_corto = self.extract_module_info(titulo)
 
             if module_id is None:
-                self.stats['errores'].append(f"No se pudo extraer IdModulo de: {titulo}")
+                self.errors.add('MODULO_NO_RECONOCIDO', f"No se pudo extraer IdModulo de: {titulo}")
                 return -1
 
             # Verificar si el módulo ya existe por su número
-            self.cursor.execute("SELECT IdModulo FROM Instituto_Modulo WHERE IdModulo = ?", (module_id,))
-            result = self.cursor.fetchone()
-
-            if result:
-                return result[0]
+            if self._module_exists(module_id):
+                return module_id
 
             # Insertar nuevo módulo con IdModulo específico y nombre corto
-            self.cursor.execute("""
-                SET IDENTITY_INSERT Instituto_Modulo ON;
-                INSERT INTO Instituto_Modulo (IdModulo, NombreModulo, FechaDeAsignacion, Activo)
-                VALUES (?, ?, GETDATE(), 1);
-                SET IDENTITY_INSERT Instituto_Modulo OFF;
-            """, (module_id, nombre_corto))
-
-            self.conn.commit()
+            self.backend.insert_module(self.cursor, module_id, nombre_corto)
+
+            # Sin commit propio: el módulo se confirma (o revierte) con el resto de la carga
+            if self._modulos_existentes is not None:
+                self._modulos_existentes[module_id] = nombre_corto
             self.stats['modulos_nuevos'] += 1
             print(f"  ✓ Módulo {module_id} creado: {nombre_corto}")
             return module_id
 
         except Exception as e:
-            self.stats['errores'].append(f"Error procesando módulo {titulo}: {str(e)}")
+            self.errors.add('MODULO_FALLIDO', f"Error procesando módulo {titulo}: {str(e)}")
             return -1
 
+    def _module_exists(self, module_id: int) -> bool:
+        """Existencia del módulo: desde el catálogo en memoria si está cargado"""
+        if self._modulos_existentes is not None:
+            return module_id in self._modulos_existentes
+
+        self.cursor.execute(statements.sql('module_exists', self.backend), (module_id,))
+        return self.cursor.fetchone() is not None
+
     def process_inscription(self, row: pd.Series) -> bool:
         """
         Procesa una inscripción (progreso de módulo)
@@ -434,64 +1433,144 @@ class TranscriptProcessor:
             user_id = str(row['id_usuario'])
             titulo_modulo = row['titulo_modulo']
 
-            # Extraer el número del módulo del título usando mapeo de 14 módulos
-            module_id, _ = self.extract_module_info(titulo_modulo)
+            if 'IdModulo' in row:
+                # Fila ya pasada por normalize_dataframe
+                module_id = None if pd.isna(row['IdModulo']) else int(row['IdModulo'])
+                estado = row['estado_normalizado']
+                fecha_inicio = row['fecha_inicio_iso']
+                fecha_fin = row['fecha_fin_iso']
+            else:
+                # Extraer el número del módulo del título con el catálogo de módulos
+                module_id, _ = self.extract_module_info(titulo_modulo)
 
-            if module_id is None:
-                self.stats['errores'].append(f"No se pudo extraer IdModulo de: {titulo_modulo}")
-                return False
+                # Normalizar estado
+                estado = self.normalize_status(row.get('estado'))
 
-            # Normalizar estado
-            estado = self.normalize_status(row.get('estado'))
+                # Convertir fechas
+                fecha_inicio = self.convert_excel_date(row.get('fecha_inicio'))
+                fecha_fin = self.convert_excel_date(row.get('fecha_fin'))
 
-            # Convertir fechas
-            fecha_inicio = self.convert_excel_date(row.get('fecha_inicio'))
-            fecha_fin = self.convert_excel_date(row.get('fecha_fin'))
+            if module_id is None:
+                self.errors.add('MODULO_NO_RECONOCIDO', f"No se pudo extraer IdModulo de: {titulo_modulo}", row)
+                return False
 
             # Asegurar que el módulo existe
-            self.cursor.execute("SELECT IdModulo FROM Instituto_Modulo WHERE IdModulo = ?", (module_id,))
-            if not self.cursor.fetchone():
+            if not self._module_exists(module_id):
                 # Crear el módulo si no existe
                 module_id = self.process_module(titulo_modulo)
                 if module_id <= 0:
                     return False
 
             # UPSERT: Verificar si ya existe la inscripción (UserId + IdModulo)
-            self.cursor.execute("""
-                SELECT IdInscripcion FROM Instituto_ProgresoModulo
-                WHERE UserId = ? AND IdModulo = ?
-            """, (user_id, module_id))
+            self.cursor.execute(statements.sql('progress_id', self.backend), (user_id, module_id))
 
             existing = self.cursor.fetchone()
 
             if existing:
                 # Actualizar inscripción existente
-                self.cursor.execute("""
-                    UPDATE Instituto_ProgresoModulo
-                    SET EstatusModuloUsuario = ?,
-                        FechaInicio = ?,
-                        FechaFinalizacion = ?,
-                        FechaUltimaActualizacion = GETDATE()
-                    WHERE UserId = ? AND IdModulo = ?
-                """, (estado, fecha_inicio, fecha_fin, user_id, module_id))
+                self.cursor.execute(statements.sql('progress_update_transcript', self.backend),
+                                    (estado, fecha_inicio, fecha_fin, user_id, module_id))
+                self.stats['inscripciones_modificadas'] += 1
             else:
                 # Insertar nueva inscripción
-                self.cursor.execute("""
-                    INSERT INTO Instituto_ProgresoModulo
-                    (UserId, IdModulo, EstatusModuloUsuario, FechaInicio, FechaFinalizacion)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (user_id, module_id, estado, fecha_inicio, fecha_fin))
+                self.cursor.execute(statements.sql('progress_insert', self.backend),
+                                    (user_id, module_id, estado, fecha_inicio, fecha_fin))
+                self.stats['inscripciones_nuevas'] += 1
 
             self.stats['inscripciones_actualizadas'] += 1
             return True
 
         except Exception as e:
-            self.stats['errores'].append(f"Error procesando inscripción: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.errors.add('INSCRIPCION_FALLIDA',
+                            f"Error procesando inscripción de {row.get('id_usuario')}: {str(e)}", row)
 
         return False
 
+    def bulk_upsert_inscriptions(self, df: pd.DataFrame, modulos_validos: set) -> None:
+        """
+        Aplica todas las inscripciones con una sola operación set-based
+        1. Toma las columnas ya normalizadas por normalize_dataframe
+        2. Los carga en una tabla staging por lotes (backend.upsert_progress)
+        3. Un único MERGE / UPSERT sobre Instituto_ProgresoModulo keyed en (UserId, IdModulo)
+        """
+        staging = self._staging_frame(df, modulos_validos)
+
+        # Delta: descartar inscripciones idénticas a la última carga aplicada
+        if self.manifest is not None:
+            staging, sin_cambios = self.manifest.split_unchanged(staging)
+            self.stats['inscripciones_sin_cambios'] += sin_cambios
+            if sin_cambios:
+                print(f"  Delta: {sin_cambios} inscripciones sin cambios, {len(staging)} por escribir")
+
+        if staging.empty:
+            return
+
+        valores = list(zip(
+            staging['UserId'], staging['IdModulo'].astype(int).tolist(), staging['EstatusModuloUsuario'],
+            staging['FechaInicio'], staging['FechaFinalizacion']
+        ))
+        self._start_phase('inscripciones', total=len(valores), detalle='staging')
+
+        def lote_cargado(filas: int) -> None:
+            print(f"  Staging: {filas}/{len(valores)} inscripciones...")
+            self._report_progress(filas)
+            if filas == len(valores):
+                self._start_phase('inscripciones', total=len(valores), detalle='MERGE')
+
+        insertadas, modificadas = self.backend.upsert_progress(
+            self.cursor, valores, INGESTION_CONFIG['staging_batch_size'], on_batch=lote_cargado)
+        self._report_progress(len(valores))
+
+        if self.manifest is not None:
+            self.manifest.stage(staging)
+
+        self.stats['inscripciones_nuevas'] += insertadas
+        self.stats['inscripciones_modificadas'] += modificadas
+        self.stats['inscripciones_actualizadas'] += insertadas + modificadas
+
+    def _staging_frame(self, df: pd.DataFrame, modulos_validos: set) -> pd.DataFrame:
+        """
+        Inscripciones a aplicar, con las columnas y tipos de Instituto_ProgresoModulo
+        Descarta (y registra en errores) las filas sin IdModulo o con fechas no
+        reconocidas; una fila por (UserId, IdModulo).
+        """
+        df = df[df['id_usuario'].notna() & df['titulo_modulo'].notna()]
+
+        sin_modulo = df['IdModulo'].isna()
+        self.errors.add_rows('MODULO_NO_RECONOCIDO', df.loc[sin_modulo],
+                             "No se pudo extraer IdModulo de: " + df.loc[sin_modulo, 'titulo_modulo'].astype(str))
+        df = df[~sin_modulo & df['IdModulo'].isin(modulos_validos)]
+
+        fecha_inicio, inicio_invalida = self._to_sql_dates(df['fecha_inicio_iso'])
+        fecha_fin, fin_invalida = self._to_sql_dates(df['fecha_fin_iso'])
+        invalidas = inicio_invalida | fin_invalida
+        fecha_erronea = df['fecha_inicio_iso'].where(inicio_invalida, df['fecha_fin_iso'])
+        self.errors.add_rows('FECHA_NO_RECONOCIDA', df.loc[invalidas],
+                             "Error procesando inscripción de " + df.loc[invalidas, 'id_usuario'].astype(str) +
+                             ": Fecha no reconocida: '" + fecha_erronea[invalidas].astype(str) + "'")
+
+        staging = pd.DataFrame({
+            'UserId': df['id_usuario'].astype(str),
+            'IdModulo': df['IdModulo'],
+            'EstatusModuloUsuario': df['estado_normalizado'],
+            'FechaInicio': fecha_inicio,
+            'FechaFinalizacion': fecha_fin
+        })[~invalidas]
+
+        # Misma semántica que el UPSERT fila por fila: la última fila gana
+        return staging.drop_duplicates(subset=['UserId', 'IdModulo'], keep='last')
+
+    @staticmethod
+    def _to_sql_dates(fechas_iso: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """
+        Convierte una columna de fechas ISO (YYYY-MM-DD) en objetos date para
+        fast_executemany. Retorna (fechas, máscara de fechas no reconocidas).
+        """
+        parsed = pd.to_datetime(fechas_iso, format='%Y-%m-%d', errors='coerce')
+        invalidas = fechas_iso.notna() & parsed.isna()
+        fechas = pd.Series(np.where(parsed.notna(), parsed.dt.date, None), index=fechas_iso.index)
+        return fechas, invalidas
+
     def get_summary_stats(self) -> Dict:
         """
         Obtiene estadísticas generales de la base de datos
@@ -500,122 +1579,87 @@ class TranscriptProcessor:
         stats = {}
 
         # Total de usuarios
-        self.cursor.execute("SELECT COUNT(*) FROM Instituto_Usuario")
+        self.cursor.execute(statements.sql('count_users', self.backend))
         stats['total_usuarios'] = self.cursor.fetchone()[0]
 
         # Total de módulos
-        self.cursor.execute("SELECT COUNT(*) FROM Instituto_Modulo")
+        self.cursor.execute(statements.sql('count_modules', self.backend))
         stats['total_modulos'] = self.cursor.fetchone()[0]
 
         # Estados de progreso
-        self.cursor.execute("""
-            SELECT EstatusModuloUsuario, COUNT(*)
-            FROM Instituto_ProgresoModulo
-            GROUP BY EstatusModuloUsuario
-        """)
+        self.cursor.execute(statements.sql('module_status_counts', self.backend))
         stats['estados'] = dict(self.cursor.fetchall())
 
         # Usuarios por unidad de negocio
-        self.cursor.execute("""
-            SELECT un.NombreUnidad, COUNT(u.UserId)
-            FROM Instituto_UnidadDeNegocio un
-            LEFT JOIN Instituto_Usuario u ON un.IdUnidadDeNegocio = u.IdUnidadDeNegocio
-            GROUP BY un.IdUnidadDeNegocio, un.NombreUnidad
-        """)
+        self.cursor.execute(statements.sql('users_by_unit_counts', self.backend))
         stats['usuarios_por_unidad'] = dict(self.cursor.fetchall())
 
         return stats
 
 
+def _load_normalized_file(file_path: str, module_index: Optional[ModuleIndex] = None
+                          ) -> Tuple[Optional[pd.DataFrame], Optional[str], Optional[Dict]]:
+    """
+    Lectura + filtro + normalización de un archivo, sin acceso a BD
+    Función de módulo para poder ejecutarse en un ProcessPoolExecutor
+    `module_index` es el catálogo de módulos del proceso principal (con la BD)
+    Retorna (DataFrame, None, perfiles) o (None, mensaje de error, perfiles); perfiles
+    son los cambios de HeaderProfileStore.changes() (None sin perfiles de plantilla),
+    que guarda el proceso principal: varios procesos escribiendo el JSON se pisarían
+    """
+    perfiles = None
+    try:
+        processor = TranscriptProcessor(None)
+        perfiles = processor.header_profiles
+        if perfiles is not None:
+            perfiles.autosave = False
+        if module_index is not None:
+            processor.module_index = module_index
+        df, error = processor.load_file(file_path), None
+    except Exception as e:
+        df, error = None, str(e)
+    return df, error, (perfiles.changes() if perfiles is not None else None)
+
+
 class ReportGenerator:
     """Generador de reportes y análisis"""
 
-    def __init__(self, db_connection: pyodbc.Connection):
+    def __init__(self, db_connection, backend: Optional[StorageBackend] = None):
         self.conn = db_connection
         self.cursor = db_connection.cursor()
+        self.backend = backend or get_backend()
+
+    def _sql(self, name: str) -> str:
+        """Sentencia del catálogo (statements.py) para el backend"""
+        return statements.sql(name, self.backend)
 
     def get_user_progress(self, user_id: str) -> pd.DataFrame:
         """
         Obtiene el progreso completo de un usuario
         Tablas: Instituto_ProgresoModulo, Instituto_Modulo
         """
-        query = """
-            SELECT
-                m.NombreModulo,
-                pm.EstatusModuloUsuario,
-                pm.CalificacionModuloUsuario,
-                pm.FechaInicio,
-                pm.FechaFinalizacion
-            FROM Instituto_ProgresoModulo pm
-            JOIN Instituto_Modulo m ON pm.IdModulo = m.IdModulo
-            WHERE pm.UserId = ?
-            ORDER BY pm.FechaInicio DESC
-        """
-
-        return pd.read_sql_query(query, self.conn, params=[user_id])
+        return pd.read_sql_query(self._sql('report_user_progress'), self.conn, params=[user_id])
 
     def get_module_stats(self) -> pd.DataFrame:
         """
         Obtiene estadísticas por módulo
         Tablas: Instituto_Modulo, Instituto_ProgresoModulo
         """
-        query = """
-            SELECT
-                m.NombreModulo,
-                COUNT(DISTINCT pm.UserId) as TotalUsuarios,
-                SUM(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) as Completados,
-                SUM(CASE WHEN pm.EstatusModuloUsuario = 'En proceso' THEN 1 ELSE 0 END) as EnProceso,
-                SUM(CASE WHEN pm.EstatusModuloUsuario = 'Registrado' THEN 1 ELSE 0 END) as Registrados,
-                AVG(CASE WHEN pm.CalificacionModuloUsuario IS NOT NULL
-                    THEN pm.CalificacionModuloUsuario END) as PromedioCalificacion
-            FROM Instituto_Modulo m
-            LEFT JOIN Instituto_ProgresoModulo pm ON m.IdModulo = pm.IdModulo
-            GROUP BY m.IdModulo, m.NombreModulo
-            ORDER BY TotalUsuarios DESC
-        """
-
-        return pd.read_sql_query(query, self.conn)
+        return pd.read_sql_query(self._sql('report_module_stats'), self.conn)
 
     def get_business_unit_report(self, unit_id: int = None) -> pd.DataFrame:
         """
         Reporte por unidad de negocio
         Tablas: Instituto_UnidadDeNegocio, Instituto_Usuario, Instituto_ProgresoModulo
         """
-        query = """
-            SELECT
-                un.NombreUnidad,
-                COUNT(DISTINCT u.UserId) as TotalUsuarios,
-                COUNT(DISTINCT pm.IdModulo) as ModulosActivos,
-                SUM(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) as ModulosCompletados,
-                AVG(CASE WHEN pm.CalificacionModuloUsuario IS NOT NULL
-                    THEN pm.CalificacionModuloUsuario END) as PromedioGeneral
-            FROM Instituto_UnidadDeNegocio un
-            LEFT JOIN Instituto_Usuario u ON un.IdUnidadDeNegocio = u.IdUnidadDeNegocio
-            LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
-        """
-
         if unit_id:
-            query += " WHERE un.IdUnidadDeNegocio = ? GROUP BY un.IdUnidadDeNegocio, un.NombreUnidad"
-            return pd.read_sql_query(query, self.conn, params=[unit_id])
+            return pd.read_sql_query(self._sql('report_business_unit'), self.conn, params=[unit_id])
         else:
-            query += " GROUP BY un.IdUnidadDeNegocio, un.NombreUnidad"
-            return pd.read_sql_query(query, self.conn)
+            return pd.read_sql_query(self._sql('report_business_units'), self.conn)
 
     def get_completion_trends(self, days: int = 30) -> pd.DataFrame:
         """
         Obtiene tendencias de completación
         Tabla: Instituto_ProgresoModulo
         """
-        query = f"""
-            SELECT
-                CAST(FechaFinalizacion AS DATE) as Fecha,
-                COUNT(*) as ModulosCompletados,
-                COUNT(DISTINCT UserId) as UsuariosActivos
-            FROM Instituto_ProgresoModulo
-            WHERE EstatusModuloUsuario = 'Completado'
-                AND FechaFinalizacion >= DATEADD(day, -{days}, GETDATE())
-            GROUP BY CAST(FechaFinalizacion AS DATE)
-            ORDER BY Fecha
-        """
-
-        return pd.read_sql_query(query, self.conn)
+        return pd.read_sql_query(self._sql('report_completion_trends'), self.conn, params=[int(days)])
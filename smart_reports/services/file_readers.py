@@ -0,0 +1,180 @@
+"""
+Lectores de archivos Transcript Status con motores intercambiables
+Cada motor parsea el archivo completo desde la fila de headers y devuelve el
+mismo DataFrame que pd.read_excel / pd.read_csv. Los motores rápidos se usan
+solo si están instalados; si faltan o fallan se cae al motor por defecto.
+
+Motores por extensión (en orden de preferencia; 'auto' omite openpyxl_readonly):
+- .xlsx: calamine (python-calamine, pandas >= 2.2), openpyxl_readonly, openpyxl
+- .xls:  calamine, xlrd
+- .csv:  pyarrow, pandas
+"""
+
+import importlib.util
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+
+def _read_openpyxl(file_path: str, header_row: int) -> pd.DataFrame:
+    """Motor por defecto de pandas para .xlsx (carga el libro completo)"""
+    return pd.read_excel(file_path, skiprows=header_row, engine='openpyxl')
+
+
+def _read_openpyxl_readonly(file_path: str, header_row: int) -> pd.DataFrame:
+    """
+    openpyxl en modo read-only (streaming de celdas, sin estilos)
+    Reproduce la conversión de celdas de pandas para que el resultado sea idéntico
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        data = []
+        last_row_with_data = -1
+        for numero, row in enumerate(sheet.iter_rows(values_only=True)):
+            convertida = [_convert_cell(value) for value in row]
+            while convertida and convertida[-1] == '':
+                convertida.pop()
+            if convertida:
+                last_row_with_data = numero
+            data.append(convertida)
+    finally:
+        workbook.close()
+
+    data = data[:last_row_with_data + 1]
+    if data:
+        ancho = max(len(fila) for fila in data)
+        data = [fila + [''] * (ancho - len(fila)) for fila in data]
+
+    return TextParser(data[header_row:], header=0).read()
+
+
+def _convert_cell(value):
+    """Misma conversión que el lector openpyxl de pandas: vacía -> '', flotante entero -> int"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _read_calamine(file_path: str, header_row: int) -> pd.DataFrame:
+    """Lector en Rust (python-calamine) para .xlsx y .xls"""
+    return pd.read_excel(file_path, skiprows=header_row, engine='calamine')
+
+
+def _read_xlrd(file_path: str, header_row: int) -> pd.DataFrame:
+    """Motor por defecto de pandas para .xls"""
+    return pd.read_excel(file_path, skiprows=header_row)
+
+
+def _read_pyarrow_csv(file_path: str, header_row: int) -> pd.DataFrame:
+    """
+    Lector CSV multihilo de pyarrow
+    Se usa pyarrow.csv directamente: con engine='pyarrow', pandas no aplica
+    skiprows antes de validar el número de columnas de las filas previas.
+    """
+    from pyarrow import csv as pa_csv
+
+    tabla = pa_csv.read_csv(
+        file_path,
+        read_options=pa_csv.ReadOptions(skip_rows=header_row),
+        # Como pandas: celdas vacías -> nulo también en columnas de texto
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True)
+    )
+    return tabla.to_pandas()
+
+
+def _read_pandas_csv(file_path: str, header_row: int) -> pd.DataFrame:
+    """Motor C de pandas para .csv"""
+    return pd.read_csv(file_path, skiprows=header_row)
+
+
+READERS: Dict[str, Callable[[str, int], pd.DataFrame]] = {
+    'calamine': _read_calamine,
+    'openpyxl_readonly': _read_openpyxl_readonly,
+    'openpyxl': _read_openpyxl,
+    'xlrd': _read_xlrd,
+    'pyarrow': _read_pyarrow_csv,
+    'pandas': _read_pandas_csv,
+}
+
+# Motores por extensión, del más rápido al motor por defecto (siempre el último)
+ENGINES_BY_EXTENSION = {
+    '.xlsx': ['calamine', 'openpyxl_readonly', 'openpyxl'],
+    '.xls': ['calamine', 'xlrd'],
+    '.csv': ['pyarrow', 'pandas'],
+}
+
+# 'auto' omite openpyxl_readonly: pandas ya abre los .xlsx en modo read-only y la
+# velocidad es la misma; queda disponible para elegirlo explícitamente
+AUTO_EXCLUDED = {'openpyxl_readonly'}
+
+# Paquete que requiere cada motor
+_ENGINE_MODULES = {
+    'calamine': 'python_calamine',
+    'openpyxl_readonly': 'openpyxl',
+    'openpyxl': 'openpyxl',
+    'xlrd': 'xlrd',
+    'pyarrow': 'pyarrow',
+    'pandas': None,
+}
+
+
+def engine_available(engine: str) -> bool:
+    """True si el motor y su paquete están instalados"""
+    modulo = _ENGINE_MODULES[engine]
+    if modulo is not None and importlib.util.find_spec(modulo) is None:
+        return False
+    if engine == 'calamine':
+        # pandas soporta engine='calamine' desde la 2.2
+        version = tuple(int(parte) for parte in pd.__version__.split('.')[:2])
+        return version >= (2, 2)
+    return True
+
+
+def candidate_engines(file_path: str, engine: str = 'auto') -> List[str]:
+    """
+    Motores a intentar, en orden, para el archivo
+    'auto' = los de la extensión (salvo AUTO_EXCLUDED); un motor concreto se intenta
+    primero y, si no aplica a la extensión, se usa 'auto'. El motor por defecto va
+    siempre al final.
+    """
+    extension = '.' + file_path.rsplit('.', 1)[-1].lower()
+    if extension not in ENGINES_BY_EXTENSION:
+        raise ValueError(f"Formato no soportado: {file_path}")
+
+    if engine != 'auto' and engine not in READERS:
+        raise ValueError(f"Motor de lectura desconocido: {engine} (opciones: auto, {', '.join(READERS)})")
+
+    motores = ENGINES_BY_EXTENSION[extension]
+    if engine in motores:
+        motores = [engine, motores[-1]] if engine != motores[-1] else [engine]
+    else:
+        motores = [motor for motor in motores if motor not in AUTO_EXCLUDED]
+
+    # Sin ninguno instalado se intenta el motor por defecto (pandas informa qué paquete falta)
+    return [motor for motor in motores if engine_available(motor)] or motores[-1:]
+
+
+def read_table(file_path: str, header_row: int, engine: str = 'auto',
+               fallback: bool = True) -> Tuple[pd.DataFrame, str]:
+    """
+    Parsea el archivo completo desde `header_row` con el primer motor disponible
+    Si un motor falla se intenta el siguiente (fallback=False propaga el error).
+    Retorna (DataFrame, motor usado).
+    """
+    motores = candidate_engines(file_path, engine)
+    if not fallback:
+        motores = motores[:1]
+
+    for posicion, motor in enumerate(motores):
+        try:
+            return READERS[motor](file_path, header_row), motor
+        except Exception as e:
+            if posicion == len(motores) - 1:
+                raise
+            print(f"ADVERTENCIA: Motor de lectura '{motor}' falló ({e}), se usa '{motores[posicion + 1]}'")
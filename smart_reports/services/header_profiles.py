@@ -0,0 +1,168 @@
+"""
+Perfiles de plantilla para archivos Transcript Status
+Cada export del LMS tiene un formato fijo: mismas filas previas y mismos headers.
+La primera vez que se ve una plantilla se guarda su firma (hash de la fila de
+headers), la fila donde está y el mapeo de columnas resultante; los archivos
+siguientes con la misma firma omiten la búsqueda de headers y las reglas de
+COLUMN_MAPPINGS. Un cambio en la configuración de mapeo invalida los perfiles.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from smart_reports.config.settings import COLUMN_MAPPINGS, HEADER_KEYWORDS, PATHS
+
+
+def header_signature(row: Iterable) -> str:
+    """Firma de una fila de headers: celdas en minúsculas sin espacios sobrantes ni celdas vacías al final"""
+    celdas = ['' if valor is None else str(valor).strip().lower() for valor in row]
+    while celdas and celdas[-1] == '':
+        celdas.pop()
+    return hashlib.sha1('\x1f'.join(celdas).encode('utf-8')).hexdigest()
+
+
+def mappings_signature() -> str:
+    """Hash de HEADER_KEYWORDS + COLUMN_MAPPINGS (cambia si se edita la configuración)"""
+    configuracion = json.dumps([HEADER_KEYWORDS, COLUMN_MAPPINGS], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(configuracion.encode('utf-8')).hexdigest()[:12]
+
+
+class HeaderProfileStore:
+    """Perfiles de plantilla guardados en un JSON local, clave 'fila:firma'"""
+
+    def __init__(self, path: str = None, autosave: bool = True):
+        """
+        Args:
+            path: Archivo JSON de perfiles. Por defecto PATHS['cache']/header_profiles.json
+            autosave: False para no escribir el JSON (procesos de lectura en paralelo):
+                      los cambios se acumulan y el proceso principal los aplica con
+                      merge() y guarda una sola vez
+        """
+        self.path = path or os.path.join(PATHS['cache'], 'header_profiles.json')
+        self.autosave = autosave
+        self.mappings = mappings_signature()
+        self.profiles: Dict[str, Dict] = self._load()
+        # Cambios desde la lectura del JSON: perfiles aprendidos (None = descartado) y usos
+        self.learned: Dict[str, Optional[Dict]] = {}
+        self.uses: Dict[str, int] = {}
+        # Usos registrados en memoria que aún no están en el JSON (ver flush)
+        self._pending = False
+
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                perfiles = json.load(f)
+        except Exception as e:
+            # Archivo corrupto: se vuelven a aprender las plantillas
+            print(f"ADVERTENCIA: Perfiles de plantilla ilegibles, se descartan ({self.path}): {e}")
+            return {}
+
+        # Perfiles aprendidos con otra configuración de mapeo no son confiables
+        return {clave: perfil for clave, perfil in perfiles.items()
+                if perfil.get('mapeo_config') == self.mappings}
+
+    def header_rows(self) -> List[int]:
+        """Filas de headers conocidas (distintas), de la más usada a la menos usada"""
+        usos: Dict[int, int] = {}
+        for perfil in self.profiles.values():
+            fila = perfil['header_row']
+            usos[fila] = usos.get(fila, 0) + perfil.get('usos', 0)
+        return sorted(usos, key=usos.get, reverse=True)
+
+    def match(self, rows: List[tuple]) -> Optional[Dict]:
+        """
+        Perfil cuya fila de headers coincide con las primeras filas del archivo
+        Solo se calcula la firma en las filas donde hay plantillas conocidas.
+        Los usos se cuentan en memoria; se escriben con flush() al final de la carga.
+        """
+        for fila in self.header_rows():
+            if fila >= len(rows):
+                continue
+            clave = f"{fila}:{header_signature(rows[fila])}"
+            perfil = self.profiles.get(clave)
+            if perfil is not None:
+                perfil['usos'] = perfil.get('usos', 0) + 1
+                perfil['ultimo_uso'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                self.uses[clave] = self.uses.get(clave, 0) + 1
+                self._pending = True
+                return perfil
+        return None
+
+    def learn(self, header_row: int, header: Iterable, column_map: Dict[str, str]) -> Dict:
+        """Guarda (o reemplaza) el perfil de la plantilla con esa fila de headers"""
+        firma = header_signature(header)
+        ahora = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        perfil = {
+            'firma': firma,
+            'header_row': header_row,
+            'column_map': column_map,
+            'mapeo_config': self.mappings,
+            'creado': ahora,
+            'ultimo_uso': ahora,
+            'usos': 1,
+        }
+        clave = f"{header_row}:{firma}"
+        self.profiles[clave] = perfil
+        self.learned[clave] = perfil
+        self.uses.pop(clave, None)
+        self._autosave()
+        return perfil
+
+    def forget(self, perfil: Dict) -> None:
+        """Descarta un perfil que ya no coincide con el archivo (se vuelve a aprender)"""
+        clave = f"{perfil['header_row']}:{perfil['firma']}"
+        self.profiles.pop(clave, None)
+        self.learned[clave] = None
+        self.uses.pop(clave, None)
+        self._autosave()
+
+    def changes(self) -> Dict:
+        """Cambios acumulados desde la lectura (para merge() en otro proceso)"""
+        return {'aprendidos': dict(self.learned), 'usos': dict(self.uses)}
+
+    def merge(self, changes: Dict) -> None:
+        """
+        Aplica los cambios de otro almacén (changes()); no guarda, el llamador
+        llama flush() una vez tras aplicar los de todos los procesos.
+        Los perfiles aprendidos reemplazan a los guardados; los usos se suman.
+        """
+        for clave, perfil in changes['aprendidos'].items():
+            if perfil is None:
+                self.profiles.pop(clave, None)
+            else:
+                self.profiles[clave] = perfil
+            self.learned[clave] = perfil
+        for clave, usos in changes['usos'].items():
+            perfil = self.profiles.get(clave)
+            if perfil is not None and clave not in changes['aprendidos']:
+                perfil['usos'] = perfil.get('usos', 0) + usos
+                perfil['ultimo_uso'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                self.uses[clave] = self.uses.get(clave, 0) + usos
+        if changes['aprendidos'] or changes['usos']:
+            self._pending = True
+
+    def flush(self) -> None:
+        """Guarda los usos y cambios pendientes (una vez por carga; sin autosave no escribe)"""
+        if self._pending:
+            self._autosave()
+
+    def _autosave(self) -> None:
+        if self.autosave:
+            self.save()
+
+    def save(self) -> None:
+        """Escritura atómica del JSON; un error no detiene la carga"""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temporal = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(self.profiles, f, indent=2, ensure_ascii=False)
+            os.replace(temporal, self.path)
+            self._pending = False
+        except Exception as e:
+            print(f"ADVERTENCIA: No se pudieron guardar los perfiles de plantilla: {e}")
@@ -0,0 +1,81 @@
+"""
+Puntos de control (checkpoints) de cargas por lotes de Transcript Status
+Tras cada commit de lote se guarda, por hash del archivo, cuántas filas quedaron
+confirmadas. Si la carga se interrumpe (red, cancelación, cierre), volver a
+cargar el mismo archivo retoma desde ese punto. Reaplicar un lote es seguro: el
+upsert es por (UserId, IdModulo).
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+from smart_reports.config.settings import PATHS
+
+
+class IngestionCheckpoint:
+    """Un JSON por archivo en carga: <directorio>/<sha256>.json"""
+
+    def __init__(self, directory: str = None):
+        """
+        Args:
+            directory: Carpeta de checkpoints. Por defecto PATHS['cache']/checkpoints
+        """
+        self.directory = directory or os.path.join(PATHS['cache'], 'checkpoints')
+
+    def _path(self, sha256: str) -> str:
+        return os.path.join(self.directory, f"{sha256}.json")
+
+    def load(self, sha256: str, modo: str, version: str) -> Optional[Dict]:
+        """
+        Checkpoint del archivo, o None si no hay o no corresponde
+        `modo` ('csv' = filas crudas leídas, 'archivo' = filas normalizadas) y
+        `version` (lectura/normalización) deben coincidir: si cambian, las
+        posiciones guardadas no apuntan a las mismas filas.
+        """
+        path = self._path(sha256)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except Exception as e:
+            print(f"ADVERTENCIA: Checkpoint ilegible, se ignora ({path}): {e}")
+            return None
+
+        if checkpoint.get('modo') != modo or checkpoint.get('version') != version:
+            print("ADVERTENCIA: Checkpoint de otra versión o modo de carga, se procesa el archivo completo")
+            return None
+        return checkpoint
+
+    def save(self, sha256: str, archivo: str, modo: str, version: str,
+             filas_confirmadas: int, total: Optional[int] = None) -> None:
+        """Guarda (escritura atómica) la posición confirmada hasta ahora"""
+        checkpoint = {
+            'archivo': archivo,
+            'sha256': sha256,
+            'modo': modo,
+            'version': version,
+            'filas_confirmadas': filas_confirmadas,
+            'total': total,
+            'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(sha256)
+            temporal = f"{path}.{os.getpid()}.tmp"
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(checkpoint, f, indent=2, ensure_ascii=False)
+            os.replace(temporal, path)
+        except Exception as e:
+            # Sin checkpoint la carga sigue; solo no podrá reanudarse desde aquí
+            print(f"ADVERTENCIA: No se pudo guardar el checkpoint: {e}")
+
+    def clear(self, sha256: str) -> None:
+        """Borra el checkpoint (carga terminada)"""
+        try:
+            os.remove(self._path(sha256))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,136 @@
+"""
+Registro estructurado de errores de una carga de Transcript Status
+Cada error lleva un código (ERROR_CODES) y se cuenta por tipo; en memoria solo
+se guarda una muestra acotada y en consola se imprimen los primeros de cada
+tipo. Las filas rechazadas completas, con su motivo, se escriben en un CSV
+junto al archivo cargado (<archivo>_rechazados_<fecha>.csv).
+"""
+
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from smart_reports.config.settings import INGESTION_CONFIG, PATHS
+
+
+# Código -> descripción para el resumen
+ERROR_CODES = {
+    'ID_FALTANTE': 'Fila sin Identificación de usuario',
+    'MODULO_NO_RECONOCIDO': 'Título sin IdModulo reconocible',
+    'FECHA_NO_RECONOCIDA': 'Fecha no reconocida',
+    'FECHAS_INCONSISTENTES': 'Finalización anterior a la asignación',
+    'USUARIO_FALLIDO': 'Error al crear el usuario',
+    'MODULO_FALLIDO': 'Error al crear el módulo',
+    'INSCRIPCION_FALLIDA': 'Error al escribir la inscripción',
+    'ARCHIVO_ILEGIBLE': 'Archivo que no se pudo leer',
+    'CARGA_FALLIDA': 'Error que detuvo la carga',
+}
+
+# Columnas del CSV de rechazados (las del archivo, ya con nombre estándar)
+REJECTED_COLUMNS = ['fila_archivo', 'codigo', 'motivo', 'id_usuario', 'nombre_usuario',
+                    'titulo_modulo', 'estado', 'fecha_inicio', 'fecha_fin']
+
+# Errores de cada tipo que se imprimen en consola antes de resumir
+PRINTED_PER_CODE = 5
+
+
+class IngestionErrors:
+    """Colector de errores de una carga; mantiene al día las claves de errores en stats"""
+
+    def __init__(self, stats: Dict, upload_path: Optional[str] = None,
+                 max_sample: Optional[int] = None, write_rejected: Optional[bool] = None):
+        """
+        Args:
+            stats: Estadísticas de la carga. Se mantienen 'errores' (muestra de
+                   mensajes), 'errores_por_tipo', 'errores_total' y 'archivo_rechazados'.
+            upload_path: Archivo cargado; el CSV de rechazados se crea a su lado
+                         (solo si hay filas rechazadas). None = sin CSV.
+            max_sample: Mensajes guardados en stats['errores'].
+                        None usa INGESTION_CONFIG['error_sample_size'].
+            write_rejected: Escribir el CSV de rechazados.
+                            None usa INGESTION_CONFIG['rejected_rows_file'].
+        """
+        self.stats = stats
+        self.max_sample = INGESTION_CONFIG['error_sample_size'] if max_sample is None else max_sample
+        if write_rejected is None:
+            write_rejected = INGESTION_CONFIG['rejected_rows_file']
+        self.rejected_path = self._rejected_path(upload_path) if (upload_path and write_rejected) else None
+        # Fila de headers del archivo (0-based): convierte el índice del DataFrame en fila del archivo
+        self.header_row: Optional[int] = None
+
+        stats['errores'] = []
+        stats['errores_por_tipo'] = {}
+        stats['errores_total'] = 0
+        stats['archivo_rechazados'] = None
+
+    @staticmethod
+    def _rejected_path(upload_path: str) -> str:
+        base = os.path.splitext(upload_path)[0]
+        return f"{base}_rechazados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+
+    def add(self, codigo: str, mensaje: str, fila: Optional[pd.Series] = None) -> None:
+        """Registra un error; `fila` (si es una fila del archivo) va al CSV de rechazados"""
+        self._count(codigo, 1, [mensaje])
+        if fila is not None:
+            self._write_rejected(pd.DataFrame([fila.to_dict()], index=[fila.name]), codigo, [mensaje])
+
+    def add_rows(self, codigo: str, filas: pd.DataFrame, mensajes: Iterable[str]) -> None:
+        """Registra de una vez un error por cada fila de `filas` (ruta vectorizada)"""
+        if filas.empty:
+            return
+        mensajes = list(mensajes)
+        self._count(codigo, len(filas), mensajes)
+        self._write_rejected(filas, codigo, mensajes)
+
+    def _count(self, codigo: str, cantidad: int, mensajes: list) -> None:
+        por_tipo = self.stats['errores_por_tipo']
+        previos = por_tipo.get(codigo, 0)
+        por_tipo[codigo] = previos + cantidad
+        self.stats['errores_total'] += cantidad
+
+        libres = self.max_sample - len(self.stats['errores'])
+        if libres > 0:
+            self.stats['errores'].extend(f"[{codigo}] {mensaje}" for mensaje in mensajes[:libres])
+
+        # Consola: los primeros de cada tipo y un aviso al pasar el límite
+        for mensaje in mensajes[:max(PRINTED_PER_CODE - previos, 0)]:
+            print(f"ADVERTENCIA [{codigo}]: {mensaje}")
+        if previos < PRINTED_PER_CODE <= previos + cantidad - 1:
+            print(f"ADVERTENCIA [{codigo}]: más errores de este tipo se omiten en consola (ver resumen)")
+
+    def _write_rejected(self, filas: pd.DataFrame, codigo: str, mensajes: list) -> None:
+        """Agrega las filas al CSV de rechazados (sin mantenerlas en memoria)"""
+        if self.rejected_path is None:
+            return
+
+        rechazadas = filas.reindex(columns=REJECTED_COLUMNS)
+        rechazadas['codigo'] = codigo
+        rechazadas['motivo'] = mensajes
+        if self.header_row is not None and pd.api.types.is_integer_dtype(filas.index):
+            # Índice 0 = primera fila de datos; +2 por la fila de headers y el conteo desde 1
+            rechazadas['fila_archivo'] = filas.index + self.header_row + 2
+
+        try:
+            nuevo = not os.path.exists(self.rejected_path)
+            rechazadas.to_csv(self.rejected_path, mode='a', header=nuevo, index=False, encoding='utf-8')
+            self.stats['archivo_rechazados'] = self.rejected_path
+        except OSError as e:
+            # Carpeta de solo lectura (p. ej. unidad de red): se usa la carpeta de logs
+            alternativo = os.path.join(PATHS['logs'], os.path.basename(self.rejected_path))
+            if self.rejected_path == alternativo:
+                print(f"ADVERTENCIA: No se pudo escribir el archivo de rechazados: {e}")
+                self.rejected_path = None
+                return
+            print(f"ADVERTENCIA: No se pudo escribir junto al archivo ({e}); se usa {alternativo}")
+            os.makedirs(PATHS['logs'], exist_ok=True)
+            self.rejected_path = alternativo
+            self._write_rejected(filas, codigo, mensajes)
+
+
+def error_summary(stats: Dict) -> List[str]:
+    """Líneas de resumen de stats['errores_por_tipo'], de la más a la menos frecuente"""
+    por_tipo = stats.get('errores_por_tipo') or {}
+    return [f"{ERROR_CODES.get(codigo, codigo)} [{codigo}]: {cantidad:,}"
+            for codigo, cantidad in sorted(por_tipo.items(), key=lambda item: -item[1])]
@@ -0,0 +1,142 @@
+"""
+Manifiesto de ingesta incremental (delta) para archivos Transcript Status
+Guarda, por base de datos destino, la huella (hash) de la última versión
+aplicada de cada inscripción (UserId, IdModulo) y el historial de archivos
+procesados. Permite escribir en la BD solo las filas nuevas o modificadas.
+
+El manifiesto solo conoce lo que escribió la ingesta: los cambios hechos en la BD
+por otra vía (ediciones desde la UI, scripts, otra PC con su propio manifiesto)
+no lo actualizan, y una fila igual a la última cargada se seguiría omitiendo
+aunque en la BD ya sea distinta. Tras esos cambios, cargar con delta_mode=False
+(o IngestionManifest.clear()) para reescribir todas las filas.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from smart_reports.config.settings import PATHS
+from smart_reports.database.backends.base import StorageBackend, get_backend
+
+
+# Columnas que forman la huella de una inscripción normalizada
+FINGERPRINT_COLUMNS = ['UserId', 'IdModulo', 'EstatusModuloUsuario', 'FechaInicio', 'FechaFinalizacion']
+
+# Máximo de archivos que se conservan en el historial del manifiesto
+MAX_FILE_HISTORY = 200
+
+
+def file_sha256(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """Hash SHA-256 del contenido del archivo (lectura por bloques)"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def compute_fingerprints(df: pd.DataFrame) -> pd.Series:
+    """
+    Huella estable (uint64) por fila sobre FINGERPRINT_COLUMNS
+    Las columnas se pasan a texto para que la huella no dependa del dtype
+    """
+    valores = df[FINGERPRINT_COLUMNS].astype(str)
+    return pd.util.hash_pandas_object(valores, index=False)
+
+
+def manifest_path(backend: StorageBackend) -> str:
+    """Archivo del manifiesto de la BD destino de `backend` (uno por backend.identity())"""
+    destino = hashlib.sha256(backend.identity().encode('utf-8')).hexdigest()[:16]
+    return os.path.join(PATHS['cache'], f"manifest_{backend.name}_{destino}.pkl")
+
+
+class IngestionManifest:
+    """
+    Almacén local de huellas de inscripciones ya aplicadas
+    Solo refleja las escrituras de la ingesta (ver el docstring del módulo).
+    """
+
+    def __init__(self, path: str = None, backend: StorageBackend = None):
+        """
+        Args:
+            path: Archivo del manifiesto. Por defecto manifest_path(backend) en PATHS['cache']
+            backend: Motor de la BD destino. None usa el configurado en STORAGE_CONFIG.
+        """
+        if path is None:
+            path = manifest_path(backend or get_backend())
+
+        self.path = path
+        self.fingerprints = pd.DataFrame({
+            'UserId': pd.Series(dtype=object),
+            'IdModulo': pd.Series(dtype='int64'),
+            'fingerprint': pd.Series(dtype='uint64')
+        })
+        self.archivos: List[Dict] = []
+        self._pendientes: List[pd.DataFrame] = []
+
+        self.load()
+
+    def load(self) -> None:
+        """Carga el manifiesto desde disco si existe"""
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            data = pd.read_pickle(self.path)
+            self.fingerprints = data['fingerprints']
+            self.archivos = data['archivos']
+        except Exception as e:
+            # Un manifiesto corrupto solo obliga a una carga completa
+            print(f"ADVERTENCIA: Manifiesto ilegible, se ignora ({self.path}): {e}")
+
+    def split_unchanged(self, staging: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+        """
+        Separa las inscripciones sin cambios respecto a la última carga aplicada
+        Retorna (inscripciones nuevas o modificadas con su huella, cantidad sin cambios)
+        """
+        staging = staging.assign(fingerprint=compute_fingerprints(staging).to_numpy())
+
+        # Sin cambios = misma clave con la misma huella ya registrada
+        coincidencias = staging[['UserId', 'IdModulo', 'fingerprint']].merge(
+            self.fingerprints, on=['UserId', 'IdModulo', 'fingerprint'], how='left', indicator=True)
+        sin_cambios = (coincidencias['_merge'] == 'both').to_numpy()
+
+        return staging[~sin_cambios], int(sin_cambios.sum())
+
+    def stage(self, aplicadas: pd.DataFrame) -> None:
+        """Registra huellas enviadas a la BD; se guardan solo tras el commit (ver commit())"""
+        self._pendientes.append(aplicadas[['UserId', 'IdModulo', 'fingerprint']])
+
+    def discard(self) -> None:
+        """Descarta las huellas pendientes (rollback)"""
+        self._pendientes = []
+
+    def commit(self, archivo: Dict = None) -> None:
+        """Incorpora las huellas pendientes y guarda el manifiesto en disco"""
+        if self._pendientes:
+            self.fingerprints = pd.concat([self.fingerprints] + self._pendientes, ignore_index=True) \
+                .drop_duplicates(subset=['UserId', 'IdModulo'], keep='last') \
+                .reset_index(drop=True)
+            self._pendientes = []
+
+        if archivo:
+            self.archivos.append(dict(archivo, fecha=datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+            self.archivos = self.archivos[-MAX_FILE_HISTORY:]
+
+        self.save()
+
+    def save(self) -> None:
+        """Escritura atómica: archivo temporal + reemplazo"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temporal = self.path + '.tmp'
+        pd.to_pickle({'fingerprints': self.fingerprints, 'archivos': self.archivos}, temporal)
+        os.replace(temporal, self.path)
+
+    def clear(self) -> None:
+        """Olvida todas las huellas: la próxima carga escribirá todas las filas"""
+        self.fingerprints = self.fingerprints.iloc[0:0]
+        self._pendientes = []
+        self.save()
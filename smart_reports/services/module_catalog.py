@@ -0,0 +1,129 @@
+"""
+Índice de resolución título de capacitación -> IdModulo
+Se construye una vez por carga a partir de MODULE_CATALOG / MODULE_ALIASES
+(settings), de Instituto_Modulo (IdModulo y nombre corto) y, si existe, de la
+tabla de alias Instituto_ModuloAlias (IdModulo INT, Alias NVARCHAR) con los
+títulos completos. Orden de resolución:
+1. Título exacto (hash)
+2. Título normalizado: sin acentos, mayúsculas, espacios colapsados
+3. Prefijo "MÓDULO N." con N en el catálogo o en Instituto_Modulo
+4. Coincidencia aproximada (difflib) contra los títulos normalizados
+Cada título distinto se resuelve una sola vez (memo): repetirlo cuesta O(1).
+"""
+
+import difflib
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from smart_reports.config.settings import INGESTION_CONFIG, MODULE_ALIASES, MODULE_CATALOG
+
+# "MODULO N." sobre el título ya normalizado (sin acento)
+MODULE_NUMBER_PATTERN = re.compile(r'MODULO\s+(\d+)\.')
+
+
+def normalize_title(titulo) -> str:
+    """Título comparable: sin acentos, en mayúsculas y con espacios simples"""
+    texto = unicodedata.normalize('NFKD', str(titulo))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.upper().split())
+
+
+class ModuleIndex:
+    """Catálogo de módulos precompilado para resolver títulos"""
+
+    def __init__(self, titles: Iterable[Tuple[str, int]], names: Dict[int, str],
+                 fuzzy_cutoff: Optional[float] = None):
+        """
+        Args:
+            titles: Pares (título o alias, IdModulo)
+            names: IdModulo -> nombre corto (para crear el módulo en la BD)
+            fuzzy_cutoff: Similitud mínima de la coincidencia aproximada.
+                          None usa INGESTION_CONFIG['module_fuzzy_cutoff'].
+        """
+        self.names = dict(names)
+        self.fuzzy_cutoff = INGESTION_CONFIG['module_fuzzy_cutoff'] if fuzzy_cutoff is None else fuzzy_cutoff
+
+        self._exact: Dict[str, int] = {}
+        self._normalized: Dict[str, int] = {}
+        for titulo, module_id in titles:
+            self._exact.setdefault(str(titulo).strip(), module_id)
+            self._normalized.setdefault(normalize_title(titulo), module_id)
+            self.names.setdefault(module_id, f'Módulo {module_id}')
+        self._candidates = list(self._normalized)
+        self._memo: Dict[str, Optional[int]] = {}
+
+        contenido = json.dumps([sorted(self._normalized.items()), self.fuzzy_cutoff], ensure_ascii=False)
+        # Cambia si cambia el catálogo: invalida cachés de archivos normalizados
+        self.signature = hashlib.sha1(contenido.encode('utf-8')).hexdigest()[:12]
+
+    @classmethod
+    def build(cls, db_modules: Optional[Dict[int, str]] = None,
+              db_aliases: Iterable[Tuple[int, str]] = ()) -> 'ModuleIndex':
+        """
+        Índice de settings + BD
+        Args:
+            db_modules: IdModulo -> NombreModulo de Instituto_Modulo
+            db_aliases: Pares (IdModulo, Alias) de Instituto_ModuloAlias (títulos)
+        """
+        titles = [(titulo, module_id) for module_id, (titulo, _) in MODULE_CATALOG.items()]
+        titles += [(alias, module_id) for alias, module_id in MODULE_ALIASES.items()]
+        names = {module_id: nombre for module_id, (_, nombre) in MODULE_CATALOG.items()}
+
+        # Instituto_Modulo guarda el nombre corto: aporta IdModulo válidos y nombres,
+        # no títulos (un curso "Operaciones" no es el módulo 3). Los títulos de
+        # módulos nuevos o renombrados van en Instituto_ModuloAlias.
+        for module_id, nombre in (db_modules or {}).items():
+            names[module_id] = nombre or names.get(module_id) or f'Módulo {module_id}'
+        titles += [(alias, module_id) for module_id, alias in db_aliases if alias]
+
+        return cls(titles, names)
+
+    @property
+    def module_ids(self) -> set:
+        return set(self.names)
+
+    def resolve(self, titulo) -> Optional[int]:
+        """IdModulo del título, o None si no corresponde a ningún módulo"""
+        if titulo is None or (not isinstance(titulo, str) and pd.isna(titulo)):
+            return None
+
+        texto = str(titulo).strip()
+        module_id = self._exact.get(texto)
+        if module_id is not None:
+            return module_id
+
+        if texto not in self._memo:
+            self._memo[texto] = self._resolve_slow(texto)
+        return self._memo[texto]
+
+    def _resolve_slow(self, texto: str) -> Optional[int]:
+        clave = normalize_title(texto)
+        module_id = self._normalized.get(clave)
+        if module_id is not None:
+            return module_id
+
+        # "MÓDULO N." explícito: válido solo si N está en el catálogo. Un número
+        # desconocido no se aproxima a otro módulo parecido (MÓDULO 15 != MÓDULO 5).
+        match = MODULE_NUMBER_PATTERN.search(clave)
+        if match:
+            numero = int(match.group(1))
+            return numero if numero in self.names else None
+
+        parecidos = difflib.get_close_matches(clave, self._candidates, n=1, cutoff=self.fuzzy_cutoff)
+        return self._normalized[parecidos[0]] if parecidos else None
+
+    def resolve_ids(self, titulos: pd.Series) -> pd.Series:
+        """Versión columnar de resolve (object: IdModulo o None)"""
+        return titulos.map(self.resolve).astype(object)
+
+    def info(self, titulo) -> Tuple[Optional[int], Optional[str]]:
+        """(IdModulo, nombre corto) del título, o (None, None)"""
+        module_id = self.resolve(titulo)
+        if module_id is None:
+            return (None, None)
+        return (module_id, self.names[module_id])
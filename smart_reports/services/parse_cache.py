@@ -0,0 +1,121 @@
+"""
+Caché local de archivos Transcript Status ya parseados y normalizados
+Guarda el DataFrame resultante de TranscriptProcessor.load_file con clave
+hash del contenido + versión del procesador, de modo que volver a cargar el
+mismo archivo no requiere re-parsear el Excel. Formato columnar (Parquet) si
+pyarrow está instalado; si no, pickle. Tamaño acotado con desalojo LRU.
+"""
+
+import os
+from typing import List, Optional
+
+import pandas as pd
+
+from smart_reports.config.settings import INGESTION_CONFIG, PATHS
+
+try:
+    import pyarrow  # noqa: F401  (motor de pandas.to_parquet)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+class ParseCache:
+    """Directorio de DataFrames parseados, uno por archivo por clave"""
+
+    FORMATS = ('.parquet', '.pkl')
+
+    def __init__(self, directory: str = None, max_bytes: int = None):
+        """
+        Args:
+            directory: Carpeta de la caché. Por defecto PATHS['cache']/parsed
+            max_bytes: Tamaño máximo total. Por defecto INGESTION_CONFIG['parse_cache_max_mb']
+        """
+        self.directory = directory or os.path.join(PATHS['cache'], 'parsed')
+        if max_bytes is None:
+            max_bytes = INGESTION_CONFIG['parse_cache_max_mb'] * 1024 * 1024
+        self.max_bytes = max_bytes
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """DataFrame guardado para la clave, o None si no existe o es ilegible"""
+        for extension in self.FORMATS:
+            path = os.path.join(self.directory, key + extension)
+            if not os.path.exists(path):
+                continue
+
+            try:
+                if extension == '.parquet':
+                    df = pd.read_parquet(path)
+                else:
+                    df = pd.read_pickle(path)
+            except Exception as e:
+                # Entrada corrupta o formato no soportado: se descarta y se re-parsea
+                print(f"ADVERTENCIA: Caché ilegible, se descarta ({path}): {e}")
+                self._remove(path)
+                return None
+
+            # LRU: la fecha de modificación marca el último uso
+            os.utime(path, None)
+            return df
+
+        return None
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        """Guarda el DataFrame (escritura atómica) y aplica el límite de tamaño"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = None
+            if HAS_PYARROW:
+                try:
+                    path = self._write(key, '.parquet', lambda temporal: df.to_parquet(temporal, index=True))
+                except Exception:
+                    # Columnas object con tipos mezclados (p. ej. fechas seriales y texto)
+                    path = None
+            if path is None:
+                self._write(key, '.pkl', lambda temporal: df.to_pickle(temporal))
+            self.evict()
+        except Exception as e:
+            # La caché es opcional: un error al guardar no detiene la carga
+            print(f"ADVERTENCIA: No se pudo guardar en caché: {e}")
+
+    def _write(self, key: str, extension: str, writer) -> str:
+        path = os.path.join(self.directory, key + extension)
+        temporal = f"{path}.{os.getpid()}.tmp"
+        try:
+            writer(temporal)
+            os.replace(temporal, path)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+        return path
+
+    def entries(self) -> List[os.DirEntry]:
+        """Entradas de la caché, de la menos a la más recientemente usada"""
+        if not os.path.isdir(self.directory):
+            return []
+        with os.scandir(self.directory) as it:
+            entradas = [e for e in it if e.is_file() and e.name.endswith(self.FORMATS)]
+        return sorted(entradas, key=lambda e: e.stat().st_mtime)
+
+    def evict(self) -> None:
+        """Borra las entradas menos usadas hasta quedar bajo max_bytes"""
+        entradas = self.entries()
+        total = sum(e.stat().st_size for e in entradas)
+        for entrada in entradas:
+            if total <= self.max_bytes:
+                break
+            total -= entrada.stat().st_size
+            self._remove(entrada.path)
+
+    def clear(self) -> None:
+        """Vacía la caché"""
+        for entrada in self.entries():
+            self._remove(entrada.path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Otro proceso (importación en paralelo) ya la borró
+            pass
@@ -0,0 +1,137 @@
+"""
+Carga de archivos Transcript Status en segundo plano
+Ejecuta el TranscriptProcessor en un hilo con su propia conexión a la BD y
+entrega avance, resultado o error al hilo de la interfaz mediante root.after
+(Tkinter no admite tocar widgets desde otro hilo). Sirve para ambas ventanas.
+"""
+import queue
+import threading
+import traceback
+from typing import Callable, Dict, Optional
+
+from smart_reports.services.data_processor import TranscriptProcessor, IngestionCancelled
+
+
+def format_progress(evento: Dict) -> str:
+    """Texto de avance: fase, filas, filas/s y tiempo restante estimado"""
+    texto = f"{evento['fase']}"
+    if evento.get('bloque'):
+        texto += f" [bloque {evento['bloque']}]"
+    if evento['total']:
+        texto += f" — {evento['filas']:,}/{evento['total']:,} filas"
+    elif evento['filas']:
+        texto += f" — {evento['filas']:,} filas"
+    if evento['filas_por_seg']:
+        texto += f" · {evento['filas_por_seg']:,.0f} filas/s"
+    if evento['eta_seg'] is not None:
+        minutos, segundos = divmod(int(evento['eta_seg']), 60)
+        texto += f" · ETA {minutos}:{segundos:02d}"
+    return texto
+
+
+def progress_percent(evento: Dict) -> float:
+    """Porcentaje (0-100) de la fase actual; 0 si no se conoce el total"""
+    if not evento['total']:
+        return 0.0
+    return min(100.0, 100.0 * evento['filas'] / evento['total'])
+
+
+class IngestionTask:
+    """Carga en un hilo de trabajo con avance, cancelación y resultado vía root.after"""
+
+    POLL_MS = 100
+
+    def __init__(self, root, db, job: Callable[[TranscriptProcessor], Dict],
+                 on_progress: Callable[[Dict], None],
+                 on_done: Callable[[Dict], None],
+                 on_error: Callable[[Exception, str], None],
+                 on_cancelled: Callable[[], None]):
+        """
+        Args:
+            root: Ventana Tk (para programar el sondeo con after)
+            db: DatabaseConnection; el hilo abre su propia conexión con create_connection()
+            job: Función que recibe el procesador y ejecuta la carga,
+                 p. ej. lambda processor: processor.process_file(ruta)
+            on_progress: Recibe cada evento de avance (en el hilo de la interfaz)
+            on_done: Recibe las estadísticas al terminar
+            on_error: Recibe la excepción y su traceback
+            on_cancelled: Se invoca cuando la cancelación revirtió la carga
+        """
+        self.root = root
+        self.db = db
+        self.job = job
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancelled = on_cancelled
+
+        self._eventos = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Inicia el hilo de trabajo y el sondeo de eventos"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.root.after(self.POLL_MS, self._poll)
+
+    def cancel(self) -> None:
+        """Pide la cancelación; surte efecto en el siguiente punto de control"""
+        self._cancel_event.set()
+
+    def _run(self) -> None:
+        """Hilo de trabajo: NO toca widgets, solo encola eventos"""
+        conn = None
+        try:
+            conn = self.db.create_connection()
+            processor = TranscriptProcessor(
+                conn,
+                progress_callback=lambda evento: self._eventos.put(('progreso', evento)),
+                cancel_event=self._cancel_event
+            )
+            stats = self.job(processor)
+            self._eventos.put(('fin', stats))
+        except IngestionCancelled:
+            self._eventos.put(('cancelado', None))
+        except Exception as e:
+            self._eventos.put(('error', (e, traceback.format_exc())))
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    def _poll(self) -> None:
+        """Hilo de la interfaz: despacha los eventos encolados"""
+        ultimo_avance = None
+        while True:
+            try:
+                tipo, dato = self._eventos.get_nowait()
+            except queue.Empty:
+                break
+
+            if tipo == 'progreso':
+                # Cambio de fase: se entrega siempre; dentro de la fase basta el último
+                if ultimo_avance is not None and ultimo_avance['fase'] != dato['fase']:
+                    self.on_progress(ultimo_avance)
+                ultimo_avance = dato
+                continue
+
+            if ultimo_avance is not None:
+                self.on_progress(ultimo_avance)
+            if tipo == 'fin':
+                self.on_done(dato)
+            elif tipo == 'cancelado':
+                self.on_cancelled()
+            else:
+                self.on_error(*dato)
+            return
+
+        if ultimo_avance is not None:
+            self.on_progress(ultimo_avance)
+        self.root.after(self.POLL_MS, self._poll)
@@ -12,8 +12,12 @@ import os
 
 from smart_reports.config.settings import APP_CONFIG, COLORS
 from smart_reports.database.connection import DatabaseConnection
+from smart_reports.database.query_cache import query_cache
 from smart_reports.ui.components import EditableTreeview, LoadingSpinner
-from smart_reports.services.data_processor import TranscriptProcessor
+from smart_reports.services.data_processor import TranscriptProcessor, INGESTION_PHASES
+from smart_reports.services.ingestion_errors import error_summary
+from smart_reports.ui.ingestion_task import IngestionTask, format_progress, progress_percent
+from smart_reports.ui.query_executor import QueryExecutor
 from smart_reports.services.pdf_generator import PDFReportGenerator
 
 
@@ -28,8 +32,7 @@ class MainWindow:
         # Base de datos
         self.db = DatabaseConnection()
         try:
-            self.conn = self.db.connect()
-            self.cursor = self.db.get_cursor()
+            self.db.connect()
             self.verify_database_tables()
         except Exception as e:
             messagebox.showerror("Error de Conexión",
@@ -38,6 +41,9 @@ class MainWindow:
         # Variables de tracking
         self.current_file = None
         self.changes_log = []
+        self.ingestion_task = None
+        # Consultas fuera del hilo de la interfaz
+        self.query_executor = QueryExecutor(self.root)
 
         # Crear interfaz
         self.create_widgets()
@@ -45,16 +51,11 @@ class MainWindow:
     def verify_database_tables(self):
         """Verificar que las tablas necesarias existan"""
         tables_needed = ['Instituto_UnidadDeNegocio', 'Instituto_Usuario', 'Instituto_Modulo', 'Instituto_ProgresoModulo']
-        placeholders = ','.join(['?' for _ in tables_needed])
 
         try:
-            self.cursor.execute(f"""
-                SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES
-                WHERE TABLE_TYPE = 'BASE TABLE'
-                AND TABLE_NAME IN ({placeholders})
-            """, tables_needed)
+            tablas = self.db.execute(self.db.backend.existing_tables_sql(len(tables_needed)), tables_needed)
 
-            existing_tables = [t[0] for t in self.cursor.fetchall()]
+            existing_tables = [t[0] for t in tablas]
 
             if len(existing_tables) < len(tables_needed):
                 missing = set(tables_needed) - set(existing_tables)
@@ -140,15 +141,43 @@ class MainWindow:
         update_frame = ttk.LabelFrame(main_frame, text="2. Actualizar Base de Datos", padding=20)
         update_frame.pack(padx=20, pady=10, fill=X)
 
-        ttk.Button(update_frame, text="🔄 Actualizar Base de Datos (Cruce de Datos)",
-                  command=self.update_database_from_file,
-                  bootstyle='success',
-                  width=40).pack(pady=5)
+        self.update_button = ttk.Button(update_frame, text="🔄 Actualizar Base de Datos (Cruce de Datos)",
+                                        command=self.update_database_from_file,
+                                        bootstyle='success',
+                                        width=40)
+        self.update_button.pack(pady=5)
+
+        self.preview_button = ttk.Button(update_frame, text="👁 Vista Previa de Cambios (sin guardar)",
+                                         command=self.preview_database_changes,
+                                         bootstyle='secondary',
+                                         width=40)
+        self.preview_button.pack(pady=5)
+
+        self.folder_button = ttk.Button(update_frame, text="📂 Importar Carpeta (varios archivos)",
+                                        command=self.import_transcript_folder,
+                                        bootstyle='info',
+                                        width=40)
+        self.folder_button.pack(pady=5)
 
         ttk.Label(update_frame, text="Este proceso actualizará usuarios, módulos y progreso en la BD",
                  font=('Arial', 9, 'italic'),
                  foreground='gray').pack()
 
+        # Avance de la carga en segundo plano
+        self.progress_bar = ttk.Progressbar(update_frame, mode='determinate', maximum=100,
+                                            bootstyle='success-striped')
+        self.progress_bar.pack(fill=X, pady=(10, 2))
+
+        self.progress_label = ttk.Label(update_frame, text="", font=('Arial', 9))
+        self.progress_label.pack()
+
+        self.cancel_button = ttk.Button(update_frame, text="⏹ Cancelar Carga",
+                                        command=self.cancel_ingestion,
+                                        bootstyle='danger',
+                                        width=40)
+        self.cancel_button.pack(pady=5)
+        self._set_ingestion_controls(self.ingestion_task is not None and self.ingestion_task.running)
+
         # Botones de acción adicionales
         actions_frame = ttk.Frame(main_frame)
         actions_frame.pack(pady=10)
@@ -197,23 +226,15 @@ class MainWindow:
                 f"Archivo cargado: {filename}\n\nAhora haz clic en 'Actualizar Base de Datos'")
 
     def update_database_from_file(self):
-        """Actualizar base de datos desde archivo cargado"""
+        """Actualizar base de datos desde archivo cargado (en segundo plano)"""
         if not self.current_file:
             messagebox.showwarning("Sin Archivo",
                 "Primero debes seleccionar un archivo Transcript Status")
             return
 
-        try:
-            self.log_movement("="*50)
-            self.log_movement("🔄 INICIANDO ACTUALIZACIÓN DE BASE DE DATOS")
-            self.log_movement("="*50)
-
-            # Crear procesador
-            processor = TranscriptProcessor(self.conn)
-
-            # Procesar archivo
-            stats = processor.process_file(self.current_file)
+        file_path = self.current_file
 
+        def on_done(stats):
             # Mostrar estadísticas detalladas en el panel
             self.show_processing_stats(stats)
 
@@ -228,12 +249,142 @@ class MainWindow:
             self.log_movement("✓ Actualización completada exitosamente")
             self.log_movement("="*50 + "\n")
 
-        except Exception as e:
-            error_msg = f"Error al actualizar base de datos: {str(e)}"
-            messagebox.showerror("Error", error_msg)
-            self.log_movement(f"✗ ERROR: {str(e)}")
-            import traceback
-            self.log_movement(traceback.format_exc())
+        self.start_ingestion("🔄 INICIANDO ACTUALIZACIÓN DE BASE DE DATOS",
+                             lambda processor: processor.process_file(file_path),
+                             on_done, "Error al actualizar base de datos")
+
+    def preview_database_changes(self):
+        """Comparar el archivo con la BD sin escribir nada (dry run, en segundo plano)"""
+        if not self.current_file:
+            messagebox.showwarning("Sin Archivo",
+                "Primero debes seleccionar un archivo Transcript Status")
+            return
+
+        file_path = self.current_file
+
+        def on_done(stats):
+            self.show_diff_summary(stats)
+            diferencias = stats['diferencias']
+            messagebox.showinfo("Vista Previa",
+                f"La base de datos NO fue modificada\n\n" +
+                f"Usuarios nuevos: {diferencias['usuarios_nuevos']:,}\n" +
+                f"Inscripciones nuevas: {diferencias['inscripciones_nuevas']:,}\n" +
+                f"Cambios de estado: {sum(diferencias['transiciones'].values()):,}\n" +
+                f"Sin cambios: {diferencias['sin_cambios']:,}")
+            self.log_movement("="*50 + "\n")
+
+        self.start_ingestion("👁 VISTA PREVIA DE CAMBIOS (SIN GUARDAR)",
+                             lambda processor: processor.process_file(file_path, dry_run=True),
+                             on_done, "Error en la vista previa")
+
+    def import_transcript_folder(self):
+        """Importar en una sola carga todos los archivos Transcript Status de una carpeta"""
+        folder = filedialog.askdirectory(title="Seleccionar carpeta con archivos Transcript Status")
+        if not folder:
+            return
+
+        def on_done(stats):
+            self.show_processing_stats(stats)
+
+            messagebox.showinfo("Importación Exitosa",
+                f"✓ Base de datos actualizada correctamente\n\n" +
+                f"Archivos: {len(stats['archivos'])}\n" +
+                f"Registros procesados: {stats['total_registros']:,}\n" +
+                f"Usuarios nuevos: {stats['usuarios_nuevos']}\n" +
+                f"Inscripciones actualizadas: {stats['inscripciones_actualizadas']}")
+
+            self.log_movement("✓ Importación completada exitosamente")
+            self.log_movement("="*50 + "\n")
+
+        # Lectura en paralelo + un solo escritor en BD
+        self.start_ingestion(f"📂 IMPORTACIÓN MÚLTIPLE: {folder}",
+                             lambda processor: processor.process_folder(folder),
+                             on_done, "Error al importar carpeta")
+
+    def start_ingestion(self, titulo, job, on_done, error_title):
+        """Lanza una carga en segundo plano; la interfaz sigue respondiendo"""
+        if self.ingestion_task is not None and self.ingestion_task.running:
+            messagebox.showwarning("Carga en Curso",
+                "Ya hay una carga en proceso. Espera a que termine o cancélala.")
+            return
+
+        self.log_movement("="*50)
+        self.log_movement(titulo)
+        self.log_movement("="*50)
+
+        def finished(stats):
+            self._set_ingestion_controls(False)
+            on_done(stats)
+
+        def failed(error, detalle):
+            self._set_ingestion_controls(False)
+            messagebox.showerror("Error", f"{error_title}: {str(error)}")
+            self.log_movement(f"✗ ERROR: {str(error)}")
+            self.log_movement(detalle)
+
+        self._fases_vistas = set()
+        self.ingestion_task = IngestionTask(self.root, self.db, job,
+                                            on_progress=self.on_ingestion_progress,
+                                            on_done=finished,
+                                            on_error=failed,
+                                            on_cancelled=self.on_ingestion_cancelled)
+        self._set_ingestion_controls(True)
+        self.ingestion_task.start()
+
+    def cancel_ingestion(self):
+        """Cancelar la carga en curso (se revierte la transacción)"""
+        if self.ingestion_task is None or not self.ingestion_task.running:
+            return
+
+        self.ingestion_task.cancel()
+        self.log_movement("⏹ Cancelación solicitada...")
+        if self._widget_alive('cancel_button'):
+            self.cancel_button.config(state=DISABLED)
+        if self._widget_alive('progress_label'):
+            self.progress_label.config(text="Cancelando...")
+
+    def on_ingestion_progress(self, evento):
+        """Actualizar barra y texto de avance (fase, filas/s, ETA)"""
+        # Cada fase se registra una vez (en streaming se repiten por bloque)
+        if evento['fase'] not in self._fases_vistas:
+            self._fases_vistas.add(evento['fase'])
+            self.log_movement(f"  ▸ {evento['fase']}")
+
+        if self._widget_alive('progress_bar'):
+            self.progress_bar['value'] = progress_percent(evento)
+        if self._widget_alive('progress_label'):
+            self.progress_label.config(text=format_progress(evento))
+
+    def on_ingestion_cancelled(self):
+        """La carga fue cancelada y revertida"""
+        self._set_ingestion_controls(False)
+        self.log_movement("✗ Carga cancelada: el lote en curso fue revertido (los ya confirmados se conservan)")
+        self.log_movement("="*50 + "\n")
+        messagebox.showinfo("Carga Cancelada",
+            "La carga se canceló y el lote en curso fue revertido.\n\n"
+            "Los lotes ya confirmados se conservan: al volver a cargar el mismo archivo "
+            "se reanuda desde el último lote confirmado.")
+
+    def _set_ingestion_controls(self, running):
+        """Habilitar/deshabilitar botones según haya una carga en curso"""
+        if self._widget_alive('update_button'):
+            self.update_button.config(state=DISABLED if running else NORMAL)
+        if self._widget_alive('folder_button'):
+            self.folder_button.config(state=DISABLED if running else NORMAL)
+        if self._widget_alive('preview_button'):
+            self.preview_button.config(state=DISABLED if running else NORMAL)
+        if self._widget_alive('cancel_button'):
+            self.cancel_button.config(state=NORMAL if running else DISABLED)
+        if not running:
+            if self._widget_alive('progress_bar'):
+                self.progress_bar['value'] = 0
+            if self._widget_alive('progress_label'):
+                self.progress_label.config(text="")
+
+    def _widget_alive(self, name):
+        """True si el widget existe (el panel pudo destruirse al cambiar de sección)"""
+        widget = getattr(self, name, None)
+        return widget is not None and widget.winfo_exists()
 
     def show_dashboards_panel(self):
         """Panel de dashboards con listas laterales y gráficas dinámicas"""
@@ -371,13 +522,7 @@ class MainWindow:
         """Cargar lista de módulos desde la base de datos"""
         try:
             # Consultar módulos reales de la base de datos
-            self.cursor.execute("""
-                SELECT IdModulo, NombreModulo
-                FROM Instituto_Modulo
-                ORDER BY IdModulo
-            """)
-
-            modulos = self.cursor.fetchall()
+            modulos = self.db.query('modules')
 
             if modulos:
                 for modulo in modulos:
@@ -400,13 +545,7 @@ class MainWindow:
         """Cargar lista de unidades de negocio desde la base de datos"""
         try:
             # Consultar unidades reales de la base de datos
-            self.cursor.execute("""
-                SELECT IdUnidadDeNegocio, NombreUnidad
-                FROM Instituto_UnidadDeNegocio
-                ORDER BY NombreUnidad
-            """)
-
-            unidades = self.cursor.fetchall()
+            unidades = self.db.query('business_units')
 
             if unidades:
                 for unidad in unidades:
@@ -701,6 +840,9 @@ class MainWindow:
 
     def clear_content_area(self):
         """Limpiar área de contenido"""
+        # Los resultados pendientes del panel anterior ya no tienen dónde mostrarse
+        self.query_executor.cancel('resultados')
+        self.query_executor.cancel('unidades')
         for widget in self.content_area.winfo_children():
             widget.destroy()
 
@@ -710,7 +852,7 @@ class MainWindow:
 
     def show_processing_stats(self, stats):
         """Mostrar estadísticas del procesamiento en el panel"""
-        if hasattr(self, 'movements_text'):
+        if self._widget_alive('movements_text'):
             # Encabezado
             self.log_movement("\n📊 RESUMEN DE ACTUALIZACIÓN")
             self.log_movement("─" * 50)
@@ -718,6 +860,22 @@ class MainWindow:
             # Información del archivo
             self.log_movement(f"📄 Archivo: {stats['archivo']}")
             self.log_movement(f"📅 Fecha: {stats['fecha_procesamiento']}")
+            if stats.get('filas_reanudadas'):
+                self.log_movement(f"↩️  Carga reanudada: {stats['filas_reanudadas']:,} filas ya confirmadas "
+                                  f"en el intento anterior")
+            if stats.get('lectura_desde_cache'):
+                self.log_movement("📦 Archivo tomado de la caché local (sin re-parsear)")
+            elif stats.get('motor_lectura'):
+                self.log_movement(f"⚙️  Motor de lectura: {stats['motor_lectura']}")
+            for archivo in stats.get('archivos', []):
+                detalle = f"ERROR: {archivo['error']}" if archivo['error'] else f"{archivo['registros']:,} registros"
+                self.log_movement(f"    - {archivo['archivo']}: {detalle}")
+            if stats.get('duplicados_entre_archivos'):
+                self.log_movement(f"    Repetidos entre archivos (se tomó la fecha más reciente): "
+                                  f"{stats['duplicados_entre_archivos']:,}")
+            if stats.get('duplicados_en_archivo'):
+                self.log_movement(f"    Repetidos en el archivo (se tomó el estado más avanzado): "
+                                  f"{stats['duplicados_en_archivo']:,}")
             self.log_movement("")
 
             # Estadísticas principales
@@ -732,15 +890,26 @@ class MainWindow:
             self.log_movement(f"  • Usuarios nuevos creados: {stats['usuarios_nuevos']}")
             self.log_movement(f"  • Módulos nuevos creados: {stats['modulos_nuevos']}")
             self.log_movement(f"  • Inscripciones actualizadas: {stats['inscripciones_actualizadas']}")
+            self.log_movement(f"      ◦ Nuevas: {stats.get('inscripciones_nuevas', 0)}")
+            self.log_movement(f"      ◦ Modificadas: {stats.get('inscripciones_modificadas', 0)}")
+            if stats.get('inscripciones_sin_cambios'):
+                self.log_movement(f"  • Inscripciones sin cambios (omitidas): {stats['inscripciones_sin_cambios']:,}")
             self.log_movement("")
 
-            # Errores si los hay
-            if stats.get('errores') and len(stats['errores']) > 0:
-                self.log_movement("⚠️  ADVERTENCIAS/ERRORES:")
-                for error in stats['errores']:
-                    self.log_movement(f"  • {error}")
+            # Tiempos por fase (¿lectura del Excel o red hacia la BD?)
+            if stats.get('timings'):
+                self.log_movement("⏱️  TIEMPOS POR FASE:")
+                for clave, timing in stats['timings'].items():
+                    velocidad = f"{timing['filas_por_seg']:,.0f} filas/s" if timing['filas_por_seg'] else "-"
+                    self.log_movement(f"  • {INGESTION_PHASES[clave]:<26} {timing['segundos']:>8.2f} s "
+                                      f"{velocidad:>18}  {timing['round_trips']:,} viajes BD")
+                total = sum(timing['segundos'] for timing in stats['timings'].values())
+                self.log_movement(f"  • {'Total':<26} {total:>8.2f} s")
                 self.log_movement("")
 
+            # Errores si los hay: resumen por tipo, no la lista completa
+            self.log_error_summary(stats)
+
             # Resumen final
             if stats['inscripciones_actualizadas'] > 0:
                 self.log_movement("✅ ACTUALIZACIÓN EXITOSA")
@@ -751,6 +920,43 @@ class MainWindow:
             self.log_movement("─" * 50)
             self.movements_text.see(tk.END)
 
+    def show_diff_summary(self, stats):
+        """Mostrar en el panel lo que cambiaría el archivo (resultado del dry run)"""
+        diferencias = stats['diferencias']
+        self.log_movement("\n👁 VISTA PREVIA (la base de datos no fue modificada)")
+        self.log_movement("─" * 50)
+        self.log_movement(f"📄 Archivo: {stats['archivo']}")
+        self.log_movement(f"  • Registros válidos en el archivo: {stats['total_registros']:,}")
+        self.log_movement(f"  • Usuarios nuevos: {diferencias['usuarios_nuevos']:,}")
+        if diferencias['modulos_nuevos']:
+            self.log_movement(f"  • Módulos nuevos: {diferencias['modulos_nuevos']} "
+                              f"({', '.join(str(m) for m in diferencias['modulos_nuevos_ids'])})")
+        self.log_movement(f"  • Inscripciones nuevas: {diferencias['inscripciones_nuevas']:,}")
+        self.log_movement(f"  • Cambios de estado: {sum(diferencias['transiciones'].values()):,}")
+        for transicion, cantidad in diferencias['transiciones'].items():
+            self.log_movement(f"      ◦ {transicion}: {cantidad:,}")
+        self.log_movement(f"  • Cambios de fecha de inicio: {diferencias['cambios_fecha_inicio']:,}")
+        self.log_movement(f"  • Cambios de fecha de finalización: {diferencias['cambios_fecha_fin']:,}")
+        self.log_movement(f"  • Inscripciones sin cambios: {diferencias['sin_cambios']:,}")
+
+        self.log_error_summary(stats)
+        self.log_movement("─" * 50)
+
+    def log_error_summary(self, stats):
+        """Resumen de errores: conteo por tipo, una muestra y el archivo de rechazados"""
+        if not stats.get('errores_total'):
+            return
+
+        self.log_movement(f"⚠️  ADVERTENCIAS/ERRORES ({stats['errores_total']:,}):")
+        for linea in error_summary(stats):
+            self.log_movement(f"  • {linea}")
+        self.log_movement("  Ejemplos:")
+        for error in stats['errores'][:5]:
+            self.log_movement(f"      ◦ {error}")
+        if stats.get('archivo_rechazados'):
+            self.log_movement(f"  📄 Filas rechazadas: {stats['archivo_rechazados']}")
+        self.log_movement("")
+
     def update_emails(self):
         """Actualizar correos desde el archivo"""
         if not self.current_file:
@@ -775,17 +981,17 @@ class MainWindow:
         log_entry = f"[{timestamp}] {message}\n"
 
         # Agregar al panel si existe
-        if hasattr(self, 'movements_text'):
+        if self._widget_alive('movements_text'):
             self.movements_text.insert(tk.END, log_entry)
             self.movements_text.see(tk.END)
 
         # DESHABILITADO: No guardar en HistorialCambios (tabla no existe)
         # try:
-        #     self.cursor.execute("""
-        #         INSERT INTO HistorialCambios (TipoCambio, DescripcionCambio, UsuarioSistema)
-        #         VALUES (?, ?, ?)
-        #     """, ('UPDATE', message, 'Sistema'))
-        #     self.db.commit()
+        #     with self.db.cursor(commit=True) as cursor:
+        #         cursor.execute("""
+        #             INSERT INTO HistorialCambios (TipoCambio, DescripcionCambio, UsuarioSistema)
+        #             VALUES (?, ?, ?)
+        #         """, ('UPDATE', message, 'Sistema'))
         # except Exception as e:
         #     print(f"Error al guardar en historial: {e}")
 
@@ -831,47 +1037,28 @@ class MainWindow:
             messagebox.showwarning("Advertencia", "Ingrese un ID de usuario")
             return
 
-        # ERROR 7: Consulta completa con TODOS los campos de usuario
-        self.cursor.execute("""
-            SELECT
-                u.UserId,
-                u.Nombre,
-                u.Email,
-                un.NombreUnidad,
-                u.Nivel,
-                u.Division,
-                m.NombreModulo,
-                pm.EstatusModuloUsuario,
-                CONVERT(VARCHAR(10), pm.FechaInicio, 103) as FechaAsignacion,
-                CONVERT(VARCHAR(10), pm.FechaFinalizacion, 103) as FechaFinalizacion
-            FROM Instituto_Usuario u
-            LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
-            LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
-            LEFT JOIN Instituto_Modulo m ON pm.IdModulo = m.IdModulo
-            WHERE u.UserId = ?
-            ORDER BY m.NombreModulo
-        """, (user_id,))
-
-        results = self.cursor.fetchall()
-        if results:
-            self.display_search_results(results,
-                ['User ID', 'Nombre', 'Email', 'Unidad', 'Nivel', 'División', 'Módulo', 'Estatus Módulo', 'Fecha Inicio', 'Fecha Fin'])
-        else:
-            messagebox.showinfo("Sin resultados", "Usuario no encontrado")
+        def mostrar(results):
+            if results:
+                self.display_search_results(results,
+                    ['User ID', 'Nombre', 'Email', 'Unidad', 'Nivel', 'División', 'Módulo', 'Estatus Módulo', 'Fecha Inicio', 'Fecha Fin'])
+            else:
+                messagebox.showinfo("Sin resultados", "Usuario no encontrado")
+
+        # En un hilo de consulta: la interfaz no se congela y una consulta nueva
+        # descarta el resultado de la anterior
+        self.query_executor.submit('resultados', self.db.query, 'user_search', (user_id,),
+                                   on_done=mostrar, on_error=self._query_failed)
 
     def load_business_units(self):
         """Cargar unidades de negocio en el combobox"""
-        try:
-            self.cursor.execute("""
-                SELECT NombreUnidad FROM Instituto_UnidadDeNegocio
-                ORDER BY NombreUnidad
-            """)
-            units = [row[0] for row in self.cursor.fetchall()]
+        def mostrar(rows):
+            units = [row[0] for row in rows]
             self.business_unit_combo['values'] = units
             if units:
                 self.business_unit_combo.current(0)
-        except Exception as e:
-            print(f"Error cargando unidades: {e}")
+
+        self.query_executor.submit('unidades', self.db.query, 'business_unit_names', on_done=mostrar,
+                                   on_error=lambda e: print(f"Error cargando unidades: {e}"))
 
     def query_business_unit_from_combo(self):
         """Consultar unidad de negocio desde el combobox"""
@@ -880,44 +1067,19 @@ class MainWindow:
             messagebox.showwarning("Advertencia", "Seleccione una unidad de negocio")
             return
 
-        self.cursor.execute("""
-            SELECT
-                u.UserId,
-                u.Nombre,
-                u.Email,
-                un.NombreUnidad,
-                COUNT(DISTINCT pm.IdModulo) as TotalModulos,
-                SUM(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) as Completados,
-                SUM(CASE WHEN pm.EstatusModuloUsuario = 'En proceso' THEN 1 ELSE 0 END) as EnProceso,
-                SUM(CASE WHEN pm.EstatusModuloUsuario = 'Registrado' THEN 1 ELSE 0 END) as Registrados
-            FROM Instituto_Usuario u
-            LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
-            LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
-            WHERE un.NombreUnidad = ?
-            GROUP BY u.UserId, u.Nombre, u.Email, un.NombreUnidad
-            ORDER BY u.Nombre
-        """, (unit,))
-
-        results = self.cursor.fetchall()
-        if results:
-            self.display_search_results(results,
-                ['User ID', 'Nombre', 'Email', 'Unidad', 'Total Módulos', 'Completados', 'En Proceso', 'Registrados'])
-        else:
-            messagebox.showinfo("Sin resultados", f"No se encontraron usuarios en {unit}")
+        def mostrar(results):
+            if results:
+                self.display_search_results(results,
+                    ['User ID', 'Nombre', 'Email', 'Unidad', 'Total Módulos', 'Completados', 'En Proceso', 'Registrados'])
+            else:
+                messagebox.showinfo("Sin resultados", f"No se encontraron usuarios en {unit}")
+
+        self.query_executor.submit('resultados', self.db.query, 'users_by_unit_name', (unit,),
+                                   on_done=mostrar, on_error=self._query_failed)
 
     def show_progress_stats(self):
         """Mostrar estadísticas de progreso"""
-        try:
-            self.cursor.execute("""
-                SELECT
-                    COUNT(CASE WHEN EstatusModuloUsuario = 'Completado' THEN 1 END) as Completados,
-                    COUNT(CASE WHEN EstatusModuloUsuario = 'En proceso' THEN 1 END) as EnProceso,
-                    COUNT(CASE WHEN EstatusModuloUsuario = 'Registrado' THEN 1 END) as Registrados,
-                    COUNT(*) as Total
-                FROM Instituto_ProgresoModulo
-            """)
-            result = self.cursor.fetchone()
-
+        def mostrar(result):
             if result:
                 msg = f"""Estadísticas de Progreso de Módulos:
 
@@ -929,32 +1091,26 @@ Total de Inscripciones: {result[3]}
 Porcentaje Completado: {(result[0]/result[3]*100):.1f}%
 """
                 messagebox.showinfo("Estadísticas", msg)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al obtener estadísticas: {str(e)}")
+
+        self.query_executor.submit(
+            'estadisticas', self.db.query_one, 'progress_status_totals', on_done=mostrar,
+            on_error=lambda e: messagebox.showerror("Error", f"Error al obtener estadísticas: {str(e)}"))
 
     def query_new_users(self):
         """Consultar todos los usuarios con su progreso"""
-        self.cursor.execute("""
-            SELECT
-                u.UserId,
-                u.Nombre,
-                u.Email,
-                un.NombreUnidad,
-                COUNT(DISTINCT pm.IdModulo) as TotalModulos,
-                SUM(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) as Completados
-            FROM Instituto_Usuario u
-            LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
-            LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
-            GROUP BY u.UserId, u.Nombre, u.Email, un.NombreUnidad
-            ORDER BY u.UserId
-        """)
-
-        results = self.cursor.fetchall()
-        if results:
-            self.display_search_results(results,
-                ['User ID', 'Nombre', 'Email', 'Unidad', 'Total Módulos', 'Completados'])
-        else:
-            messagebox.showinfo("Sin resultados", "No hay usuarios nuevos en los ultimos 30 dias")
+        def mostrar(results):
+            if results:
+                self.display_search_results(results,
+                    ['User ID', 'Nombre', 'Email', 'Unidad', 'Total Módulos', 'Completados'])
+            else:
+                messagebox.showinfo("Sin resultados", "No hay usuarios nuevos en los ultimos 30 dias")
+
+        self.query_executor.submit('resultados', self.db.query, 'users_with_progress',
+                                   on_done=mostrar, on_error=self._query_failed)
+
+    def _query_failed(self, error):
+        """Error de una consulta en segundo plano (se recibe en el hilo de la interfaz)"""
+        messagebox.showerror("Error", f"Error en consulta: {str(error)}")
 
     def display_search_results(self, results, columns):
         """Mostrar resultados en el treeview con ANCHOS FIJOS por tipo de columna"""
@@ -1082,8 +1238,7 @@ Porcentaje Completado: {(result[0]/result[3]*100):.1f}%
 
         # Cargar unidades de negocio
         try:
-            self.cursor.execute("SELECT IdUnidadDeNegocio, NombreUnidad FROM Instituto_UnidadDeNegocio ORDER BY NombreUnidad")
-            unidades = self.cursor.fetchall()
+            unidades = self.db.query('business_units')
             entries['unidad']['values'] = [f"{u[0]} - {u[1]}" for u in unidades]
             entries['unidad_data'] = {f"{u[0]} - {u[1]}": u[0] for u in unidades}
         except Exception as e:
@@ -1165,25 +1320,21 @@ Porcentaje Completado: {(result[0]/result[3]*100):.1f}%
 
             try:
                 # Verificar si el usuario ya existe
-                self.cursor.execute("SELECT UserId FROM Instituto_Usuario WHERE UserId = ?", (user_id,))
-                if self.cursor.fetchone():
+                if self.db.query_one('user_exists', (user_id,)):
                     messagebox.showerror("Error", f"El usuario {user_id} ya existe en la base de datos")
                     return
 
-                # Insertar nuevo usuario
-                self.cursor.execute("""
-                    INSERT INTO Instituto_Usuario
-                    (UserId, Nombre, Email, IdUnidadDeNegocio, Nivel, Division, Activo)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (user_id, nombre, email, id_unidad, nivel or None, division or None, activo))
+                # Insertar nuevo usuario (commit al salir del bloque; rollback si falla)
+                with self.db.cursor(commit=True) as cursor:
+                    cursor.execute(self.db.sql('user_insert_full'),
+                                   (user_id, nombre, email, id_unidad, nivel or None, division or None, activo))
+                query_cache.invalidate(['Instituto_Usuario'])
 
-                self.db.commit()
                 self.log_movement(f"✓ Nuevo usuario agregado: {nombre} ({user_id})")
                 messagebox.showinfo("Éxito", f"Usuario {nombre} agregado correctamente")
                 dialog.destroy()
 
             except Exception as e:
-                self.db.rollback()
                 messagebox.showerror("Error", f"Error al agregar usuario:\n{str(e)}")
 
         # Botones
@@ -1209,7 +1360,7 @@ Porcentaje Completado: {(result[0]/result[3]*100):.1f}%
         modules_frame.pack(fill=BOTH, expand=True, padx=20, pady=10)
 
         # Treeview para módulos
-        tree = ttk.Treeview(modules_frame, columns=('ID', 'Nombre', 'Diplomado', 'Duracion'),
+        tree = ttk.Treeview(modules_frame, columns=('ID', 'Nombre', 'Asignacion', 'Activo'),
                           show='tree headings')
         tree.pack(fill=BOTH, expand=True)
 
@@ -1218,8 +1369,7 @@ Porcentaje Completado: {(result[0]/result[3]*100):.1f}%
 
         # Cargar módulos existentes
         try:
-            self.cursor.execute("SELECT * FROM Instituto_Modulo")
-            for row in self.cursor.fetchall():
+            for row in self.db.query('modules_detail'):
                 tree.insert('', tk.END, values=row)
         except Exception as e:
             print(f"Error al cargar modulos: {e}")
@@ -1250,5 +1400,7 @@ Porcentaje Completado: {(result[0]/result[3]*100):.1f}%
 
     def __del__(self):
         """Cerrar conexión al destruir"""
+        if hasattr(self, 'query_executor'):
+            self.query_executor.shutdown()
         if hasattr(self, 'db'):
             self.db.close()
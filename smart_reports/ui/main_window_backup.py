@@ -12,6 +12,7 @@ import os
 
 from smart_reports.config.settings import APP_CONFIG, COLORS
 from smart_reports.database.connection import DatabaseConnection
+from smart_reports.database.query_cache import query_cache
 from smart_reports.ui.components import EditableTreeview, LoadingSpinner
 from smart_reports.services.data_processor import TranscriptProcessor
 from smart_reports.services.pdf_generator import PDFReportGenerator
@@ -28,8 +29,7 @@ class MainWindow:
         # Base de datos
         self.db = DatabaseConnection()
         try:
-            self.conn = self.db.connect()
-            self.cursor = self.db.get_cursor()
+            self.db.connect()
             self.verify_database_tables()
         except Exception as e:
             messagebox.showerror("Error de Conexión",
@@ -45,16 +45,11 @@ class MainWindow:
     def verify_database_tables(self):
         """Verificar que las tablas necesarias existan"""
         tables_needed = ['Instituto_UnidadDeNegocio', 'Instituto_Usuario', 'Instituto_Modulo', 'Instituto_ProgresoModulo']
-        placeholders = ','.join(['?' for _ in tables_needed])
 
         try:
-            self.cursor.execute(f"""
-                SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES
-                WHERE TABLE_TYPE = 'BASE TABLE'
-                AND TABLE_NAME IN ({placeholders})
-            """, tables_needed)
+            tablas = self.db.execute(self.db.backend.existing_tables_sql(len(tables_needed)), tables_needed)
 
-            existing_tables = [t[0] for t in self.cursor.fetchall()]
+            existing_tables = [t[0] for t in tablas]
 
             if len(existing_tables) < len(tables_needed):
                 missing = set(tables_needed) - set(existing_tables)
@@ -203,13 +198,16 @@ class MainWindow:
                 "Primero debes seleccionar un archivo Transcript Status")
             return
 
+        conn = None
         try:
             self.log_movement("="*50)
             self.log_movement("🔄 INICIANDO ACTUALIZACIÓN DE BASE DE DATOS")
             self.log_movement("="*50)
 
-            # Crear procesador
-            processor = TranscriptProcessor(self.conn)
+            # Crear procesador (con su propia conexión, fuera del pool: la carga
+            # usa transacción y tablas temporales de sesión)
+            conn = self.db.create_connection()
+            processor = TranscriptProcessor(conn)
 
             # Procesar archivo
             stats = processor.process_file(self.current_file)
@@ -235,6 +233,13 @@ class MainWindow:
             import traceback
             self.log_movement(traceback.format_exc())
 
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
     def show_dashboards_panel(self):
         """Panel de dashboards con listas laterales y gráficas dinámicas"""
         self.clear_content_area()
@@ -371,13 +376,7 @@ class MainWindow:
         """Cargar lista de módulos desde la base de datos"""
         try:
             # Consultar módulos reales de la base de datos
-            self.cursor.execute("""
-                SELECT IdModulo, NombreModulo
-                FROM Instituto_Modulo
-                ORDER BY IdModulo
-            """)
-
-            modulos = self.cursor.fetchall()
+            modulos = self.db.query('modules')
 
             if modulos:
                 for modulo in modulos:
@@ -400,13 +399,7 @@ class MainWindow:
         """Cargar lista de unidades de negocio desde la base de datos"""
         try:
             # Consultar unidades reales de la base de datos
-            self.cursor.execute("""
-                SELECT IdUnidadDeNegocio, NombreUnidad
-                FROM Instituto_UnidadDeNegocio
-                ORDER BY NombreUnidad
-            """)
-
-            unidades = self.cursor.fetchall()
+            unidades = self.db.query('business_units')
 
             if unidades:
                 for unidad in unidades:
@@ -781,11 +774,11 @@ class MainWindow:
 
         # DESHABILITADO: No guardar en HistorialCambios (tabla no existe)
         # try:
-        #     self.cursor.execute("""
-        #         INSERT INTO HistorialCambios (TipoCambio, DescripcionCambio, UsuarioSistema)
-        #         VALUES (?, ?, ?)
-        #     """, ('UPDATE', message, 'Sistema'))
-        #     self.db.commit()
+        #     with self.db.cursor(commit=True) as cursor:
+        #         cursor.execute("""
+        #             INSERT INTO HistorialCambios (TipoCambio, DescripcionCambio, UsuarioSistema)
+        #             VALUES (?, ?, ?)
+        #         """, ('UPDATE', message, 'Sistema'))
         # except Exception as e:
         #     print(f"Error al guardar en historial: {e}")
 
@@ -832,27 +825,7 @@ class MainWindow:
             return
 
         # ERROR 7: Consulta completa con TODOS los campos de usuario
-        self.cursor.execute("""
-            SELECT
-                u.UserId,
-                u.Nombre,
-                u.Email,
-                un.NombreUnidad,
-                u.Nivel,
-                u.Division,
-                m.NombreModulo,
-                pm.EstatusModuloUsuario,
-                CONVERT(VARCHAR(10), pm.FechaInicio, 103) as FechaAsignacion,
-                CONVERT(VARCHAR(10), pm.FechaFinalizacion, 103) as FechaFinalizacion
-            FROM Instituto_Usuario u
-            LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
-            LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
-            LEFT JOIN Instituto_Modulo m ON pm.IdModulo = m.IdModulo
-            WHERE u.UserId = ?
-            ORDER BY m.NombreModulo
-        """, (user_id,))
-
-        results = self.cursor.fetchall()
+        results = self.db.query('user_search', (user_id,))
         if results:
             self.display_search_results(results,
                 ['User ID', 'Nombre', 'Email', 'Unidad', 'Nivel', 'División', 'Módulo', 'Estatus Módulo', 'Fecha Inicio', 'Fecha Fin'])
@@ -862,11 +835,7 @@ class MainWindow:
     def load_business_units(self):
         """Cargar unidades de negocio en el combobox"""
         try:
-            self.cursor.execute("""
-                SELECT NombreUnidad FROM Instituto_UnidadDeNegocio
-                ORDER BY NombreUnidad
-            """)
-            units = [row[0] for row in self.cursor.fetchall()]
+            units = [row[0] for row in self.db.query('business_unit_names')]
             self.business_unit_combo['values'] = units
             if units:
                 self.business_unit_combo.current(0)
@@ -880,25 +849,7 @@ class MainWindow:
             messagebox.showwarning("Advertencia", "Seleccione una unidad de negocio")
             return
 
-        self.cursor.execute("""
-            SELECT
-                u.UserId,
-                u.Nombre,
-                u.Email,
-                un.NombreUnidad,
-                COUNT(DISTINCT pm.IdModulo) as TotalModulos,
-                SUM(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) as Completados,
-                SUM(CASE WHEN pm.EstatusModuloUsuario = 'En proceso' THEN 1 ELSE 0 END) as EnProceso,
-                SUM(CASE WHEN pm.EstatusModuloUsuario = 'Registrado' THEN 1 ELSE 0 END) as Registrados
-            FROM Instituto_Usuario u
-            LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
-            LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
-            WHERE un.NombreUnidad = ?
-            GROUP BY u.UserId, u.Nombre, u.Email, un.NombreUnidad
-            ORDER BY u.Nombre
-        """, (unit,))
-
-        results = self.cursor.fetchall()
+        results = self.db.query('users_by_unit_name', (unit,))
         if results:
             self.display_search_results(results,
                 ['User ID', 'Nombre', 'Email', 'Unidad', 'Total Módulos', 'Completados', 'En Proceso', 'Registrados'])
@@ -908,15 +859,7 @@ class MainWindow:
     def show_progress_stats(self):
         """Mostrar estadísticas de progreso"""
         try:
-            self.cursor.execute("""
-                SELECT
-                    COUNT(CASE WHEN EstatusModuloUsuario = 'Completado' THEN 1 END) as Completados,
-                    COUNT(CASE WHEN EstatusModuloUsuario = 'En proceso' THEN 1 END) as EnProceso,
-                    COUNT(CASE WHEN EstatusModuloUsuario = 'Registrado' THEN 1 END) as Registrados,
-                    COUNT(*) as Total
-                FROM Instituto_ProgresoModulo
-            """)
-            result = self.cursor.fetchone()
+            result = self.db.query_one('progress_status_totals')
 
             if result:
                 msg = f"""Estadísticas de Progreso de Módulos:
@@ -934,22 +877,7 @@ Porcentaje Completado: {(result[0]/result[3]*100):.1f}%
 
     def query_new_users(self):
         """Consultar todos los usuarios con su progreso"""
-        self.cursor.execute("""
-            SELECT
-                u.UserId,
-                u.Nombre,
-                u.Email,
-                un.NombreUnidad,
-                COUNT(DISTINCT pm.IdModulo) as TotalModulos,
-                SUM(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) as Completados
-            FROM Instituto_Usuario u
-            LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
-            LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
-            GROUP BY u.UserId, u.Nombre, u.Email, un.NombreUnidad
-            ORDER BY u.UserId
-        """)
-
-        results = self.cursor.fetchall()
+        results = self.db.query('users_with_progress')
         if results:
             self.display_search_results(results,
                 ['User ID', 'Nombre', 'Email', 'Unidad', 'Total Módulos', 'Completados'])
@@ -1082,8 +1010,7 @@ Porcentaje Completado: {(result[0]/result[3]*100):.1f}%
 
         # Cargar unidades de negocio
         try:
-            self.cursor.execute("SELECT IdUnidadDeNegocio, NombreUnidad FROM Instituto_UnidadDeNegocio ORDER BY NombreUnidad")
-            unidades = self.cursor.fetchall()
+            unidades = self.db.query('business_units')
             entries['unidad']['values'] = [f"{u[0]} - {u[1]}" for u in unidades]
             entries['unidad_data'] = {f"{u[0]} - {u[1]}": u[0] for u in unidades}
         except Exception as e:
@@ -1165,25 +1092,21 @@ Porcentaje Completado: {(result[0]/result[3]*100):.1f}%
 
             try:
                 # Verificar si el usuario ya existe
-                self.cursor.execute("SELECT UserId FROM Instituto_Usuario WHERE UserId = ?", (user_id,))
-                if self.cursor.fetchone():
+                if self.db.query_one('user_exists', (user_id,)):
                     messagebox.showerror("Error", f"El usuario {user_id} ya existe en la base de datos")
                     return
 
-                # Insertar nuevo usuario
-                self.cursor.execute("""
-                    INSERT INTO Instituto_Usuario
-                    (UserId, Nombre, Email, IdUnidadDeNegocio, Nivel, Division, Activo)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (user_id, nombre, email, id_unidad, nivel or None, division or None, activo))
+                # Insertar nuevo usuario (commit al salir del bloque; rollback si falla)
+                with self.db.cursor(commit=True) as cursor:
+                    cursor.execute(self.db.sql('user_insert_full'),
+                                   (user_id, nombre, email, id_unidad, nivel or None, division or None, activo))
+                query_cache.invalidate(['Instituto_Usuario'])
 
-                self.db.commit()
                 self.log_movement(f"✓ Nuevo usuario agregado: {nombre} ({user_id})")
                 messagebox.showinfo("Éxito", f"Usuario {nombre} agregado correctamente")
                 dialog.destroy()
 
             except Exception as e:
-                self.db.rollback()
                 messagebox.showerror("Error", f"Error al agregar usuario:\n{str(e)}")
 
         # Botones
@@ -1209,7 +1132,7 @@ Porcentaje Completado: {(result[0]/result[3]*100):.1f}%
         modules_frame.pack(fill=BOTH, expand=True, padx=20, pady=10)
 
         # Treeview para módulos
-        tree = ttk.Treeview(modules_frame, columns=('ID', 'Nombre', 'Diplomado', 'Duracion'),
+        tree = ttk.Treeview(modules_frame, columns=('ID', 'Nombre', 'Asignacion', 'Activo'),
                           show='tree headings')
         tree.pack(fill=BOTH, expand=True)
 
@@ -1218,8 +1141,7 @@ Porcentaje Completado: {(result[0]/result[3]*100):.1f}%
 
         # Cargar módulos existentes
         try:
-            self.cursor.execute("SELECT * FROM Instituto_Modulo")
-            for row in self.cursor.fetchall():
+            for row in self.db.query('modules_detail'):
                 tree.insert('', tk.END, values=row)
         except Exception as e:
             print(f"Error al cargar modulos: {e}")
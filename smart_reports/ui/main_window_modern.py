@@ -9,7 +9,10 @@ import os
 
 from smart_reports.config.settings import APP_CONFIG
 from smart_reports.database.connection import DatabaseConnection
-from smart_reports.services.data_processor import TranscriptProcessor
+from smart_reports.services.data_processor import TranscriptProcessor, INGESTION_PHASES
+from smart_reports.services.ingestion_errors import error_summary
+from smart_reports.ui.ingestion_task import IngestionTask, format_progress, progress_percent
+from smart_reports.ui.query_executor import QueryExecutor
 from smart_reports.ui.components.modern_sidebar import ModernSidebar
 from smart_reports.ui.panels.modern_dashboard import ModernDashboard
 
@@ -30,8 +33,7 @@ class MainWindow:
         # Base de datos
         self.db = DatabaseConnection()
         try:
-            self.conn = self.db.connect()
-            self.cursor = self.db.get_cursor()
+            self.db.connect()
             self.verify_database_tables()
         except Exception as e:
             messagebox.showerror("Error de Conexión",
@@ -40,6 +42,9 @@ class MainWindow:
         # Variables de tracking
         self.current_file = None
         self.changes_log = []
+        self.ingestion_task = None
+        # Consultas fuera del hilo de la interfaz
+        self.query_executor = QueryExecutor(self.root)
 
         # Crear interfaz moderna
         self.create_modern_interface()
@@ -48,16 +53,11 @@ class MainWindow:
         """Verificar que las tablas necesarias existan"""
         tables_needed = ['Instituto_UnidadDeNegocio', 'Instituto_Usuario',
                         'Instituto_Modulo', 'Instituto_ProgresoModulo']
-        placeholders = ','.join(['?' for _ in tables_needed])
 
         try:
-            self.cursor.execute(f"""
-                SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES
-                WHERE TABLE_TYPE = 'BASE TABLE'
-                AND TABLE_NAME IN ({placeholders})
-            """, tables_needed)
+            tablas = self.db.execute(self.db.backend.existing_tables_sql(len(tables_needed)), tables_needed)
 
-            existing_tables = [t[0] for t in self.cursor.fetchall()]
+            existing_tables = [t[0] for t in tablas]
 
             if len(existing_tables) < len(tables_needed):
                 missing = set(tables_needed) - set(existing_tables)
@@ -94,6 +94,9 @@ class MainWindow:
 
     def clear_content_area(self):
         """Limpiar área de contenido"""
+        # Los resultados pendientes del panel anterior ya no tienen dónde mostrarse
+        self.query_executor.cancel('resultados')
+        self.query_executor.cancel('unidades')
         for widget in self.content_area.winfo_children():
             widget.destroy()
 
@@ -104,7 +107,7 @@ class MainWindow:
         self.clear_content_area()
 
         # Crear Modern Dashboard
-        dashboard = ModernDashboard(self.content_area, self.conn)
+        dashboard = ModernDashboard(self.content_area, self.db, self.query_executor)
         dashboard.pack(fill='both', expand=True)
 
     def show_actualizar_panel(self):
@@ -197,7 +200,7 @@ class MainWindow:
         )
         card2_desc.pack(padx=30, pady=(0, 15), anchor='w')
 
-        update_btn = ctk.CTkButton(
+        self.update_btn = ctk.CTkButton(
             card2,
             text='🔄  Actualizar Base de Datos (Cruce de Datos)',
             font=('Segoe UI', 16, 'bold'),
@@ -207,7 +210,57 @@ class MainWindow:
             height=50,
             command=self.update_database_from_file
         )
-        update_btn.pack(padx=30, pady=(0, 20))
+        self.update_btn.pack(padx=30, pady=(0, 10))
+
+        self.preview_btn = ctk.CTkButton(
+            card2,
+            text='👁  Vista Previa de Cambios (sin guardar)',
+            font=('Segoe UI', 14, 'bold'),
+            fg_color='#6c757d',
+            hover_color='#5c636a',
+            corner_radius=10,
+            height=40,
+            command=self.preview_database_changes
+        )
+        self.preview_btn.pack(padx=30, pady=(0, 10))
+
+        self.folder_btn = ctk.CTkButton(
+            card2,
+            text='📂  Importar Carpeta (varios archivos)',
+            font=('Segoe UI', 14, 'bold'),
+            fg_color='#4ecdc4',
+            hover_color='#3dbdb3',
+            corner_radius=10,
+            height=40,
+            command=self.import_transcript_folder
+        )
+        self.folder_btn.pack(padx=30, pady=(0, 10))
+
+        # Avance de la carga en segundo plano
+        self.progress_bar = ctk.CTkProgressBar(card2, progress_color='#51cf66', height=12)
+        self.progress_bar.set(0)
+        self.progress_bar.pack(fill='x', padx=30, pady=(5, 5))
+
+        self.progress_label = ctk.CTkLabel(
+            card2,
+            text='',
+            font=('Segoe UI', 12),
+            text_color='#a0a0b0'
+        )
+        self.progress_label.pack(padx=30, anchor='w')
+
+        self.cancel_btn = ctk.CTkButton(
+            card2,
+            text='⏹  Cancelar Carga',
+            font=('Segoe UI', 14, 'bold'),
+            fg_color='#ff6b6b',
+            hover_color='#fa5252',
+            corner_radius=10,
+            height=40,
+            command=self.cancel_ingestion
+        )
+        self.cancel_btn.pack(padx=30, pady=(5, 20))
+        self._set_ingestion_controls(self.ingestion_task is not None and self.ingestion_task.running)
 
         # Card 3: Panel de movimientos
         card3 = ctk.CTkFrame(scroll_frame, fg_color='#2b2d42', corner_radius=20, border_width=1, border_color='#3a3d5c')
@@ -602,23 +655,15 @@ class MainWindow:
                 f"Archivo cargado: {filename}\n\nAhora haz clic en 'Actualizar Base de Datos'")
 
     def update_database_from_file(self):
-        """Actualizar base de datos desde archivo cargado"""
+        """Actualizar base de datos desde archivo cargado (en segundo plano)"""
         if not self.current_file:
             messagebox.showwarning("Sin Archivo",
                 "Primero debes seleccionar un archivo Transcript Status")
             return
 
-        try:
-            self.log_movement("="*50)
-            self.log_movement("🔄 INICIANDO ACTUALIZACIÓN DE BASE DE DATOS")
-            self.log_movement("="*50)
-
-            # Crear procesador
-            processor = TranscriptProcessor(self.conn)
-
-            # Procesar archivo
-            stats = processor.process_file(self.current_file)
+        file_path = self.current_file
 
+        def on_done(stats):
             # Mostrar estadísticas detalladas
             self.show_processing_stats(stats)
 
@@ -633,19 +678,146 @@ class MainWindow:
             self.log_movement("✓ Actualización completada exitosamente")
             self.log_movement("="*50 + "\n")
 
-        except Exception as e:
-            error_msg = f"Error al actualizar base de datos: {str(e)}"
-            messagebox.showerror("Error", error_msg)
-            self.log_movement(f"✗ ERROR: {str(e)}")
-            import traceback
-            self.log_movement(traceback.format_exc())
+        self.start_ingestion("🔄 INICIANDO ACTUALIZACIÓN DE BASE DE DATOS",
+                             lambda processor: processor.process_file(file_path),
+                             on_done, "Error al actualizar base de datos")
+
+    def preview_database_changes(self):
+        """Comparar el archivo con la BD sin escribir nada (dry run, en segundo plano)"""
+        if not self.current_file:
+            messagebox.showwarning("Sin Archivo",
+                "Primero debes seleccionar un archivo Transcript Status")
+            return
+
+        file_path = self.current_file
+
+        def on_done(stats):
+            self.show_diff_summary(stats)
+            diferencias = stats['diferencias']
+            messagebox.showinfo("Vista Previa",
+                f"La base de datos NO fue modificada\n\n" +
+                f"Usuarios nuevos: {diferencias['usuarios_nuevos']:,}\n" +
+                f"Inscripciones nuevas: {diferencias['inscripciones_nuevas']:,}\n" +
+                f"Cambios de estado: {sum(diferencias['transiciones'].values()):,}\n" +
+                f"Sin cambios: {diferencias['sin_cambios']:,}")
+            self.log_movement("="*50 + "\n")
+
+        self.start_ingestion("👁 VISTA PREVIA DE CAMBIOS (SIN GUARDAR)",
+                             lambda processor: processor.process_file(file_path, dry_run=True),
+                             on_done, "Error en la vista previa")
+
+    def import_transcript_folder(self):
+        """Importar en una sola carga todos los archivos Transcript Status de una carpeta"""
+        folder = filedialog.askdirectory(title="Seleccionar carpeta con archivos Transcript Status")
+        if not folder:
+            return
+
+        def on_done(stats):
+            self.show_processing_stats(stats)
+
+            messagebox.showinfo("Importación Exitosa",
+                f"✓ Base de datos actualizada correctamente\n\n" +
+                f"Archivos: {len(stats['archivos'])}\n" +
+                f"Registros procesados: {stats['total_registros']:,}\n" +
+                f"Usuarios nuevos: {stats['usuarios_nuevos']}\n" +
+                f"Inscripciones actualizadas: {stats['inscripciones_actualizadas']}")
+
+            self.log_movement("✓ Importación completada exitosamente")
+            self.log_movement("="*50 + "\n")
+
+        # Lectura en paralelo + un solo escritor en BD
+        self.start_ingestion(f"📂 IMPORTACIÓN MÚLTIPLE: {folder}",
+                             lambda processor: processor.process_folder(folder),
+                             on_done, "Error al importar carpeta")
+
+    def start_ingestion(self, titulo, job, on_done, error_title):
+        """Lanza una carga en segundo plano; la interfaz sigue respondiendo"""
+        if self.ingestion_task is not None and self.ingestion_task.running:
+            messagebox.showwarning("Carga en Curso",
+                "Ya hay una carga en proceso. Espera a que termine o cancélala.")
+            return
+
+        self.log_movement("="*50)
+        self.log_movement(titulo)
+        self.log_movement("="*50)
+
+        def finished(stats):
+            self._set_ingestion_controls(False)
+            on_done(stats)
+
+        def failed(error, detalle):
+            self._set_ingestion_controls(False)
+            messagebox.showerror("Error", f"{error_title}: {str(error)}")
+            self.log_movement(f"✗ ERROR: {str(error)}")
+            self.log_movement(detalle)
+
+        self._fases_vistas = set()
+        self.ingestion_task = IngestionTask(self.root, self.db, job,
+                                            on_progress=self.on_ingestion_progress,
+                                            on_done=finished,
+                                            on_error=failed,
+                                            on_cancelled=self.on_ingestion_cancelled)
+        self._set_ingestion_controls(True)
+        self.ingestion_task.start()
+
+    def cancel_ingestion(self):
+        """Cancelar la carga en curso (se revierte la transacción)"""
+        if self.ingestion_task is None or not self.ingestion_task.running:
+            return
+
+        self.ingestion_task.cancel()
+        self.log_movement("⏹ Cancelación solicitada...")
+        if self._widget_alive('cancel_btn'):
+            self.cancel_btn.configure(state='disabled')
+        if self._widget_alive('progress_label'):
+            self.progress_label.configure(text='Cancelando...')
+
+    def on_ingestion_progress(self, evento):
+        """Actualizar barra y texto de avance (fase, filas/s, ETA)"""
+        # Cada fase se registra una vez (en streaming se repiten por bloque)
+        if evento['fase'] not in self._fases_vistas:
+            self._fases_vistas.add(evento['fase'])
+            self.log_movement(f"  ▸ {evento['fase']}")
+
+        if self._widget_alive('progress_bar'):
+            self.progress_bar.set(progress_percent(evento) / 100)
+        if self._widget_alive('progress_label'):
+            self.progress_label.configure(text=format_progress(evento))
+
+    def on_ingestion_cancelled(self):
+        """La carga fue cancelada y revertida"""
+        self._set_ingestion_controls(False)
+        self.log_movement("✗ Carga cancelada: el lote en curso fue revertido (los ya confirmados se conservan)")
+        self.log_movement("="*50 + "\n")
+        messagebox.showinfo("Carga Cancelada",
+            "La carga se canceló y el lote en curso fue revertido.\n\n"
+            "Los lotes ya confirmados se conservan: al volver a cargar el mismo archivo "
+            "se reanuda desde el último lote confirmado.")
+
+    def _set_ingestion_controls(self, running):
+        """Habilitar/deshabilitar botones según haya una carga en curso"""
+        for name in ('update_btn', 'preview_btn', 'folder_btn'):
+            if self._widget_alive(name):
+                getattr(self, name).configure(state='disabled' if running else 'normal')
+        if self._widget_alive('cancel_btn'):
+            self.cancel_btn.configure(state='normal' if running else 'disabled')
+        if not running:
+            if self._widget_alive('progress_bar'):
+                self.progress_bar.set(0)
+            if self._widget_alive('progress_label'):
+                self.progress_label.configure(text='')
+
+    def _widget_alive(self, name):
+        """True si el widget existe (el panel pudo destruirse al cambiar de sección)"""
+        widget = getattr(self, name, None)
+        return widget is not None and widget.winfo_exists()
 
     def log_movement(self, message):
         """Registrar movimiento en el panel"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"[{timestamp}] {message}\n"
 
-        if hasattr(self, 'movements_text'):
+        if self._widget_alive('movements_text'):
             self.movements_text.insert('end', log_entry)
             self.movements_text.see('end')
 
@@ -654,17 +826,74 @@ class MainWindow:
         self.log_movement("\n📊 ESTADÍSTICAS DE PROCESAMIENTO:")
         self.log_movement(f"  • Archivo: {stats['archivo']}")
         self.log_movement(f"  • Fecha: {stats['fecha_procesamiento']}")
+        if stats.get('filas_reanudadas'):
+            self.log_movement(f"  • Carga reanudada: {stats['filas_reanudadas']:,} filas ya confirmadas antes")
+        if stats.get('lectura_desde_cache'):
+            self.log_movement("  • Archivo tomado de la caché local (sin re-parsear)")
+        elif stats.get('motor_lectura'):
+            self.log_movement(f"  • Motor de lectura: {stats['motor_lectura']}")
+        for archivo in stats.get('archivos', []):
+            detalle = f"ERROR: {archivo['error']}" if archivo['error'] else f"{archivo['registros']:,} registros"
+            self.log_movement(f"      - {archivo['archivo']}: {detalle}")
+        if stats.get('duplicados_entre_archivos'):
+            self.log_movement(f"  • Repetidos entre archivos (fecha más reciente): {stats['duplicados_entre_archivos']:,}")
+        if stats.get('duplicados_en_archivo'):
+            self.log_movement(f"  • Repetidos en el archivo (estado más avanzado): {stats['duplicados_en_archivo']:,}")
         self.log_movement(f"  • Total registros: {stats['total_registros']:,}")
         self.log_movement(f"  • Usuarios únicos: {stats['usuarios_unicos']}")
         self.log_movement(f"  • Usuarios nuevos: {stats['usuarios_nuevos']}")
         self.log_movement(f"  • Módulos únicos: {stats['modulos_unicos']}")
         self.log_movement(f"  • Módulos nuevos: {stats['modulos_nuevos']}")
         self.log_movement(f"  • Inscripciones actualizadas: {stats['inscripciones_actualizadas']}")
+        self.log_movement(f"      ◦ Nuevas: {stats.get('inscripciones_nuevas', 0)}")
+        self.log_movement(f"      ◦ Modificadas: {stats.get('inscripciones_modificadas', 0)}")
+        if stats.get('inscripciones_sin_cambios'):
+            self.log_movement(f"  • Inscripciones sin cambios (omitidas): {stats['inscripciones_sin_cambios']:,}")
+
+        # Tiempos por fase (¿lectura del Excel o red hacia la BD?)
+        if stats.get('timings'):
+            self.log_movement("\n⏱️  TIEMPOS POR FASE:")
+            for clave, timing in stats['timings'].items():
+                velocidad = f"{timing['filas_por_seg']:,.0f} filas/s" if timing['filas_por_seg'] else "-"
+                self.log_movement(f"  • {INGESTION_PHASES[clave]:<26} {timing['segundos']:>8.2f} s "
+                                  f"{velocidad:>18}  {timing['round_trips']:,} viajes BD")
+            total = sum(timing['segundos'] for timing in stats['timings'].values())
+            self.log_movement(f"  • {'Total':<26} {total:>8.2f} s")
+
+        self.log_error_summary(stats)
+
+    def show_diff_summary(self, stats):
+        """Mostrar lo que cambiaría el archivo (resultado del dry run)"""
+        diferencias = stats['diferencias']
+        self.log_movement("\n👁 VISTA PREVIA (la base de datos no fue modificada):")
+        self.log_movement(f"  • Archivo: {stats['archivo']}")
+        self.log_movement(f"  • Registros válidos: {stats['total_registros']:,}")
+        self.log_movement(f"  • Usuarios nuevos: {diferencias['usuarios_nuevos']:,}")
+        if diferencias['modulos_nuevos']:
+            self.log_movement(f"  • Módulos nuevos: {diferencias['modulos_nuevos']} "
+                              f"({', '.join(str(m) for m in diferencias['modulos_nuevos_ids'])})")
+        self.log_movement(f"  • Inscripciones nuevas: {diferencias['inscripciones_nuevas']:,}")
+        self.log_movement(f"  • Cambios de estado: {sum(diferencias['transiciones'].values()):,}")
+        for transicion, cantidad in diferencias['transiciones'].items():
+            self.log_movement(f"      ◦ {transicion}: {cantidad:,}")
+        self.log_movement(f"  • Cambios de fecha de inicio: {diferencias['cambios_fecha_inicio']:,}")
+        self.log_movement(f"  • Cambios de fecha de finalización: {diferencias['cambios_fecha_fin']:,}")
+        self.log_movement(f"  • Sin cambios: {diferencias['sin_cambios']:,}")
+
+        self.log_error_summary(stats)
+
+    def log_error_summary(self, stats):
+        """Resumen de errores: conteo por tipo, una muestra y el archivo de rechazados"""
+        if not stats.get('errores_total'):
+            return
 
-        if stats['errores']:
-            self.log_movement(f"\n⚠️  ERRORES ({len(stats['errores'])}):")
-            for error in stats['errores'][:10]:  # Mostrar primeros 10
-                self.log_movement(f"  • {error}")
+        self.log_movement(f"\n⚠️  ERRORES ({stats['errores_total']:,}):")
+        for linea in error_summary(stats):
+            self.log_movement(f"  • {linea}")
+        for error in stats['errores'][:5]:  # Mostrar algunos ejemplos
+            self.log_movement(f"      ◦ {error}")
+        if stats.get('archivo_rechazados'):
+            self.log_movement(f"  • Filas rechazadas: {stats['archivo_rechazados']}")
 
     def search_user_by_id(self):
         """Buscar usuario por ID"""
@@ -673,50 +902,33 @@ class MainWindow:
             messagebox.showwarning("Advertencia", "Ingrese un ID de usuario")
             return
 
-        try:
-            self.cursor.execute("""
-                SELECT
-                    u.UserId,
-                    u.Nombre,
-                    u.Email,
-                    un.NombreUnidad,
-                    u.Nivel,
-                    u.Division,
-                    m.NombreModulo,
-                    pm.EstatusModuloUsuario,
-                    CONVERT(VARCHAR(10), pm.FechaInicio, 103) as FechaAsignacion,
-                    CONVERT(VARCHAR(10), pm.FechaFinalizacion, 103) as FechaFinalizacion
-                FROM Instituto_Usuario u
-                LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
-                LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
-                LEFT JOIN Instituto_Modulo m ON pm.IdModulo = m.IdModulo
-                WHERE u.UserId = ?
-                ORDER BY m.NombreModulo
-            """, (user_id,))
-
-            results = self.cursor.fetchall()
+        def mostrar(results):
             if results:
                 self.display_search_results(results,
                     ['User ID', 'Nombre', 'Email', 'Unidad', 'Nivel', 'División',
                      'Módulo', 'Estatus Módulo', 'Fecha Inicio', 'Fecha Fin'])
             else:
                 messagebox.showinfo("Sin resultados", "Usuario no encontrado")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error en búsqueda: {str(e)}")
+
+        # En un hilo de consulta: la interfaz no se congela y una consulta nueva
+        # descarta el resultado de la anterior
+        self.query_executor.submit(
+            'resultados', self.db.query, 'user_search', (user_id,), on_done=mostrar,
+            on_error=lambda e: messagebox.showerror("Error", f"Error en búsqueda: {str(e)}"))
 
     def load_business_units(self):
         """Cargar unidades de negocio en combobox"""
-        try:
-            self.cursor.execute("SELECT DISTINCT NombreUnidad FROM Instituto_UnidadDeNegocio ORDER BY NombreUnidad")
-            units = self.cursor.fetchall()
+        def mostrar(units):
             unit_names = [unit[0] for unit in units]
 
-            if hasattr(self, 'business_unit_combo'):
+            if hasattr(self, 'business_unit_combo') and self.business_unit_combo.winfo_exists():
                 self.business_unit_combo.configure(values=unit_names)
                 if unit_names:
                     self.business_unit_combo.set(unit_names[0])
-        except Exception as e:
-            print(f"Error cargando unidades: {e}")
+
+        self.query_executor.submit(
+            'unidades', self.db.query, 'business_unit_names',
+            on_done=mostrar, on_error=lambda e: print(f"Error cargando unidades: {e}"))
 
     def query_business_unit_from_combo(self):
         """Consultar por unidad de negocio seleccionada"""
@@ -725,58 +937,32 @@ class MainWindow:
             messagebox.showwarning("Advertencia", "Seleccione una unidad de negocio")
             return
 
-        try:
-            self.cursor.execute("""
-                SELECT
-                    u.UserId,
-                    u.Nombre,
-                    u.Email,
-                    un.NombreUnidad,
-                    COUNT(DISTINCT pm.IdModulo) as TotalModulos,
-                    SUM(CASE WHEN pm.EstatusModuloUsuario = 'Terminado' THEN 1 ELSE 0 END) as Completados
-                FROM Instituto_Usuario u
-                JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
-                LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
-                WHERE un.NombreUnidad = ?
-                GROUP BY u.UserId, u.Nombre, u.Email, un.NombreUnidad
-                ORDER BY u.Nombre
-            """, (unit_name,))
-
-            results = self.cursor.fetchall()
+        def mostrar(results):
             if results:
                 self.display_search_results(results,
-                    ['User ID', 'Nombre', 'Email', 'Unidad', 'Total Módulos', 'Completados'])
+                    ['User ID', 'Nombre', 'Email', 'Unidad', 'Total Módulos',
+                     'Completados', 'En Proceso', 'Registrados'])
             else:
                 messagebox.showinfo("Sin resultados", f"No hay usuarios en {unit_name}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error en consulta: {str(e)}")
+
+        self.query_executor.submit('resultados', self.db.query, 'users_by_unit_name', (unit_name,),
+                                   on_done=mostrar, on_error=self._query_failed)
 
     def query_new_users(self):
         """Consultar todos los usuarios"""
-        try:
-            self.cursor.execute("""
-                SELECT
-                    u.UserId,
-                    u.Nombre,
-                    u.Email,
-                    un.NombreUnidad,
-                    COUNT(DISTINCT pm.IdModulo) as TotalModulos,
-                    SUM(CASE WHEN pm.EstatusModuloUsuario = 'Completado' THEN 1 ELSE 0 END) as Completados
-                FROM Instituto_Usuario u
-                LEFT JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
-                LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
-                GROUP BY u.UserId, u.Nombre, u.Email, un.NombreUnidad
-                ORDER BY u.UserId
-            """)
-
-            results = self.cursor.fetchall()
+        def mostrar(results):
             if results:
                 self.display_search_results(results,
                     ['User ID', 'Nombre', 'Email', 'Unidad', 'Total Módulos', 'Completados'])
             else:
                 messagebox.showinfo("Sin resultados", "No hay usuarios en el sistema")
-        except Exception as e:
-            messagebox.showerror("Error", f"Error en consulta: {str(e)}")
+
+        self.query_executor.submit('resultados', self.db.query, 'users_with_progress',
+                                   on_done=mostrar, on_error=self._query_failed)
+
+    def _query_failed(self, error):
+        """Error de una consulta en segundo plano (se recibe en el hilo de la interfaz)"""
+        messagebox.showerror("Error", f"Error en consulta: {str(error)}")
 
     def display_search_results(self, results, columns):
         """Mostrar resultados en treeview"""
@@ -825,22 +1011,17 @@ class MainWindow:
 
     def show_progress_stats(self):
         """Mostrar estadísticas de progreso"""
-        try:
-            self.cursor.execute("SELECT COUNT(*) FROM Instituto_Usuario")
-            total_users = self.cursor.fetchone()[0]
+        def consultar():
+            """Las tres consultas en el hilo de consulta"""
+            total_users = self.db.query_one('count_users')[0]
 
-            self.cursor.execute("SELECT COUNT(*) FROM Instituto_Modulo")
-            total_modules = self.cursor.fetchone()[0]
+            total_modules = self.db.query_one('count_modules')[0]
 
-            self.cursor.execute("""
-                SELECT
-                    SUM(CASE WHEN EstatusModuloUsuario = 'Terminado' THEN 1 ELSE 0 END) as Completados,
-                    SUM(CASE WHEN EstatusModuloUsuario = 'En Progreso' THEN 1 ELSE 0 END) as EnProgreso,
-                    COUNT(*) as Total
-                FROM Instituto_ProgresoModulo
-            """)
-            result = self.cursor.fetchone()
+            result = self.db.query_one('progress_status_totals')
+            return total_users, total_modules, result
 
+        def mostrar(datos):
+            total_users, total_modules, result = datos
             msg = f"""
 📊 ESTADÍSTICAS GENERALES
 
@@ -849,13 +1030,15 @@ Módulos: {total_modules}
 
 Inscripciones Completadas: {result[0]}
 En Progreso: {result[1]}
-Total Inscripciones: {result[2]}
+Total Inscripciones: {result[3]}
 
-Porcentaje Completado: {(result[0]/result[2]*100):.1f}%
+Porcentaje Completado: {(result[0]/result[3]*100):.1f}%
 """
             messagebox.showinfo("Estadísticas", msg)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error obteniendo estadísticas: {str(e)}")
+
+        self.query_executor.submit(
+            'estadisticas', consultar, on_done=mostrar,
+            on_error=lambda e: messagebox.showerror("Error", f"Error obteniendo estadísticas: {str(e)}"))
 
     def show_about(self):
         """Mostrar información sobre la aplicación"""
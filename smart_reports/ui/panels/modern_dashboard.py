@@ -2,6 +2,7 @@
 Panel ModernDashboard - Dashboard rediseñado con múltiples visualizaciones
 """
 import customtkinter as ctk
+from smart_reports.database.queries import DashboardSnapshot, DatabaseQueries
 from smart_reports.ui.components.metric_card import MetricCard
 from smart_reports.ui.components.chart_card import ChartCard
 
@@ -9,15 +10,18 @@ from smart_reports.ui.components.chart_card import ChartCard
 class ModernDashboard(ctk.CTkFrame):
     """Dashboard completamente rediseñado con visualizaciones modernas"""
 
-    def __init__(self, parent, db_connection, **kwargs):
+    def __init__(self, parent, db, query_executor=None, **kwargs):
         """
         Args:
             parent: Widget padre
-            db_connection: Conexión a la base de datos
+            db: DatabaseConnection (cada consulta usa su propia conexión del pool)
+            query_executor: QueryExecutor de la ventana. Con él los datos se cargan
+                            en segundo plano; sin él, al crear el panel.
         """
         super().__init__(parent, fg_color='#1a1d2e', **kwargs)
-        self.db = db_connection
-        self.cursor = db_connection.cursor() if db_connection else None
+        self.db = db
+        self.queries = DatabaseQueries() if db else None
+        self.query_executor = query_executor
 
         # Configurar grid principal
         self.grid_columnconfigure(0, weight=1)
@@ -41,17 +45,52 @@ class ModernDashboard(ctk.CTkFrame):
         # Header con título y botón
         self._create_header(scroll_frame)
 
+        if self.query_executor is None:
+            self._show_data(scroll_frame, self._load_data())
+            return
+
+        # Las consultas corren fuera del hilo de la interfaz; mientras, un aviso
+        loading = ctk.CTkLabel(
+            scroll_frame,
+            text='Cargando datos...',
+            font=('Segoe UI', 14),
+            text_color='#a0a0b0'
+        )
+        loading.grid(row=1, column=0, columnspan=3, padx=10, pady=40)
+
+        def mostrar(data):
+            if not scroll_frame.winfo_exists():
+                return
+            loading.destroy()
+            self._show_data(scroll_frame, data)
+
+        self.query_executor.submit('dashboard', self._load_data, on_done=mostrar)
+
+    def _load_data(self) -> DashboardSnapshot:
+        """Todos los datos del dashboard en un viaje a la BD (se ejecuta en el hilo de consulta)"""
+        if not self.queries:
+            return DashboardSnapshot()
+        try:
+            return self.queries.get_dashboard_snapshot()
+        except Exception as e:
+            print(f"Error obteniendo datos del dashboard: {e}")
+            return DashboardSnapshot()
+
+    def _show_data(self, parent, data: DashboardSnapshot):
+        """Crear las filas del dashboard con los datos ya cargados"""
         # Row 1: Métricas principales (3 cards)
-        self._create_metrics_row(scroll_frame)
+        self._create_metrics_row(parent, data.total_users, data.modules_in_progress,
+                                 data.completion_rate)
 
-        # Row 2: Distribución por unidad (2 cards)
-        self._create_distribution_row(scroll_frame)
+        # Row 2: Distribución por unidad (2 cards); solo unidades con usuarios
+        # (una porción vacía no aporta a las gráficas)
+        self._create_distribution_row(parent, [row for row in data.users_by_unit if row[1]])
 
         # Row 3: Progreso de módulos (1 card grande)
-        self._create_modules_progress(scroll_frame)
+        self._create_modules_progress(parent, data.modules_progress)
 
         # Row 4: Top performers (2 cards)
-        self._create_performers_row(scroll_frame)
+        self._create_performers_row(parent, data.top_units, data.status_distribution)
 
     def _create_header(self, parent):
         """Crear header con título y acciones"""
@@ -84,13 +123,8 @@ class ModernDashboard(ctk.CTkFrame):
         )
         refresh_btn.pack(side='right', padx=10)
 
-    def _create_metrics_row(self, parent):
+    def _create_metrics_row(self, parent, total_users, active_modules, completion_rate):
         """Crear las 3 cards de métricas principales"""
-        # Obtener datos reales
-        total_users = self._get_total_users()
-        active_modules = self._get_active_modules()
-        completion_rate = self._get_completion_rate()
-
         # Card 1: Total Usuarios
         card1 = MetricCard(
             parent,
@@ -123,11 +157,8 @@ class ModernDashboard(ctk.CTkFrame):
         )
         card3.grid(row=1, column=2, sticky='ew', padx=10, pady=10)
 
-    def _create_distribution_row(self, parent):
+    def _create_distribution_row(self, parent, unidades_data):
         """Crear distribución por unidades de negocio"""
-        # Obtener datos
-        unidades_data = self._get_users_by_unit()
-
         if unidades_data and len(unidades_data) > 0:
             unidades = [row[0] for row in unidades_data]
             counts = [row[1] for row in unidades_data]
@@ -151,11 +182,8 @@ class ModernDashboard(ctk.CTkFrame):
             )
             placeholder.grid(row=2, column=0, columnspan=3, padx=10, pady=40)
 
-    def _create_modules_progress(self, parent):
+    def _create_modules_progress(self, parent, modules_data):
         """Crear gráfico de progreso por módulos"""
-        # Obtener datos
-        modules_data = self._get_modules_progress()
-
         if modules_data and len(modules_data) > 0:
             # Preparar datos para gráfico apilado
             module_names = []
@@ -183,11 +211,9 @@ class ModernDashboard(ctk.CTkFrame):
             )
             placeholder.grid(row=3, column=0, columnspan=3, padx=10, pady=40)
 
-    def _create_performers_row(self, parent):
+    def _create_performers_row(self, parent, top_units, status_data):
         """Crear cards de top performers"""
         # Card 1: Top unidades por completados
-        top_units = self._get_top_units_by_completion()
-
         if top_units and len(top_units) > 0:
             units = [row[0] for row in top_units[:5]]  # Top 5
             completions = [row[1] for row in top_units[:5]]
@@ -205,8 +231,6 @@ class ModernDashboard(ctk.CTkFrame):
             placeholder1.grid(row=4, column=0, columnspan=2, padx=10, pady=40)
 
         # Card 2: Distribución de estados
-        status_data = self._get_status_distribution()
-
         if status_data and len(status_data) > 0:
             statuses = [row[0] for row in status_data]
             counts = [row[1] for row in status_data]
@@ -223,130 +247,17 @@ class ModernDashboard(ctk.CTkFrame):
             )
             placeholder2.grid(row=4, column=2, padx=10, pady=40)
 
-    # ==================== MÉTODOS DE DATOS ====================
-
-    def _get_total_users(self):
-        """Obtener total de usuarios"""
-        if not self.cursor:
-            return 0
-        try:
-            self.cursor.execute("SELECT COUNT(*) FROM Instituto_Usuario")
-            result = self.cursor.fetchone()
-            return result[0] if result else 0
-        except Exception as e:
-            print(f"Error obteniendo total de usuarios: {e}")
-            return 0
-
-    def _get_active_modules(self):
-        """Obtener número de módulos activos"""
-        if not self.cursor:
-            return 0
-        try:
-            self.cursor.execute("SELECT COUNT(DISTINCT IdModulo) FROM Instituto_ProgresoModulo")
-            result = self.cursor.fetchone()
-            return result[0] if result else 0
-        except Exception as e:
-            print(f"Error obteniendo módulos activos: {e}")
-            return 0
-
-    def _get_completion_rate(self):
-        """Obtener tasa de completado"""
-        if not self.cursor:
-            return 0.0
-        try:
-            self.cursor.execute("""
-                SELECT
-                    CAST(SUM(CASE WHEN EstatusModuloUsuario = 'Terminado' THEN 1 ELSE 0 END) AS FLOAT) * 100 /
-                    NULLIF(COUNT(*), 0) as rate
-                FROM Instituto_ProgresoModulo
-            """)
-            result = self.cursor.fetchone()
-            return result[0] if result and result[0] else 0.0
-        except Exception as e:
-            print(f"Error obteniendo tasa de completado: {e}")
-            return 0.0
-
-    def _get_users_by_unit(self):
-        """Obtener usuarios por unidad de negocio"""
-        if not self.cursor:
-            return []
-        try:
-            self.cursor.execute("""
-                SELECT un.NombreUnidad, COUNT(u.UserId)
-                FROM Instituto_Usuario u
-                JOIN Instituto_UnidadDeNegocio un ON u.IdUnidadDeNegocio = un.IdUnidadDeNegocio
-                GROUP BY un.IdUnidadDeNegocio, un.NombreUnidad
-                ORDER BY COUNT(u.UserId) DESC
-            """)
-            return self.cursor.fetchall()
-        except Exception as e:
-            print(f"Error obteniendo usuarios por unidad: {e}")
-            return []
-
-    def _get_modules_progress(self):
-        """Obtener progreso por módulo"""
-        if not self.cursor:
-            return []
-        try:
-            self.cursor.execute("""
-                SELECT
-                    m.NombreModulo,
-                    SUM(CASE WHEN pm.EstatusModuloUsuario = 'Terminado' THEN 1 ELSE 0 END) as Completados,
-                    SUM(CASE WHEN pm.EstatusModuloUsuario = 'En Progreso' THEN 1 ELSE 0 END) as EnProgreso,
-                    SUM(CASE WHEN pm.EstatusModuloUsuario NOT IN ('Terminado', 'En Progreso') THEN 1 ELSE 0 END) as Registrados
-                FROM Instituto_Modulo m
-                LEFT JOIN Instituto_ProgresoModulo pm ON m.IdModulo = pm.IdModulo
-                GROUP BY m.IdModulo, m.NombreModulo
-                ORDER BY m.IdModulo
-            """)
-            return self.cursor.fetchall()
-        except Exception as e:
-            print(f"Error obteniendo progreso de módulos: {e}")
-            return []
-
-    def _get_top_units_by_completion(self):
-        """Obtener top unidades por completados"""
-        if not self.cursor:
-            return []
-        try:
-            self.cursor.execute("""
-                SELECT
-                    un.NombreUnidad,
-                    COUNT(CASE WHEN pm.EstatusModuloUsuario = 'Terminado' THEN 1 END) as Completados
-                FROM Instituto_UnidadDeNegocio un
-                LEFT JOIN Instituto_Usuario u ON un.IdUnidadDeNegocio = u.IdUnidadDeNegocio
-                LEFT JOIN Instituto_ProgresoModulo pm ON u.UserId = pm.UserId
-                GROUP BY un.IdUnidadDeNegocio, un.NombreUnidad
-                ORDER BY Completados DESC
-            """)
-            return self.cursor.fetchall()
-        except Exception as e:
-            print(f"Error obteniendo top unidades: {e}")
-            return []
-
-    def _get_status_distribution(self):
-        """Obtener distribución por estado"""
-        if not self.cursor:
-            return []
-        try:
-            self.cursor.execute("""
-                SELECT
-                    EstatusModuloUsuario as Estado,
-                    COUNT(*) as Total
-                FROM Instituto_ProgresoModulo
-                GROUP BY EstatusModuloUsuario
-                ORDER BY Total DESC
-            """)
-            return self.cursor.fetchall()
-        except Exception as e:
-            print(f"Error obteniendo distribución de estados: {e}")
-            return []
-
     def refresh_all_data(self):
         """Refrescar todos los datos del dashboard"""
-        # Limpiar widgets existentes
+        # Limpiar widgets existentes (una carga anterior aún en curso se descarta)
         for widget in self.winfo_children():
             widget.destroy()
 
         # Recrear contenido
         self._create_scrollable_content()
+
+    def destroy(self):
+        """Al cambiar de panel, la carga pendiente ya no tiene dónde mostrarse"""
+        if self.query_executor is not None:
+            self.query_executor.cancel('dashboard')
+        super().destroy()
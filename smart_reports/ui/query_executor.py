@@ -0,0 +1,122 @@
+"""
+Consultas a la BD fuera del hilo de la interfaz
+Las consultas (métodos de DatabaseQueries, db.execute, ...) corren en un pool de
+hilos y su resultado se entrega al hilo de Tk mediante root.after (Tkinter no
+admite tocar widgets desde otro hilo). Cada consulta se envía con una clave: al
+enviar otra con la misma clave (p. ej. el usuario vuelve a pulsar "Buscar") la
+anterior se cancela si aún no empezó, o su resultado se descarta al llegar.
+Sirve para ambas ventanas y para los paneles.
+"""
+import itertools
+import queue
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from smart_reports.config.settings import POOL_CONFIG
+
+
+class QueryExecutor:
+    """Pool de hilos para consultas con entrega de resultados vía root.after"""
+
+    POLL_MS = 50
+
+    def __init__(self, root, max_workers: Optional[int] = None):
+        """
+        Args:
+            root: Ventana Tk (para programar la entrega con after)
+            max_workers: Hilos de consulta. None = POOL_CONFIG['max_size']: más hilos
+                         que conexiones en el pool solo esperarían una conexión libre
+        """
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or POOL_CONFIG['max_size'],
+                                            thread_name_prefix='consulta')
+        self._terminadas = queue.Queue()
+        self._tickets = itertools.count(1)
+        # Clave -> (ticket vigente, future). Un resultado con otro ticket es obsoleto
+        self._vigentes: Dict[str, tuple] = {}
+        self._pendientes = 0
+        self._sondeando = False
+
+    def submit(self, key: str, fn: Callable[..., Any], *args,
+               on_done: Callable[[Any], None],
+               on_error: Optional[Callable[[Exception], None]] = None,
+               **kwargs) -> Future:
+        """
+        Ejecuta fn(*args, **kwargs) en un hilo de consulta (llamar desde el hilo de Tk)
+        Args:
+            key: Consulta lógica ('resultados', 'dashboard', ...). Reemplaza a la
+                 anterior con la misma clave.
+            on_done: Recibe el resultado en el hilo de Tk
+            on_error: Recibe la excepción en el hilo de Tk (None = se imprime)
+        Retorna el Future de la consulta.
+        """
+        self.cancel(key)
+
+        ticket = next(self._tickets)
+        future = self._executor.submit(fn, *args, **kwargs)
+        self._vigentes[key] = (ticket, future)
+        self._pendientes += 1
+        # El callback corre en el hilo de consulta: solo encola
+        future.add_done_callback(
+            lambda terminado: self._terminadas.put((key, ticket, terminado, on_done, on_error)))
+
+        if not self._sondeando:
+            self._sondeando = True
+            self.root.after(self.POLL_MS, self._poll)
+        return future
+
+    def cancel(self, key: str) -> None:
+        """Cancela la consulta de la clave; si ya está en curso, su resultado se descarta"""
+        vigente = self._vigentes.pop(key, None)
+        if vigente is not None:
+            vigente[1].cancel()
+
+    def cancel_prefix(self, prefix: str) -> None:
+        """Cancela todas las consultas cuya clave empieza por `prefix` (p. ej. las de un panel)"""
+        for key in [key for key in self._vigentes if key.startswith(prefix)]:
+            self.cancel(key)
+
+    def is_running(self, key: str) -> bool:
+        return key in self._vigentes
+
+    def shutdown(self) -> None:
+        """Cancela todo y libera los hilos (al cerrar la ventana)"""
+        for key in list(self._vigentes):
+            self.cancel(key)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _poll(self) -> None:
+        """Hilo de Tk: entrega los resultados vigentes y descarta los obsoletos"""
+        while True:
+            try:
+                key, ticket, future, on_done, on_error = self._terminadas.get_nowait()
+            except queue.Empty:
+                break
+            self._pendientes -= 1
+
+            vigente = self._vigentes.get(key)
+            if future.cancelled() or vigente is None or vigente[0] != ticket:
+                continue
+            del self._vigentes[key]
+
+            error = future.exception()
+            try:
+                if error is None:
+                    on_done(future.result())
+                elif on_error is not None:
+                    on_error(error)
+                else:
+                    print(f"✗ Error en consulta '{key}': {error}")
+            except Exception:
+                # Un callback con error no debe detener la entrega de los demás
+                traceback.print_exc()
+
+        if self._pendientes > 0:
+            try:
+                self.root.after(self.POLL_MS, self._poll)
+            except Exception:
+                # La ventana ya se destruyó
+                self._sondeando = False
+        else:
+            self._sondeando = False